@@ -0,0 +1,149 @@
+# benchmarks/capture_jitter_bench.py
+"""
+Gate capture jitter, in-process versus the isolated capture process, with
+and without web-like load in the main process.
+
+A separate "hardware" process produces edges at a fixed rate: it notes
+the true edge time on CLOCK_MONOTONIC and writes the edge to a pipe, the
+way the kernel queues one on a GPIO line. The edges are stamped on
+wake-up, as RPi.GPIO's wait_for_edge() path does, either:
+
+    in-process  by a thread of this process (the original local gate thread)
+    isolated    by hardware.capture_process, handed over through the
+                shared-memory ring
+
+For each edge:
+  - stamp error: wake-up stamp minus the true edge time. This is what a
+    runner's time would carry.
+  - delivery: the time from the edge until this process has it.
+
+Load means threads running the /api/stats handler's work: a leaderboard
+query and JSON encoding, against a database of a few hundred runners.
+
+    python -m benchmarks.capture_jitter_bench [--edges 500] [--rate 100] [--load-threads 4]
+                                              [--fifo 50] [--cpu 3] [--mlock]
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import statistics
+import tempfile
+import threading
+import time
+
+from common import config
+
+def edge_generator(writer, results, count: int, rate: float):
+    """The stand-in for the GPIO line: writes `count` edges at `rate` Hz, then reports their true times."""
+    from hardware.gpio_cdev import encode_line_event
+    fd = writer.fileno()
+    period_ns = int(1e9 / rate)
+    true_ns = []
+    next_ns = time.monotonic_ns() + period_ns
+    for seqno in range(1, count + 1):
+        delay = next_ns - time.monotonic_ns()
+        if delay > 0:
+            time.sleep(delay / 1e9)
+        edge_ns = time.monotonic_ns()
+        os.write(fd, encode_line_event(edge_ns, False, seqno))
+        true_ns.append(edge_ns)
+        next_ns += period_ns
+    results.send(true_ns)
+
+def populate(runners: int = 300, runs_each: int = 10):
+    from common import database
+    database.initialize_db()
+    for i in range(runners):
+        runner_id = database.add_runner(f"Runner {i:03d}")
+        database.add_run_times([{'uid': f"{i}-{j}", 'runner_id': runner_id, 'run_date': '2024-01-01 12:00:00',
+                                 'run_time_ns': 5_000_000_000 + i * 1000 + j} for j in range(runs_each)])
+
+def web_load(stop: threading.Event):
+    from common import database
+    while not stop.is_set():
+        json.dumps(database.get_leaderboard_stats())
+
+def run_scenario(isolated: bool, load_threads: int, args) -> dict:
+    from hardware.capture_process import CaptureProcess
+    from hardware.gpio_cdev import GpioLineEventReader
+
+    context = multiprocessing.get_context('spawn')
+    reader, writer = context.Pipe(duplex=False)
+    results_in, results_out = context.Pipe(duplex=False)
+    stamps = {}     # seqno -> wake-up stamp
+    delivered = {}  # seqno -> when this process had it
+
+    if isolated:
+        source = CaptureProcess(0, 'PIPE', edge_pipe=reader, stamp_on_read=True,
+                                realtime=(args.fifo, args.cpu, args.mlock))
+    else:
+        source = GpioLineEventReader.from_fd(reader.fileno())
+
+    def consume():
+        while len(delivered) < args.edges:
+            events = source.read_events(0.5)
+            now = time.monotonic_ns()
+            for event in events:
+                stamps[event.seqno] = event.timestamp_ns if isolated else now
+                delivered[event.seqno] = now
+    consumer = threading.Thread(target=consume, daemon=True)
+    consumer.start()
+    if isolated:
+        time.sleep(1.0)  # Let the capture process start before the clock runs
+
+    stop = threading.Event()
+    for _ in range(load_threads):
+        threading.Thread(target=web_load, args=(stop,), daemon=True).start()
+    generator = context.Process(target=edge_generator, args=(writer, results_out, args.edges, args.rate))
+    generator.start()
+    true_ns = results_in.recv()
+    generator.join()
+    consumer.join(5)
+    stop.set()
+    if isolated:
+        source.close()
+
+    errors, delivery = [], []
+    for seqno, edge_ns in enumerate(true_ns, start=1):
+        if seqno in stamps:
+            errors.append(stamps[seqno] - edge_ns)
+            delivery.append(delivered[seqno] - edge_ns)
+    return {'captured': len(errors), 'errors': errors, 'delivery': delivery}
+
+def summary_us(values) -> str:
+    values = sorted(values)
+    pick = lambda fraction: values[min(len(values) - 1, int(len(values) * fraction))] / 1000
+    return (f"{pick(0.5):8.1f} {pick(0.99):8.1f} {values[-1] / 1000:9.1f} "
+            f"{statistics.pstdev(values) / 1000:8.1f}")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--edges', type=int, default=500)
+    parser.add_argument('--rate', type=float, default=100.0, help='edges per second')
+    parser.add_argument('--load-threads', type=int, default=4)
+    parser.add_argument('--fifo', type=int, default=0, help='SCHED_FIFO priority for the capture process')
+    parser.add_argument('--cpu', type=int, default=None, help='CPU to pin the capture process to')
+    parser.add_argument('--mlock', action='store_true', help='mlockall() in the capture process')
+    args = parser.parse_args()
+
+    # Point the database module at a scratch file before importing it
+    config.DATABASE_FILE = os.path.join(tempfile.mkdtemp(prefix='sprint_capture_'), 'sprint_times.db')
+    populate()
+
+    print(f"{args.edges} edges at {args.rate:g} Hz; load = {args.load_threads} threads of /api/stats work; "
+          f"capture process fifo={args.fifo or 'off'} cpu={args.cpu} mlock={'on' if args.mlock else 'off'}")
+    print(f"{'':>22}  {'stamp error (us)':^35}  {'delivery (us)':^35}")
+    print(f"{'capture':>12} {'load':>9}  " + "  ".join([f"{'p50':>8} {'p99':>8} {'max':>9} {'stdev':>8}"] * 2))
+    for isolated in (False, True):
+        for load in (0, args.load_threads):
+            result = run_scenario(isolated, load, args)
+            label = 'isolated' if isolated else 'in-process'
+            if not result['errors']:
+                print(f"{label:>12} {load:>9}  no edges captured")
+                continue
+            print(f"{label:>12} {load:>9}  {summary_us(result['errors'])}  {summary_us(result['delivery'])}"
+                  + (f"  ({result['captured']}/{args.edges} captured)" if result['captured'] < args.edges else ''))
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,62 @@
+# benchmarks/clock_model_bench.py
+"""
+Accuracy and cost of the PPS clock model (common/clock_model.py).
+
+Feeds synthetic PPS edges from a local clock with a known offset and drift,
+with Gaussian capture jitter on each edge, then reports the model's actual
+conversion error against the truth, its own uncertainty estimate, and the
+cost of a monotonic-to-UTC conversion.
+
+    python -m benchmarks.clock_model_bench [--drift-ppm 12] [--jitter-us 5]
+"""
+import argparse
+import random
+import time
+
+from common.clock_model import PpsClockModel, NS_PER_SECOND
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--edges', type=int, default=300)
+    parser.add_argument('--drift-ppm', type=float, default=12.0, help='local oscillator error')
+    parser.add_argument('--jitter-us', type=float, default=5.0, help='edge capture jitter (1 sigma)')
+    parser.add_argument('--conversions', type=int, default=200000)
+    args = parser.parse_args()
+
+    rate = 1 + args.drift_ppm * 1e-6
+    utc_start = 1_700_000_000 * NS_PER_SECOND
+    mono_start = 5_000 * NS_PER_SECOND
+
+    def true_utc(mono_ns):
+        return utc_start + int((mono_ns - mono_start) / rate)
+
+    model = PpsClockModel()
+    rng = random.Random(1)
+    errors = []
+    for second in range(args.edges):
+        # Local clock reading at the true start of this UTC second, plus jitter
+        edge_mono = mono_start + int(second * NS_PER_SECOND * rate)
+        observed = edge_mono + int(rng.gauss(0, args.jitter_us * 1000))
+        model.add_edge(observed, utc_start + second * NS_PER_SECOND + rng.randint(-200_000_000, 200_000_000))
+        if second >= 10:
+            # Check half-way to the next edge, the worst point between updates
+            probe = edge_mono + NS_PER_SECOND // 2
+            errors.append(abs(model.to_utc_ns(probe) - true_utc(probe)))
+
+    errors.sort()
+    fit = model._fit
+    print(f"Edges: {args.edges}, drift {args.drift_ppm} ppm, capture jitter {args.jitter_us} us")
+    print(f"  fitted oscillator err  {fit.drift * -1e6:8.3f} ppm")
+    print(f"  error p50 / p99 / max {errors[len(errors) // 2] / 1000:8.2f} / "
+          f"{errors[int(len(errors) * 0.99)] / 1000:.2f} / {errors[-1] / 1000:.2f} us")
+    print(f"  model uncertainty     {fit.uncertainty_ns / 1000:8.2f} us (1 sigma)")
+
+    probe = mono_start + args.edges * NS_PER_SECOND
+    start = time.perf_counter()
+    for _ in range(args.conversions):
+        model.to_utc_ns(probe)
+    elapsed = time.perf_counter() - start
+    print(f"  conversion cost       {elapsed / args.conversions * 1e6:8.3f} us")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,124 @@
+# benchmarks/cold_start_bench.py
+"""
+Cold start of the primary, from process launch to the first gate trigger
+accepted by the timing engine, on the simulated hardware backend.
+
+Each run launches a fresh interpreter with a new, empty database. The child
+arms a lane as soon as the gates are up and then keeps breaking the start
+beam, as a runner waiting at the gate would, and reports when:
+
+    import  main_app imported
+    gates   gate path up (sensor, event core, network listeners)
+    trigger first trigger that starts a run
+    web     web server answering (skipped with --no-web)
+
+all in milliseconds from launch, written to a result file rather than
+stdout so the app's own output can't garble it. Exits with status 1 when
+any run doesn't start a run or the median time to the first trigger
+exceeds --max-ms, so it can guard against startup regressions.
+
+    python -m benchmarks.cold_start_bench [--runs 5] [--max-ms 1500] [--no-web]
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+STAGES = ('import', 'gates', 'trigger', 'web')
+
+def child(args):
+    from benchmarks.e2e_latency_bench import configure, reachable, wait_until
+    from common import config
+    args.transport = 'TCP'
+    configure(tempfile.mkdtemp(prefix='sprint_cold_'), args)
+
+    from hardware import sim
+    edges = sim.gate_edges(config.PRIMARY_GATE_PIN)
+    armed = threading.Event()
+    accepted = threading.Event()
+
+    def break_beam():
+        # Not before arming: an unmatched break would hold off the next one for DEBOUNCE_TIME
+        armed.wait()
+        while not accepted.is_set():
+            edges.inject()
+            time.sleep(0.002)
+    threading.Thread(target=break_beam, daemon=True).start()
+
+    import main_app
+    from common import database
+    from common.event_core import EVENT_ARM
+    from common.timing_engine import STATE_ARMED, STATE_RUNNING
+    marks = {'import': time.monotonic_ns()}
+    app = main_app.MainApplication(headless=True)
+    marks['gates'] = app.gates_ready_mono_ns
+    # Only a trigger that starts a run counts; triggers on an unarmed course are unmatched
+    app.core.post(EVENT_ARM, runner=(database.add_runner('Cold Start'), 'Cold Start'))
+    wait_until(lambda: any(lane.state == STATE_ARMED for lane in app.engine.lanes), timeout=30, interval=0.0005)
+    armed.set()
+    if wait_until(lambda: any(lane.state == STATE_RUNNING for lane in app.engine.lanes),
+                  timeout=30, interval=0.0005):
+        marks['trigger'] = time.monotonic_ns()
+    accepted.set()
+    if not args.no_web:
+        if wait_until(lambda: reachable(f"http://127.0.0.1:{config.WEB_PORT}/api/live_data"), timeout=30):
+            marks['web'] = time.monotonic_ns()
+
+    with open(args.result_file, 'w') as f:
+        json.dump({stage: (ns - args.launched_ns) / 1e6 for stage, ns in marks.items()}, f)
+    os._exit(0)  # Don't wait on the app's threads
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--max-ms', type=float, default=1500.0, help='fail above this median launch-to-trigger time')
+    parser.add_argument('--no-web', action='store_true', help='do not wait for the web server')
+    parser.add_argument('--child', action='store_true', help=argparse.SUPPRESS)
+    parser.add_argument('--launched-ns', type=int, help=argparse.SUPPRESS)
+    parser.add_argument('--result-file', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.child:
+        return child(args)
+
+    results = {stage: [] for stage in STAGES}
+    for run in range(args.runs):
+        command = [sys.executable, '-m', 'benchmarks.cold_start_bench', '--child']
+        if args.no_web:
+            command.append('--no-web')
+        result_file = os.path.join(tempfile.mkdtemp(prefix='sprint_cold_result_'), 'result.json')
+        # CLOCK_MONOTONIC is system-wide, so the child can measure from this instant
+        launched_ns = time.monotonic_ns()
+        output = subprocess.run(command + ['--launched-ns', str(launched_ns), '--result-file', result_file],
+                                capture_output=True, text=True, timeout=120).stdout
+        try:
+            with open(result_file) as f:
+                marks = json.load(f)
+        except (OSError, ValueError):
+            print(f"Run {run + 1}: no result\n{output}")
+            continue
+        for stage, ms in marks.items():
+            results[stage].append(ms)
+
+    print(f"{args.runs} cold starts, headless, simulated hardware")
+    print(f"{'stage':>8}  {'min ms':>8}  {'p50 ms':>8}  {'max ms':>8}")
+    for stage in STAGES:
+        values = sorted(results[stage])
+        if values:
+            print(f"{stage:>8}  {values[0]:8.1f}  {values[len(values) // 2]:8.1f}  {values[-1]:8.1f}")
+
+    triggers = sorted(results['trigger'])
+    if len(triggers) < args.runs:
+        print("FAIL: not every run started timing a run")
+        sys.exit(1)
+    median = triggers[len(triggers) // 2]
+    if median > args.max_ms:
+        print(f"FAIL: median launch to first trigger {median:.1f} ms > {args.max_ms:.0f} ms")
+        sys.exit(1)
+    print(f"OK: median launch to first trigger {median:.1f} ms <= {args.max_ms:.0f} ms")
+
+if __name__ == '__main__':
+    main()
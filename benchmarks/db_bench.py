@@ -0,0 +1,111 @@
+# benchmarks/db_bench.py
+"""
+Micro-benchmark of the pooled connection layer in common/database.py against
+the previous open-a-connection-per-call behaviour.
+
+Run from the project root:
+    python -m benchmarks.db_bench [--calls 2000] [--db /path/on/sdcard.db]
+"""
+import argparse
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+
+from common import config
+
+# --- Open-per-call reference implementations (the pre-pool code) ---
+def legacy_add_run_time(db_file, runner_id, run_time):
+    conn = sqlite3.connect(db_file)
+    cursor = conn.cursor()
+    cursor.execute('INSERT INTO times (runner_id, run_time) VALUES (?, ?)', (runner_id, run_time))
+    conn.commit()
+    conn.close()
+
+def legacy_get_runner_times(db_file, runner_id):
+    conn = sqlite3.connect(db_file)
+    cursor = conn.cursor()
+    cursor.execute('SELECT id, run_time, run_date FROM times WHERE runner_id = ? ORDER BY run_date DESC', (runner_id,))
+    times = cursor.fetchall()
+    conn.close()
+    return times
+
+def legacy_get_all_runners(db_file):
+    conn = sqlite3.connect(db_file)
+    cursor = conn.cursor()
+    cursor.execute('SELECT id, name FROM runners ORDER BY name')
+    runners = cursor.fetchall()
+    conn.close()
+    return runners
+
+def measure(label, func, calls, in_new_thread=False):
+    """Runs func `calls` times and prints calls/sec."""
+    if in_new_thread:
+        # Mimic Flask's thread-per-request server
+        def call():
+            t = threading.Thread(target=func)
+            t.start()
+            t.join()
+    else:
+        call = func
+
+    start = time.perf_counter()
+    for _ in range(calls):
+        call()
+    elapsed = time.perf_counter() - start
+    rate = calls / elapsed
+    print(f"  {label:<44} {rate:>10.0f} calls/s  ({elapsed / calls * 1e6:8.1f} us/call)")
+    return rate
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--calls', type=int, default=2000)
+    parser.add_argument('--db', help='database file to use (default: a temporary file)')
+    args = parser.parse_args()
+
+    tmpdir = None
+    if args.db:
+        db_file = args.db
+    else:
+        tmpdir = tempfile.TemporaryDirectory()
+        db_file = os.path.join(tmpdir.name, 'bench.db')
+
+    # Point the database module at the benchmark file before importing it
+    config.DATABASE_FILE = db_file
+    from common import database
+
+    database.initialize_db()
+    runner_id = database.add_runner('Benchmark Runner')
+    for i in range(50):
+        database.add_run_time(runner_id, 5.0 + i / 100)
+
+    print(f"Database: {db_file}  ({args.calls} calls per case)")
+    cases = [
+        ('get_runner_times',
+         lambda: legacy_get_runner_times(db_file, runner_id),
+         lambda: database.get_runner_times(runner_id)),
+        ('get_all_runners',
+         lambda: legacy_get_all_runners(db_file),
+         database.get_all_runners),
+        # Writes last so the read cases see a fixed-size table
+        ('add_run_time',
+         lambda: legacy_add_run_time(db_file, runner_id, 5.5),
+         lambda: database.add_run_time(runner_id, 5.5)),
+    ]
+
+    for name, legacy, pooled in cases:
+        print(f"{name}:")
+        old = measure('open-per-call', legacy, args.calls)
+        new = measure('pooled connection', pooled, args.calls)
+        print(f"  {'speed-up':<44} {new / old:>10.1f}x")
+        old = measure('open-per-call, new thread per call', legacy, args.calls // 4, in_new_thread=True)
+        new = measure('pooled connection, new thread per call', pooled, args.calls // 4, in_new_thread=True)
+        print(f"  {'speed-up':<44} {new / old:>10.1f}x")
+
+    database.close_connections()
+    if tmpdir:
+        tmpdir.cleanup()
+
+if __name__ == '__main__':
+    main()
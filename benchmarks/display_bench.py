@@ -0,0 +1,86 @@
+# benchmarks/display_bench.py
+"""
+LED display throughput against a stand-in SPI device that counts bytes and
+takes as long as a real bus would to clock them out. The event core's tick
+calls show_time() at --rate Hz with a running clock; compares the old path
+(every call pushes a full frame on the caller's thread) with TimingDisplay
+(mailbox + worker thread + changed-column diffing). Reports frames/s, SPI
+bytes/s and how long show_time() holds up its caller.
+
+    python -m benchmarks.display_bench [--seconds 5] [--rate 20] [--modules 4] [--bus-hz 1000000]
+"""
+import argparse
+import time
+
+from hardware.display_driver import TimingDisplay
+from hardware.led_matrix import Max7219Chain
+
+class StandInSpi:
+    """Counts bytes and sleeps for their time on a bus_hz SPI clock."""
+
+    def __init__(self, bus_hz: int):
+        self.bus_hz = bus_hz
+        self.bytes = 0
+        self.transactions = 0
+
+    def data(self, packet):
+        self.bytes += len(packet)
+        self.transactions += 1
+        time.sleep(len(packet) * 8 / self.bus_hz)
+
+def drive(show_time, seconds, rate):
+    """Calls show_time(elapsed) at `rate` Hz; returns per-call latencies in ns."""
+    calls = []
+    start = time.monotonic()
+    next_call = start
+    while True:
+        now = time.monotonic()
+        if now - start >= seconds:
+            return calls
+        t0 = time.perf_counter_ns()
+        show_time(now - start)
+        calls.append(time.perf_counter_ns() - t0)
+        next_call += 1 / rate
+        time.sleep(max(0.0, next_call - time.monotonic()))
+
+def report(name, spi, frames_sent, calls, seconds):
+    calls.sort()
+    p50 = calls[len(calls) // 2] / 1000
+    p99 = calls[min(len(calls) - 1, int(len(calls) * 0.99))] / 1000
+    print(f"{name:>8}: {frames_sent / seconds:6.1f} frames/s sent, {spi.bytes / seconds:8.0f} SPI bytes/s, "
+          f"show_time() p50 {p50:.1f} us / p99 {p99:.1f} us")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--seconds', type=float, default=5)
+    parser.add_argument('--rate', type=float, default=20, help='show_time() calls per second')
+    parser.add_argument('--modules', type=int, default=4, help='cascaded MAX7219 modules')
+    parser.add_argument('--bus-hz', type=int, default=1_000_000, help='emulated SPI clock')
+    args = parser.parse_args()
+
+    print(f"{args.modules} modules, SPI at {args.bus_hz / 1e6:g} MHz, show_time() at {args.rate:.0f} Hz "
+          f"for {args.seconds:.0f} s")
+
+    # Old path: render and push every register on the caller's thread
+    spi = StandInSpi(args.bus_hz)
+    chain = Max7219Chain(spi, args.modules)
+    spi.bytes = 0
+    calls = drive(lambda elapsed: chain.show_frame(chain.render(f"{elapsed:05.2f}"), full=True),
+                  args.seconds, args.rate)
+    report('full', spi, chain.frames_sent - 1, calls, args.seconds)
+
+    # Worker thread, latest-value mailbox, changed columns only
+    spi = StandInSpi(args.bus_hz)
+    display = TimingDisplay(cs_pin=0, cascaded=args.modules, serial=spi)
+    spi.bytes = 0
+    sent_before = display.matrix.frames_sent
+    calls = drive(display.show_time, args.seconds, args.rate)
+    time.sleep(0.1)
+    report('worker', spi, display.matrix.frames_sent - sent_before, calls, args.seconds)
+    stats = display.stats()
+    rendered = stats['frames'] - 1  # The blank frame written at start-up
+    print(f"          {stats['posted']} posted, {rendered} rendered "
+          f"({stats['posted'] - rendered} superseded in the mailbox)")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,211 @@
+# benchmarks/e2e_latency_bench.py
+"""
+End-to-end trigger latency on the simulated hardware backend: a
+MainApplication and a RemoteGate run in this process, talking over
+loopback exactly as two Pis would (TCP or acked UDP). Each run arms a
+runner, breaks the primary's start beam, then breaks the remote finish
+beam and follows that edge through the pipeline:
+
+    edge -> timestamp (remote sensor returns it)
+         -> network   (primary's event core starts handling it)
+         -> engine    (lane finished)
+         -> db        (result committed by the writer thread)
+         -> web live  (SSE /api/live_stream shows the run)
+         -> web stats (/api/stats leaderboard counts it)
+
+Every stage is reported as latency from the edge, in milliseconds. Both
+"Pis" share one interpreter (and GIL), so this is an upper bound on what
+two separate processes would see.
+
+    python -m benchmarks.e2e_latency_bench [--runs 50] [--transport TCP|UDP] [--no-web]
+"""
+import argparse
+import json
+import os
+import socket
+import tempfile
+import threading
+import time
+import urllib.request
+
+from common import config
+
+STAGES = ('timestamp', 'network', 'engine', 'db', 'web_live', 'web_stats')
+
+def free_port(kind=socket.SOCK_STREAM) -> int:
+    with socket.socket(socket.AF_INET, kind) as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+def configure(workdir: str, args):
+    """Points the whole system at the simulator, loopback and a scratch directory."""
+    config.HARDWARE_BACKEND = 'SIM'
+    config.TRIGGER_TRANSPORT = args.transport
+    config.PRIMARY_PI_IP = '127.0.0.1'
+    config.NETWORK_PORT = free_port()
+    config.UDP_TRIGGER_PORT = free_port(socket.SOCK_DGRAM)
+    config.WEB_PORT = free_port()
+    config.GPSD_PORT = free_port()
+    config.LIVE_HUB_ENABLED = False
+    config.DATABASE_FILE = os.path.join(workdir, 'sprint_times.db')
+    config.RESULT_JOURNAL_FILE = os.path.join(workdir, 'results.journal')
+    config.REMOTE_OUTBOX_FILE = os.path.join(workdir, 'remote_outbox.journal')
+
+class TimedSensor:
+    """Wraps the remote gate's sensor to note when each timestamp is produced."""
+
+    def __init__(self, sensor, marks):
+        self.sensor = sensor
+        self.marks = marks
+
+    def wait_for_trigger(self):
+        timestamp = self.sensor.wait_for_trigger()
+        if timestamp:
+            self.marks['timestamp'] = time.monotonic_ns()
+        return timestamp
+
+    def __getattr__(self, name):
+        return getattr(self.sensor, name)
+
+def watch_live_stream(url, marks, seen):
+    """Follows the SSE stream; marks the moment a new last run appears."""
+    last = None
+    with urllib.request.urlopen(url) as stream:
+        for line in stream:
+            if line.startswith(b'data: '):
+                payload = json.loads(line[6:])
+                run = payload.get('last_run')
+                if run != last:
+                    last = run
+                    marks['web_live'] = time.monotonic_ns()
+                    seen.set()
+
+def stats_run_count(url) -> int:
+    with urllib.request.urlopen(url) as response:
+        return json.loads(response.read()).get('most_runs', [None, 0])[1] or 0
+
+def reachable(url) -> bool:
+    try:
+        with urllib.request.urlopen(url, timeout=1):
+            return True
+    except OSError:
+        return False
+
+def wait_until(predicate, timeout=5.0, interval=0.0005) -> bool:
+    deadline = time.monotonic() + timeout
+    while not predicate():
+        if time.monotonic() > deadline:
+            return False
+        time.sleep(interval)
+    return True
+
+def percentile(values, fraction):
+    return values[min(len(values) - 1, int(len(values) * fraction))]
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--runs', type=int, default=50)
+    parser.add_argument('--transport', choices=('TCP', 'UDP'), default='TCP')
+    parser.add_argument('--no-web', action='store_true', help='skip the web stages')
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix='sprint_e2e_')
+    configure(workdir, args)
+
+    # Imported after configure(): the hardware layer picks its backend at import
+    import main_app
+    import remote_gate
+    from common import database
+    from common.event_core import EVENT_ARM, EVENT_REMOTE_TRIGGER
+    from common.timestamp import to_seconds
+    from common.timing_engine import STATE_ARMED, STATE_RUNNING, EVENT_FINISH
+    from common.timing_sync import TimingSynchronizer
+    from hardware import sim
+    from hardware.display_driver import TimingDisplay
+    from hardware.gpio_cdev import CdevGateSensor, SyntheticEdgeSource
+
+    marks = {}
+    app = main_app.MainApplication(headless=True)
+    runner = (database.add_runner('Benchmark Runner'), 'Benchmark Runner')
+
+    # Instrument the primary's pipeline stages
+    remote_handler = app.handle_remote_trigger
+    def timed_remote_trigger(message, received_mono_ns=None):
+        marks['network'] = time.monotonic_ns()
+        remote_handler(message, received_mono_ns)
+    app.core.on(EVENT_REMOTE_TRIGGER, timed_remote_trigger)
+
+    timing_listener = app.engine.listener
+    def timed_listener(event, lane, gate):
+        if event == EVENT_FINISH:
+            marks['engine'] = time.monotonic_ns()
+        timing_listener(event, lane, gate)
+    app.engine.listener = timed_listener
+
+    add_run_times = database.add_run_times
+    def timed_add_run_times(results):
+        add_run_times(results)
+        marks['db'] = time.monotonic_ns()
+    database.add_run_times = timed_add_run_times
+
+    # The remote gate, with its own beam on a separate edge queue
+    remote_edges = SyntheticEdgeSource()
+    remote_sync = TimingSynchronizer(is_master=False)
+    sensor = TimedSensor(CdevGateSensor(config.SECONDARY_GATE_PIN, config.DEBOUNCE_TIME, remote_sync,
+                                        edge_source=remote_edges), marks)
+    gate = remote_gate.RemoteGate(sensor, TimingDisplay(config.SECONDARY_DISPLAY_CS_PIN), remote_sync)
+    threading.Thread(target=gate.run, daemon=True).start()
+    primary_edges = sim.gate_edges(config.PRIMARY_GATE_PIN)
+
+    connected = lambda: config.REMOTE_GATE_ID in app.remote_links or config.REMOTE_GATE_ID in app.udp_receiver.peers
+    if not wait_until(connected, timeout=15):
+        raise SystemExit("Remote gate did not connect")
+
+    web = not args.no_web
+    live_seen = threading.Event()
+    if web:
+        base = f"http://127.0.0.1:{config.WEB_PORT}"
+        if not wait_until(lambda: reachable(base + '/api/live_data'), timeout=15):
+            raise SystemExit("Web server did not start (is Flask installed?)")
+        threading.Thread(target=watch_live_stream, args=(base + '/api/live_stream', marks, live_seen),
+                         daemon=True).start()
+        time.sleep(0.5)
+
+    lane = app.engine.lanes[0]
+    results = {stage: [] for stage in STAGES}
+    for run in range(args.runs):
+        app.core.post(EVENT_ARM, runner=runner)
+        wait_until(lambda: lane.state == STATE_ARMED)
+        primary_edges.inject()
+        wait_until(lambda: lane.state == STATE_RUNNING)
+        time.sleep(0.05)
+
+        marks.clear()
+        live_seen.clear()
+        edge_ns = time.monotonic_ns()
+        remote_edges.inject(edge_ns)
+        if not wait_until(lambda: 'db' in marks):
+            print(f"Run {run + 1}: result not committed within 5 s")
+            continue
+        if web:
+            live_seen.wait(5)
+            wait_until(lambda: stats_run_count(base + '/api/stats') >= run + 1, interval=0.001)
+            marks['web_stats'] = time.monotonic_ns()
+        for stage in STAGES:
+            if stage in marks:
+                results[stage].append(marks[stage] - edge_ns)
+        # The next edge must be outside the debounce window
+        time.sleep(config.DEBOUNCE_TIME)
+
+    print(f"{args.runs} runs over {args.transport}, simulated hardware, "
+          f"result journal fsync {'on' if config.RESULT_JOURNAL_FSYNC else 'off'}")
+    print(f"{'stage':>10}  {'p50 ms':>8}  {'p90 ms':>8}  {'p99 ms':>8}  {'max ms':>8}")
+    for stage in STAGES:
+        values = sorted(results[stage])
+        if not values:
+            continue
+        cells = [to_seconds(percentile(values, f)) * 1000 for f in (0.5, 0.9, 0.99)] + [to_seconds(values[-1]) * 1000]
+        print(f"{stage:>10}  " + "  ".join(f"{cell:8.3f}" for cell in cells))
+
+if __name__ == '__main__':
+    main()
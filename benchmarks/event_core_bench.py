@@ -0,0 +1,66 @@
+# benchmarks/event_core_bench.py
+"""
+Event latency through the event core (common/event_core.py): several
+threads post gate triggers at once, as the local gate, UDP listener and UI
+do, while a periodic tick runs on the loop. Reports queueing delay and
+handling time from EventCore.stats().
+
+    python -m benchmarks.event_core_bench [--threads 4] [--rate 50] [--seconds 5]
+"""
+import argparse
+import threading
+import time
+
+from common.event_core import EventCore, EVENT_GATE_TRIGGER, EVENT_UI_TICK
+from common.timestamp import Timestamp
+from common.timing_engine import Course, Gate, TimingEngine, GATE_START, GATE_FINISH
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--threads', type=int, default=4, help='posting threads')
+    parser.add_argument('--rate', type=float, default=50, help='triggers per second per thread')
+    parser.add_argument('--seconds', type=float, default=5)
+    args = parser.parse_args()
+
+    lanes = args.threads
+    course = Course([Gate('START', GATE_START, 0)] +
+                    [Gate(f'FINISH{lane}', GATE_FINISH, 40, lane) for lane in range(1, lanes + 1)], lanes)
+    engine = TimingEngine(course)
+    core = EventCore()
+
+    def handle_trigger(gate_id, timestamp, lane):
+        if gate_id == 'START':
+            engine.arm((lane, f'Runner {lane}'), lane)
+        engine.handle_trigger(gate_id, timestamp)
+
+    core.on(EVENT_GATE_TRIGGER, handle_trigger)
+    core.on(EVENT_UI_TICK, engine.latest_running)
+    core.start()
+    core.every(EVENT_UI_TICK, 0.05)
+
+    stop = time.monotonic() + args.seconds
+
+    def poster(lane):
+        interval = 1 / args.rate
+        gate_ids = ('START', f'FINISH{lane}')
+        count = 0
+        while time.monotonic() < stop:
+            core.post(EVENT_GATE_TRIGGER, gate_id=gate_ids[count % 2], timestamp=Timestamp.now(), lane=lane)
+            count += 1
+            time.sleep(interval)
+
+    threads = [threading.Thread(target=poster, args=(lane,)) for lane in range(1, lanes + 1)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    time.sleep(0.1)
+
+    stats = core.stats()
+    print(f"{args.threads} threads x {args.rate:.0f} events/s for {args.seconds:.0f} s: "
+          f"{stats['events']} events, {stats['errors']} errors")
+    print(f"Queue wait (post -> handler start): {stats['queue_wait_us']} us")
+    print(f"Handling time:                      {stats['handle_us']} us")
+
+if __name__ == '__main__':
+    main()
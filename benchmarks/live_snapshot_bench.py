@@ -0,0 +1,93 @@
+# benchmarks/live_snapshot_bench.py
+"""
+Shared-memory live state (common.live_snapshot), as used by web workers.
+
+  - publish: the cost LiveState pays on every change, with an elapsed tick
+    (lanes unchanged) and with a lane change (JSON region re-encoded).
+  - read: a worker's snapshot() when nothing changed (cached) and after a
+    change.
+  - contended: a writer process publishes as fast as it can while this
+    process reads. Every published state carries its version in each text
+    field, so a torn read (fields from two updates) would show up as a
+    mismatch; the seqlock should turn all of them into retries.
+
+    python -m benchmarks.live_snapshot_bench [--iterations 100000] [--seconds 2]
+"""
+import argparse
+import multiprocessing
+import time
+
+from common.live_snapshot import LiveSnapshot, LiveSnapshotReader
+
+def sample_state(version: int, lanes: int = 4) -> dict:
+    tag = str(version)
+    return {
+        'current_runner': tag, 'elapsed_time': tag, 'timing_mode': 'GPS', 'gps_status': tag,
+        'last_run': {'name': tag, 'time': float(version)},
+        'lanes': [{'lane': n, 'runner': f"Runner {n}", 'state': 'RUNNING', 'version': version} for n in range(lanes)],
+        'clock_model': {'locked': True}, 'network_offset': {},
+    }
+
+def per_call_us(function, iterations: int) -> float:
+    start = time.perf_counter_ns()
+    for i in range(iterations):
+        function(i)
+    return (time.perf_counter_ns() - start) / iterations / 1000
+
+def writer_main(name_pipe, stop):
+    snapshot = LiveSnapshot()
+    name_pipe.send(snapshot.name)
+    version = 0
+    while not stop.is_set():
+        version += 1
+        snapshot.publish(sample_state(version), version, version)
+    name_pipe.send(snapshot.published)
+    name_pipe.recv()  # Keep the block alive until the reader has detached
+    snapshot.close()
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--iterations', type=int, default=100_000)
+    parser.add_argument('--seconds', type=float, default=2.0, help='duration of the contended run')
+    args = parser.parse_args()
+
+    snapshot = LiveSnapshot()
+    reader = LiveSnapshotReader(snapshot.name)
+    state = sample_state(1)
+    tick = lambda i: (state.__setitem__('elapsed_time', f"{i / 100:.2f}"), snapshot.publish(state, i, 0))
+    lane_change = lambda i: snapshot.publish(sample_state(i), i, i)
+    tick_us = per_call_us(tick, args.iterations)
+    print(f"publish, elapsed tick:   {tick_us:7.2f} us")
+    print(f"publish, lane change:    {per_call_us(lane_change, args.iterations):7.2f} us")
+    print(f"read, unchanged:         {per_call_us(lambda i: reader.snapshot(), args.iterations):7.2f} us")
+    changed_us = per_call_us(lambda i: (tick(i), reader.snapshot()), args.iterations) - tick_us
+    print(f"read, after each change: {changed_us:7.2f} us")
+    reader.close()
+    snapshot.close()
+
+    context = multiprocessing.get_context('spawn')
+    name_pipe, child_pipe = context.Pipe()
+    stop = context.Event()
+    writer = context.Process(target=writer_main, args=(child_pipe, stop))
+    writer.start()
+    reader = LiveSnapshotReader(name_pipe.recv())
+    reads = torn = 0
+    deadline = time.monotonic() + args.seconds
+    while time.monotonic() < deadline:
+        data = reader.snapshot()
+        tag = str(data['version'])
+        if data['version'] and not (data['current_runner'] == data['elapsed_time'] == data['gps_status']
+                                    == data['last_run']['name'] == tag
+                                    and all(lane['version'] == data['version'] for lane in data['lanes'])):
+            torn += 1
+        reads += 1
+    stop.set()
+    published = name_pipe.recv()
+    reader.close()
+    name_pipe.send(None)
+    writer.join()
+    print(f"contended, {args.seconds:g} s: {published} publishes, {reads} reads, "
+          f"{reader.retries} retries, {torn} torn")
+
+if __name__ == '__main__':
+    main()
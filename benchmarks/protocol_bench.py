@@ -0,0 +1,61 @@
+# benchmarks/protocol_bench.py
+"""
+Encode/decode cost of the framed binary gate protocol versus the original
+JSON messages (create_message / parse_message) in common/network.py.
+
+    python -m benchmarks.protocol_bench [--count 100000]
+"""
+import argparse
+import time
+
+from common import network
+
+TIMESTAMP_NS = 1_700_000_000_123_456_789
+
+def measure(label, func, count):
+    """Times `count` calls and prints throughput and per-call latency."""
+    start = time.perf_counter()
+    for _ in range(count):
+        func()
+    elapsed = time.perf_counter() - start
+    print(f"  {label:<34} {count / elapsed:>11.0f} msg/s  {elapsed / count * 1e6:7.2f} us/msg")
+    return elapsed
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--count', type=int, default=100000)
+    parser.add_argument('--batch', type=int, default=32, help='messages per coalesced read in the stream case')
+    args = parser.parse_args()
+
+    json_message = network.create_gate_trigger_message(TIMESTAMP_NS, 'REMOTE', 'GPS')
+    binary_message = network.encode_gate_trigger(TIMESTAMP_NS, 'REMOTE', 'GPS', seq=1)
+    print(f"Message size: JSON {len(json_message)} bytes, binary {len(binary_message)} bytes")
+
+    print("Encode:")
+    measure('JSON create_gate_trigger_message', lambda: network.create_gate_trigger_message(
+        TIMESTAMP_NS, 'REMOTE', 'GPS'), args.count)
+    measure('binary encode_gate_trigger', lambda: network.encode_gate_trigger(
+        TIMESTAMP_NS, 'REMOTE', 'GPS', seq=1), args.count)
+
+    print("Decode, one message per read:")
+    measure('JSON parse_message', lambda: network.parse_message(json_message), args.count)
+    decoder = network.MessageDecoder()
+    measure('binary MessageDecoder.feed', lambda: decoder.feed(binary_message), args.count)
+    legacy_decoder = network.MessageDecoder()
+    measure('legacy JSON via MessageDecoder.feed', lambda: legacy_decoder.feed(json_message), args.count)
+
+    print(f"Decode, {args.batch} coalesced messages per read:")
+    stream = binary_message * args.batch
+    reads = max(1, args.count // args.batch)
+    elapsed = measure('binary MessageDecoder.feed (per read)', lambda: decoder.feed(stream), reads)
+    print(f"  {'= per message':<34} {reads * args.batch / elapsed:>11.0f} msg/s  "
+          f"{elapsed / (reads * args.batch) * 1e6:7.2f} us/msg")
+
+    print("Round trip (encode + decode):")
+    measure('JSON', lambda: network.parse_message(network.create_gate_trigger_message(
+        TIMESTAMP_NS, 'REMOTE', 'GPS')), args.count)
+    measure('binary', lambda: decoder.feed(network.encode_gate_trigger(
+        TIMESTAMP_NS, 'REMOTE', 'GPS', seq=1)), args.count)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,71 @@
+# benchmarks/timing_engine_bench.py
+"""
+Per-trigger handling time of the multi-lane timing engine (common/timing_engine.py).
+
+Simulates a course of lanes running in waves through a shared start beam,
+per-lane split gates and a shared finish, and times every handle_trigger()
+call, including the listener the application would run.
+
+    python -m benchmarks.timing_engine_bench [--lanes 8] [--splits 3] [--runs 5000]
+"""
+import argparse
+import random
+import time
+
+from common.timestamp import Timestamp
+from common.timing_engine import Course, Gate, TimingEngine, GATE_START, GATE_SPLIT, GATE_FINISH
+
+def build_course(lanes: int, splits: int) -> Course:
+    gates = [Gate('START', GATE_START, 0)]
+    for index in range(splits):
+        distance = 10 * (index + 1)
+        gates += [Gate(f'L{lane}-{distance}', GATE_SPLIT, distance, lane) for lane in range(1, lanes + 1)]
+    gates.append(Gate('FINISH', GATE_FINISH, 10 * (splits + 1)))
+    return Course(gates, lanes)
+
+def percentile(sorted_values, fraction):
+    return sorted_values[min(len(sorted_values) - 1, int(len(sorted_values) * fraction))]
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--lanes', type=int, default=8)
+    parser.add_argument('--splits', type=int, default=3, help='split gates per lane')
+    parser.add_argument('--runs', type=int, default=5000, help='runs in total, lanes-many at a time')
+    args = parser.parse_args()
+
+    course = build_course(args.lanes, args.splits)
+    events = []
+    engine = TimingEngine(course, lambda event, lane, gate: events.append((event, lane.number)))
+    latencies = []
+    clock_ns = 0
+    finished = 0
+
+    while finished < args.runs:
+        for lane in range(1, args.lanes + 1):
+            engine.arm((lane, f'Runner {lane}'), lane)
+        # Everyone crosses the shared start, then their own splits in a random order across lanes
+        triggers = [('START', lane) for lane in range(1, args.lanes + 1)]
+        for gate in course.gates[1:-1]:
+            triggers.append((gate.gate_id, gate.lane))
+        triggers += [('FINISH', lane) for lane in range(1, args.lanes + 1)]
+        ordered = triggers[:args.lanes] + sorted(triggers[args.lanes:-args.lanes],
+                                                 key=lambda t: (int(t[0].split('-')[1]), random.random()))
+        ordered += triggers[-args.lanes:]
+
+        for gate_id, _ in ordered:
+            clock_ns += random.randint(5_000_000, 50_000_000)
+            timestamp = Timestamp(clock_ns)
+            start = time.perf_counter_ns()
+            engine.handle_trigger(gate_id, timestamp)
+            latencies.append(time.perf_counter_ns() - start)
+        finished += args.lanes
+
+    latencies.sort()
+    print(f"Course: {args.lanes} lanes, {args.splits} splits per lane, {len(course.gates)} gates")
+    print(f"Triggers handled: {len(latencies)} ({engine.unmatched} unmatched), runs finished: {finished}")
+    print(f"Handling time: p50 {percentile(latencies, 0.5) / 1000:.1f} us, "
+          f"p99 {percentile(latencies, 0.99) / 1000:.1f} us, max {latencies[-1] / 1000:.1f} us")
+    print(f"Throughput: {len(latencies) / (sum(latencies) / 1e9):.0f} triggers/s")
+
+if __name__ == '__main__':
+    main()
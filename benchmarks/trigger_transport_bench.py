@@ -0,0 +1,184 @@
+# benchmarks/trigger_transport_bench.py
+"""
+Trigger delivery latency over TCP vs the acked UDP transport under packet loss.
+
+Both paths run over loopback through a lossy stand-in for the Wi-Fi link:
+  * UDP: a relay drops each datagram (both directions) with probability p.
+    Lost triggers or acks are recovered by UdpTriggerSender's retransmits.
+  * TCP: segments can't be dropped from user space, so the relay models what
+    the kernel would do: a lost segment is held for the retransmission
+    timeout (doubling if the retransmit is lost too) and, because TCP is
+    in-order, everything sent after it waits behind it.
+
+    python -m benchmarks.trigger_transport_bench [--loss 0,0.01,0.05,0.1]
+"""
+import argparse
+import heapq
+import random
+import socket
+import threading
+import time
+
+from common import config, network
+from common.udp_link import UdpTriggerSender, UdpTriggerReceiver
+
+def percentiles(values):
+    values = sorted(values)
+    pick = lambda p: values[min(len(values) - 1, int(len(values) * p / 100))] * 1000
+    return pick(50), pick(90), pick(99), values[-1] * 1000
+
+class LossyUdpRelay:
+    """Forwards datagrams between one client and a server, dropping some."""
+
+    def __init__(self, server_address, loss, delay, rng):
+        self.server_address = server_address
+        self.loss = loss
+        self.delay = delay
+        self.rng = rng
+        self.front = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self.front.bind(('127.0.0.1', 0))
+        self.back = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self.address = self.front.getsockname()
+        self.client_address = None
+        threading.Thread(target=self._forward_up, daemon=True).start()
+        threading.Thread(target=self._forward_down, daemon=True).start()
+
+    def _deliver(self, sock, data, address):
+        if self.rng.random() < self.loss:
+            return
+        if self.delay:
+            threading.Timer(self.delay, sock.sendto, (data, address)).start()
+        else:
+            sock.sendto(data, address)
+
+    def _forward_up(self):
+        while True:
+            data, self.client_address = self.front.recvfrom(2048)
+            self._deliver(self.back, data, self.server_address)
+
+    def _forward_down(self):
+        while True:
+            data, _ = self.back.recvfrom(2048)
+            if self.client_address:
+                self._deliver(self.front, data, self.client_address)
+
+class LossyTcpRelay:
+    """Forwards a TCP stream, delaying 'lost' chunks by the RTO with head-of-line blocking."""
+
+    def __init__(self, server_address, loss, delay, rto, rng):
+        self.server_address = server_address
+        self.loss = loss
+        self.delay = delay
+        self.rto = rto
+        self.rng = rng
+        self.listener = socket.socket()
+        self.listener.bind(('127.0.0.1', 0))
+        self.listener.listen(1)
+        self.address = self.listener.getsockname()
+        self._queue = []
+        self._ready = threading.Condition()
+        self._order = 0
+        threading.Thread(target=self._accept, daemon=True).start()
+
+    def _accept(self):
+        client, _ = self.listener.accept()
+        upstream = socket.create_connection(self.server_address)
+        upstream.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        threading.Thread(target=self._deliver, args=(upstream,), daemon=True).start()
+        last_release = 0.0
+        while True:
+            data = client.recv(4096)
+            if not data:
+                break
+            release = time.monotonic() + self.delay
+            rto = self.rto
+            while self.rng.random() < self.loss:
+                release += rto
+                rto *= 2
+            # In-order delivery: nothing overtakes a segment waiting for retransmission
+            last_release = max(last_release, release)
+            with self._ready:
+                self._order += 1
+                heapq.heappush(self._queue, (last_release, self._order, data))
+                self._ready.notify()
+
+    def _deliver(self, upstream):
+        while True:
+            with self._ready:
+                while not self._queue or self._queue[0][0] > time.monotonic():
+                    timeout = self._queue[0][0] - time.monotonic() if self._queue else None
+                    self._ready.wait(timeout)
+                _, _, data = heapq.heappop(self._queue)
+            upstream.sendall(data)
+
+def run_udp(loss, args, rng):
+    received = {}
+    receiver = UdpTriggerReceiver(lambda m, _: received.setdefault(m['payload']['seq'], time.monotonic()),
+                                  port=0, host='127.0.0.1')
+    threading.Thread(target=receiver.serve_forever, daemon=True).start()
+    relay = LossyUdpRelay(('127.0.0.1', receiver.port), loss, args.delay_ms / 1000, rng)
+    sender = UdpTriggerSender(address=relay.address)
+
+    sent = {}
+    for _ in range(args.triggers):
+        start = time.monotonic()
+        sent[sender.send_trigger(time.time_ns(), 'GPS')] = start
+        time.sleep(args.interval)
+    time.sleep(1.0)
+    latencies = [received[seq] - t for seq, t in sent.items() if seq in received]
+    return latencies, len(sent) - len(latencies), receiver.dedup.duplicates
+
+def run_tcp(loss, args, rng):
+    server = socket.socket()
+    server.bind(('127.0.0.1', 0))
+    server.listen(1)
+    received = {}
+
+    def serve():
+        conn, _ = server.accept()
+        decoder = network.MessageDecoder()
+        while True:
+            data = conn.recv(4096)
+            if not data:
+                break
+            now = time.monotonic()
+            for message in decoder.feed(data):
+                received[message['payload']['seq']] = now
+
+    threading.Thread(target=serve, daemon=True).start()
+    relay = LossyTcpRelay(server.getsockname(), loss, args.delay_ms / 1000, args.tcp_rto_ms / 1000, rng)
+    sock = socket.create_connection(relay.address)
+    sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+
+    sent = {}
+    for seq in range(1, args.triggers + 1):
+        sent[seq] = time.monotonic()
+        sock.sendall(network.encode_gate_trigger(time.time_ns(), 'REMOTE', 'GPS', seq))
+        time.sleep(args.interval)
+    time.sleep(max(1.0, args.tcp_rto_ms / 1000 * 8))
+    latencies = [received[seq] - t for seq, t in sent.items() if seq in received]
+    return latencies, len(sent) - len(latencies), 0
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--loss', default='0,0.01,0.05,0.1', help='comma-separated loss probabilities')
+    parser.add_argument('--triggers', type=int, default=200)
+    parser.add_argument('--interval', type=float, default=0.01, help='seconds between triggers')
+    parser.add_argument('--delay-ms', type=float, default=1.0, help='one-way link delay')
+    parser.add_argument('--tcp-rto-ms', type=float, default=200.0, help='Linux minimum RTO is 200 ms')
+    parser.add_argument('--seed', type=int, default=1)
+    args = parser.parse_args()
+
+    print(f"{args.triggers} triggers every {args.interval * 1000:g} ms, {args.delay_ms:g} ms link delay, "
+          f"UDP retry every {config.UDP_RETRY_INTERVAL * 1000:g} ms")
+    print(f"{'loss':>6} {'transport':>9} {'p50 ms':>8} {'p90 ms':>8} {'p99 ms':>8} {'max ms':>8} "
+          f"{'lost':>5} {'dupes':>6}")
+    for loss in [float(p) for p in args.loss.split(',')]:
+        for name, run in (('TCP', run_tcp), ('UDP', run_udp)):
+            latencies, lost, dupes = run(loss, args, random.Random(args.seed))
+            p50, p90, p99, worst = percentiles(latencies) if latencies else (float('nan'),) * 4
+            print(f"{loss:>6.0%} {name:>9} {p50:>8.2f} {p90:>8.2f} {p99:>8.2f} {worst:>8.2f} "
+                  f"{lost:>5} {dupes:>6}")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,108 @@
+# benchmarks/ui_update_bench.py
+"""
+UI update cost, headless: the touchscreen's StringVars are bound to a bare
+Tcl interpreter (no display needed). A feeder thread produces the main
+app's update stream -- elapsed time at 20 Hz plus the status poll's mode
+and GPS status, which rarely change -- and the Tcl thread applies it either
+directly (every update is a StringVar.set, as before) or through the
+coalescing UpdatePump drained every UI_UPDATE_INTERVAL_MS. Reports
+widget writes, Tk-thread wakeups and time spent applying updates.
+
+    python -m benchmarks.ui_update_bench [--seconds 5] [--elapsed-hz 20] [--status-hz 10]
+"""
+import argparse
+import queue
+import threading
+import time
+import tkinter as tk
+
+from common import config
+from ui.update_pump import UpdatePump
+
+def feed(post, seconds, elapsed_hz, status_hz):
+    """Posts the update stream for `seconds`; returns the number of updates."""
+    start = time.monotonic()
+    next_status = start
+    count = 0
+    while True:
+        now = time.monotonic()
+        if now - start >= seconds:
+            return count
+        post('elapsed_time', f"{now - start:.2f}")
+        count += 1
+        if now >= next_status:
+            post('timing_mode', 'GPS')
+            post('gps_status', 'LOCKED')
+            count += 2
+            next_status += 1 / status_hz
+        time.sleep(1 / elapsed_hz)
+
+def run(mode, args):
+    tcl = tk.Tcl()
+    variables = {field: tk.StringVar(master=tcl) for field in ('elapsed_time', 'timing_mode', 'gps_status')}
+    writes = [0]
+
+    def writer(var):
+        def write(value):
+            var.set(value)
+            writes[0] += 1
+        return write
+
+    writers = {field: writer(var) for field, var in variables.items()}
+    done = threading.Event()
+    posted = [0]
+
+    if mode == 'direct':
+        # Old path: each update crosses to the Tk thread and is written
+        updates = queue.Queue()
+        post = lambda field, value: updates.put((field, value))
+    else:
+        pump = UpdatePump(writers)
+        post = pump.post
+
+    def feeder():
+        posted[0] = feed(post, args.seconds, args.elapsed_hz, args.status_hz)
+        done.set()
+
+    threading.Thread(target=feeder, daemon=True).start()
+    apply_ns = 0
+    wakeups = 0
+    while True:
+        finished = done.is_set()
+        if mode == 'direct':
+            try:
+                field, value = updates.get(timeout=0.1)
+            except queue.Empty:
+                if finished:
+                    break
+                continue
+            start = time.perf_counter_ns()
+            writers[field](value)
+        else:
+            time.sleep(config.UI_UPDATE_INTERVAL_MS / 1000)
+            start = time.perf_counter_ns()
+            pump.drain()
+        apply_ns += time.perf_counter_ns() - start
+        wakeups += 1
+        if finished and mode != 'direct':
+            break
+    return posted[0], writes[0], wakeups, apply_ns / 1000
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--seconds', type=float, default=5)
+    parser.add_argument('--elapsed-hz', type=float, default=20, help='elapsed-time updates per second')
+    parser.add_argument('--status-hz', type=float, default=10, help='mode/GPS status updates per second')
+    args = parser.parse_args()
+
+    print(f"{args.seconds:.0f} s, elapsed at {args.elapsed_hz:.0f} Hz, status at {args.status_hz:.0f} Hz, "
+          f"drain every {config.UI_UPDATE_INTERVAL_MS} ms")
+    for mode in ('direct', 'pump'):
+        posted, writes, wakeups, apply_us = run(mode, args)
+        print(f"{mode:>6}: {posted} updates -> {writes} widget writes, "
+              f"{wakeups} Tk-thread wakeups, {apply_us:.0f} us applying")
+    print("Bare Tcl has no widgets to redraw, so each write here costs only the variable set; "
+          "on the touchscreen every write also re-lays-out and repaints its label.")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,169 @@
+# benchmarks/ws_load.py
+"""
+Load test for the WebSocket live hub (web/live_hub.py).
+
+Opens increasing numbers of WebSocket clients, publishes state updates at a
+fixed rate and reports, per step, the fraction of updates every client saw
+and the publish-to-receive latency. A step "holds" when clients receive at
+least 95% of updates with p99 latency under the threshold.
+
+Local run (hub in a child process, clients in this one):
+    python -m benchmarks.ws_load --clients 100,200,400,800
+
+Against a Pi 4 (run the hub + synthetic publisher on the Pi, clients on a
+laptop on the same network; latency assumes both clocks are NTP-synced):
+    pi$     python -m benchmarks.ws_load --serve --rate 20
+    laptop$ python -m benchmarks.ws_load --host 192.168.4.1 --clients 200,400,800
+"""
+import argparse
+import asyncio
+import base64
+import json
+import multiprocessing
+import os
+import resource
+import struct
+import time
+
+from common import config
+
+def serve(port, rate):
+    """Runs a LiveHub publishing a synthetic payload `rate` times a second."""
+    from web.live_hub import LiveHub
+
+    hub = LiveHub(port=port)
+
+    async def main():
+        server_task = asyncio.ensure_future(hub.serve_forever())
+        await asyncio.sleep(0.2)
+        seq = 0
+        interval = 1.0 / rate
+        next_send = time.monotonic()
+        while True:
+            seq += 1
+            hub.publish({'seq': seq, 'sent': time.time(), 'current_runner': 'Load Test',
+                         'elapsed_time': f"{seq * interval:.2f}", 'timing_mode': 'GPS',
+                         'gps_status': 'LOCKED', 'last_run': {'name': 'N/A', 'time': 0.0}})
+            next_send += interval
+            await asyncio.sleep(max(0.0, next_send - time.monotonic()))
+        await server_task
+
+    asyncio.run(main())
+
+async def client(host, port, duration, stats):
+    """Connects, then records sequence numbers and latencies until `duration` elapses."""
+    reader, writer = await asyncio.open_connection(host, port)
+    key = base64.b64encode(os.urandom(16)).decode()
+    writer.write((f"GET /live HTTP/1.1\r\nHost: {host}\r\nUpgrade: websocket\r\n"
+                  f"Connection: Upgrade\r\nSec-WebSocket-Key: {key}\r\n"
+                  "Sec-WebSocket-Version: 13\r\n\r\n").encode())
+    await reader.readuntil(b'\r\n\r\n')
+
+    seqs = []
+    latencies = []
+    deadline = time.monotonic() + duration
+    try:
+        while time.monotonic() < deadline:
+            head = await asyncio.wait_for(reader.readexactly(2), timeout=deadline - time.monotonic())
+            length = head[1] & 0x7F
+            if length == 126:
+                length = struct.unpack('!H', await reader.readexactly(2))[0]
+            elif length == 127:
+                length = struct.unpack('!Q', await reader.readexactly(8))[0]
+            message = json.loads(await reader.readexactly(length))
+            latencies.append(time.time() - message['sent'])
+            seqs.append(message['seq'])
+    except asyncio.TimeoutError:
+        pass
+    finally:
+        writer.close()
+    stats.append((seqs, latencies))
+
+def percentile(sorted_values, p):
+    if not sorted_values:
+        return float('nan')
+    return sorted_values[min(len(sorted_values) - 1, int(len(sorted_values) * p / 100))]
+
+async def run_step(host, port, count, duration):
+    stats = []
+    # Stagger connects so the accept backlog isn't the thing being measured
+    tasks = []
+    for i in range(count):
+        tasks.append(asyncio.ensure_future(client(host, port, duration, stats)))
+        if i % 50 == 49:
+            await asyncio.sleep(0.05)
+    await asyncio.gather(*tasks, return_exceptions=True)
+    return stats
+
+def client_worker(host, port, count, duration, results):
+    """Runs `count` clients in this process and sends their stats back."""
+    results.put(asyncio.run(run_step(host, port, count, duration)))
+
+def run_step_in_processes(host, port, count, duration, procs):
+    """Spreads clients over processes so the load generator isn't the bottleneck."""
+    results = multiprocessing.Queue()
+    shares = [count // procs + (1 if i < count % procs else 0) for i in range(procs)]
+    workers = [multiprocessing.Process(target=client_worker, args=(host, port, share, duration, results))
+               for share in shares if share]
+    for worker in workers:
+        worker.start()
+    stats = []
+    for _ in workers:
+        stats.extend(results.get())
+    for worker in workers:
+        worker.join()
+    return stats
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--serve', action='store_true', help='only run the hub and publisher')
+    parser.add_argument('--host', help='hub to test (default: start one locally)')
+    parser.add_argument('--port', type=int, default=config.LIVE_HUB_PORT)
+    parser.add_argument('--rate', type=float, default=20.0, help='updates per second')
+    parser.add_argument('--clients', default='50,100,200,400', help='comma-separated client counts')
+    parser.add_argument('--duration', type=float, default=5.0, help='seconds per step')
+    parser.add_argument('--max-p99-ms', type=float, default=100.0)
+    parser.add_argument('--procs', type=int, default=max(1, (os.cpu_count() or 2) - 1),
+                        help='client processes (run clients on another machine for real numbers)')
+    args = parser.parse_args()
+
+    if args.serve:
+        serve(args.port, args.rate)
+        return
+
+    # Each client needs a descriptor (two when the hub is local)
+    soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+    resource.setrlimit(resource.RLIMIT_NOFILE, (hard, hard))
+
+    hub_process = None
+    host = args.host
+    if host is None:
+        host = '127.0.0.1'
+        hub_process = multiprocessing.Process(target=serve, args=(args.port, args.rate), daemon=True)
+        hub_process.start()
+        time.sleep(0.5)
+
+    expected = args.rate * args.duration
+    print(f"Hub {host}:{args.port}, {args.rate:g} updates/s, {args.duration:g}s per step")
+    print(f"{'clients':>8} {'connected':>10} {'delivered':>10} {'p50 ms':>8} {'p99 ms':>8} {'max ms':>8}  result")
+    sustained = 0
+    try:
+        for count in [int(c) for c in args.clients.split(',')]:
+            stats = run_step_in_processes(host, args.port, count, args.duration, args.procs)
+            latencies = sorted(l for _, lat in stats for l in lat)
+            # Slow clients skip to the newest frame by design, so this drops under overload
+            delivered = min((min(1.0, len(set(seqs)) / expected) for seqs, _ in stats), default=0.0)
+            p99_ms = percentile(latencies, 99) * 1000
+            ok = len(stats) == count and delivered >= 0.95 and p99_ms <= args.max_p99_ms
+            if ok:
+                sustained = count
+            print(f"{count:>8} {len(stats):>10} {delivered:>9.0%} {percentile(latencies, 50) * 1000:>8.1f} "
+                  f"{p99_ms:>8.1f} {latencies[-1] * 1000 if latencies else float('nan'):>8.1f}  "
+                  f"{'ok' if ok else 'FAIL'}")
+    finally:
+        if hub_process:
+            hub_process.terminate()
+    print(f"Sustained: {sustained} clients at {args.rate:g} updates/s")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,170 @@
+# common/clock_model.py
+import math
+import os
+import threading
+import time
+from collections import deque
+from . import config
+from .timestamp import NS_PER_SECOND
+
+class ClockFit:
+    """One fitted model: utc = utc_ref + delta + delta * drift, delta = mono - mono_ref."""
+    __slots__ = ('mono_ref', 'utc_ref', 'drift', 'uncertainty_ns', 'last_edge')
+
+    def __init__(self, mono_ref, utc_ref, drift, uncertainty_ns, last_edge):
+        self.mono_ref = mono_ref
+        self.utc_ref = utc_ref
+        self.drift = drift
+        self.uncertainty_ns = uncertainty_ns
+        self.last_edge = last_edge
+
+class PpsClockModel:
+    """
+    PPS-disciplined model of the local monotonic clock.
+
+    Every PPS edge marks the start of a GPS second. The model pairs the
+    CLOCK_MONOTONIC time of each edge with that UTC second and fits offset
+    and drift over a rolling window of edges by least squares, rejecting
+    edges that disagree with the current fit (missed or spurious pulses).
+    Converting a monotonic timestamp to UTC is then plain integer and float
+    arithmetic on the current fit, with no syscalls or subprocesses.
+
+    Edges come from the kernel PPS device when present (timestamped in the
+    kernel, see install.sh's pps-gpio overlay) or else from a GPIO interrupt
+    on config.GPS_PPS_PIN.
+    """
+
+    def __init__(self, window: int = None):
+        self._edges = deque(maxlen=window or config.PPS_FILTER_WINDOW)
+        self._fit = None
+        self._lock = threading.Lock()
+        self.source = None
+        self.edges_seen = 0
+        self.edges_rejected = 0
+        self._consecutive_rejects = 0
+
+    # --- Edge input ---
+    def add_edge(self, mono_ns: int, utc_hint_ns: int = None):
+        """
+        Records a PPS edge seen at `mono_ns`. The edge's UTC second is the
+        whole second nearest `utc_hint_ns` (default: the system clock at the
+        edge), so the hint only needs to be within half a second.
+        """
+        if utc_hint_ns is None:
+            utc_hint_ns = time.time_ns() - (time.monotonic_ns() - mono_ns)
+        utc_second_ns = (utc_hint_ns + NS_PER_SECOND // 2) // NS_PER_SECOND * NS_PER_SECOND
+
+        with self._lock:
+            self.edges_seen += 1
+            fit = self._fit
+            if fit is not None and len(self._edges) >= config.PPS_MIN_EDGES:
+                residual = utc_second_ns - self._convert(fit, mono_ns)
+                if abs(residual) > config.PPS_MAX_RESIDUAL_NS:
+                    self.edges_rejected += 1
+                    self._consecutive_rejects += 1
+                    # Several rejections in a row means the fit itself is wrong; start over
+                    if self._consecutive_rejects < config.PPS_MIN_EDGES:
+                        return
+                    self._edges.clear()
+            self._consecutive_rejects = 0
+            self._edges.append((mono_ns, utc_second_ns))
+            self._fit = self._refit()
+
+    def _refit(self):
+        """Least-squares fit of UTC offset and drift over the edge window."""
+        edges = self._edges
+        count = len(edges)
+        mono_ref, utc_ref = edges[-1]
+        if count == 1:
+            return ClockFit(mono_ref, utc_ref, 0.0, float(NS_PER_SECOND), mono_ref)
+
+        # Work relative to the newest edge so the floats stay small
+        xs = [m - mono_ref for m, _ in edges]
+        ys = [(u - utc_ref) - x for x, (_, u) in zip(xs, edges)]  # offset change vs local clock
+        mean_x = sum(xs) / count
+        mean_y = sum(ys) / count
+        sxx = sum((x - mean_x) ** 2 for x in xs)
+        drift = sum((x - mean_x) * (y - mean_y) for x, y in zip(xs, ys)) / sxx if sxx else 0.0
+        intercept = mean_y - drift * mean_x
+
+        residuals = [y - (intercept + drift * x) for x, y in zip(xs, ys)]
+        dof = max(1, count - 2)
+        sigma = math.sqrt(sum(r * r for r in residuals) / dof)
+        # Standard error of the prediction at the reference point, plus scatter
+        uncertainty = sigma * math.sqrt(1 + 1 / count + (mean_x ** 2) / sxx) if sxx else sigma
+
+        return ClockFit(mono_ref, utc_ref + int(round(intercept)), drift, uncertainty, mono_ref)
+
+    # --- Conversion ---
+    @staticmethod
+    def _convert(fit, mono_ns: int) -> int:
+        delta = mono_ns - fit.mono_ref
+        return fit.utc_ref + delta + int(delta * fit.drift)
+
+    def to_utc_ns(self, mono_ns: int) -> int:
+        """Converts a CLOCK_MONOTONIC timestamp (ns) to UTC ns."""
+        return self._convert(self._fit, mono_ns)
+
+    def is_valid(self) -> bool:
+        """True once enough recent edges are in the fit to trust conversions."""
+        fit = self._fit
+        return (fit is not None
+                and len(self._edges) >= config.PPS_MIN_EDGES
+                and time.monotonic_ns() - fit.last_edge <= config.PPS_MAX_AGE * NS_PER_SECOND)
+
+    def uncertainty_ns(self) -> float:
+        """Estimated one-sigma error of a conversion right now, including holdover."""
+        fit = self._fit
+        if fit is None:
+            return float('inf')
+        holdover_s = (time.monotonic_ns() - fit.last_edge) / NS_PER_SECOND
+        # Unmodelled frequency wander grows the error while no edges arrive
+        return fit.uncertainty_ns + holdover_s * config.PPS_HOLDOVER_NS_PER_S
+
+    def status(self) -> dict:
+        fit = self._fit
+        return {
+            'source': self.source,
+            'valid': self.is_valid(),
+            'edges': len(self._edges),
+            'edges_rejected': self.edges_rejected,
+            'drift_ppm': round(fit.drift * 1e6, 3) if fit else None,
+            'uncertainty_ns': round(self.uncertainty_ns()) if fit else None,
+        }
+
+    # --- Edge sources ---
+    def start(self):
+        """Starts collecting edges from the kernel PPS device or the PPS GPIO pin."""
+        if os.path.exists(config.GPS_PPS_DEVICE):
+            self.source = 'kernel'
+            threading.Thread(target=self._poll_kernel_pps, daemon=True).start()
+        else:
+            from hardware.gpio import GPIO
+
+            self.source = 'gpio'
+            GPIO.setmode(GPIO.BCM)
+            GPIO.setup(config.GPS_PPS_PIN, GPIO.IN, pull_up_down=GPIO.PUD_DOWN)
+            GPIO.add_event_detect(config.GPS_PPS_PIN, GPIO.RISING,
+                                  callback=lambda channel: self.add_edge(time.monotonic_ns()))
+        print(f"PPS clock model using {self.source} edges")
+
+    def _poll_kernel_pps(self):
+        """Reads new assert events from sysfs; each is kernel-timestamped in CLOCK_REALTIME."""
+        path = config.GPS_PPS_DEVICE
+        last_sequence = None
+        while True:
+            try:
+                with open(path) as f:
+                    stamp, sequence = f.read().strip().split('#')
+                # Sample both clocks together to move the edge onto CLOCK_MONOTONIC
+                real_now = time.time_ns()
+                mono_now = time.monotonic_ns()
+                if sequence != last_sequence and last_sequence is not None:
+                    seconds, fraction = stamp.split('.')
+                    edge_real = int(seconds) * NS_PER_SECOND + int(fraction.ljust(9, '0')[:9])
+                    self.add_edge(mono_now - (real_now - edge_real), edge_real)
+                last_sequence = sequence
+            except (OSError, ValueError) as e:
+                print(f"PPS read error: {e}")
+                time.sleep(1)
+            time.sleep(0.2)
@@ -0,0 +1,154 @@
+# common/clock_offset.py
+import math
+import threading
+import time
+from collections import OrderedDict, deque
+from . import config
+from .timestamp import NS_PER_SECOND
+from .network import to_ns
+
+class OffsetSample:
+    """One ping/pong exchange: the remote clock's offset and the round trip it was measured over."""
+    __slots__ = ('local_ns', 'offset_ns', 'delay_ns')
+
+    def __init__(self, local_ns, offset_ns, delay_ns):
+        self.local_ns = local_ns
+        self.offset_ns = offset_ns
+        self.delay_ns = delay_ns
+
+class OffsetFit:
+    """One fitted model: offset(local) = offset_ns + (local - ref_ns) * drift."""
+    __slots__ = ('ref_ns', 'offset_ns', 'drift', 'uncertainty_ns', 'rtt_ns')
+
+    def __init__(self, ref_ns, offset_ns, drift, uncertainty_ns, rtt_ns):
+        self.ref_ns = ref_ns
+        self.offset_ns = offset_ns
+        self.drift = drift
+        self.uncertainty_ns = uncertainty_ns
+        self.rtt_ns = rtt_ns
+
+class NetworkClockOffset:
+    """
+    NTP-style estimate of the remote gate's clock relative to ours.
+
+    The primary sends a ping stamped t1; the remote stamps its receipt t2 and
+    its reply t3; the primary stamps the reply's arrival t4. Then
+
+        offset = ((t2 - t1) + (t3 - t4)) / 2    (remote minus local)
+        delay  = (t4 - t1) - (t3 - t2)          (round trip on the wire)
+
+    and the offset is off by at most half the delay, when the two directions
+    are maximally asymmetric. Wi-Fi queueing inflates some round trips by
+    many milliseconds, so like NTP's clock filter only the lowest-delay
+    sample of each stretch of the window is trusted. Offset and drift are
+    fitted over those by least squares, and remote timestamps are mapped onto
+    the local clock with the fit.
+    """
+
+    def __init__(self, window: int = None):
+        self._samples = deque(maxlen=window or config.CLOCK_SYNC_WINDOW)
+        self._outstanding = OrderedDict()  # ping id -> t1
+        self._next_id = 0
+        self._fit = None
+        self._last_sample_mono = 0.0
+        self._lock = threading.Lock()
+        self.pings_sent = 0
+        self.replies = 0
+
+    # --- Exchange ---
+    def make_ping(self, t1_ns: int) -> dict:
+        """Returns the payload of a ping sent at local time `t1_ns`."""
+        with self._lock:
+            self._next_id += 1
+            self._outstanding[self._next_id] = t1_ns
+            while len(self._outstanding) > 16:  # Unanswered pings are forgotten
+                self._outstanding.popitem(last=False)
+            self.pings_sent += 1
+            return {'op': 'ping', 'id': self._next_id, 't1': t1_ns}
+
+    def add_reply(self, payload: dict, t4_ns: int) -> bool:
+        """Adds the sample from a pong received at local time `t4_ns`. Returns False if it was unexpected."""
+        with self._lock:
+            t1 = self._outstanding.pop(payload.get('id'), None)
+            if t1 is None or t1 != payload.get('t1'):
+                return False
+            t2, t3 = payload['t2'], payload['t3']
+            delay = (t4_ns - t1) - (t3 - t2)
+            if delay < 0:
+                return False
+            offset = ((t2 - t1) + (t3 - t4_ns)) // 2
+            self._samples.append(OffsetSample((t1 + t4_ns) // 2, offset, delay))
+            self.replies += 1
+            self._last_sample_mono = time.monotonic()
+            self._fit = self._refit()
+            return True
+
+    def _refit(self):
+        # The lowest-delay sample of each stretch of the window, so the fit
+        # has a baseline; stretches where every exchange was queued are dropped
+        samples = list(self._samples)
+        stretch = -(-len(samples) // config.CLOCK_SYNC_BEST_SAMPLES)
+        best = [min(samples[i:i + stretch], key=lambda s: s.delay_ns)
+                for i in range(0, len(samples), stretch)]
+        min_delay = min(s.delay_ns for s in best)
+        best = [s for s in best if s.delay_ns <= 2 * min_delay]
+
+        # Work relative to the newest chosen sample so the floats stay small
+        ref = best[-1].local_ns
+        xs = [s.local_ns - ref for s in best]
+        ys = [s.offset_ns - best[-1].offset_ns for s in best]
+        count = len(best)
+        mean_x = sum(xs) / count
+        mean_y = sum(ys) / count
+        sxx = sum((x - mean_x) ** 2 for x in xs)
+        if count >= 3 and max(xs) - min(xs) >= config.CLOCK_SYNC_MIN_DRIFT_SPAN * NS_PER_SECOND:
+            drift = sum((x - mean_x) * (y - mean_y) for x, y in zip(xs, ys)) / sxx
+        else:
+            drift = 0.0  # Too short a baseline to tell drift from jitter
+        intercept = mean_y - drift * mean_x
+        residuals = [y - (intercept + drift * x) for x, y in zip(xs, ys)]
+        sigma = math.sqrt(sum(r * r for r in residuals) / max(1, count - 2))
+        offset = best[-1].offset_ns + int(round(intercept))
+        return OffsetFit(ref, offset, drift, min_delay / 2 + sigma, min_delay)
+
+    # --- Correction ---
+    def offset_at(self, local_ns: int) -> int:
+        """Estimated remote-minus-local offset (ns) at local time `local_ns`."""
+        fit = self._fit
+        return fit.offset_ns + int((local_ns - fit.ref_ns) * fit.drift)
+
+    def to_local(self, timestamp) -> int:
+        """Maps a remote timestamp onto the local clock, in integer nanoseconds."""
+        remote_ns = to_ns(timestamp)
+        return remote_ns - self.offset_at(remote_ns - self._fit.offset_ns)
+
+    def is_valid(self) -> bool:
+        """True once enough samples are in and the newest one is recent."""
+        fit = self._fit
+        return (fit is not None
+                and len(self._samples) >= config.CLOCK_SYNC_MIN_SAMPLES
+                and time.monotonic() - self._last_sample_mono <= config.CLOCK_SYNC_MAX_AGE)
+
+    def uncertainty_ns(self) -> float:
+        """Half the best round trip plus fit scatter, growing while no samples arrive."""
+        fit = self._fit
+        if fit is None:
+            return float('inf')
+        age_s = time.monotonic() - self._last_sample_mono
+        return fit.uncertainty_ns + age_s * config.CLOCK_SYNC_HOLDOVER_NS_PER_S
+
+    def status(self) -> dict:
+        fit = self._fit
+        return {
+            'valid': self.is_valid(),
+            'samples': len(self._samples),
+            'offset_ns': fit.offset_ns if fit else None,
+            'drift_ppm': round(fit.drift * 1e6, 3) if fit else None,
+            'rtt_ns': fit.rtt_ns if fit else None,
+            'uncertainty_ns': round(self.uncertainty_ns()) if fit else None,
+        }
+
+def time_sync_reply(payload: dict, t2_ns: int, t3_ns: int, gate_id: str) -> dict:
+    """Remote side: the pong payload for a ping received at t2 and answered at t3."""
+    return {'op': 'pong', 'id': payload['id'], 't1': payload['t1'], 't2': t2_ns, 't3': t3_ns,
+            'gate_id': gate_id}
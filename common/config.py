@@ -3,9 +3,17 @@
 # Network Configuration
 PRIMARY_PI_IP = '192.168.4.1'  # Static IP for the Primary Pi Access Point
 NETWORK_PORT = 9999
+TRIGGER_TRANSPORT = 'TCP'  # Remote gate triggers over 'TCP' or 'UDP' (acked, retransmitted)
+UDP_TRIGGER_PORT = 9998
+UDP_RETRY_INTERVAL = 0.02  # Seconds between re-sends of an unacknowledged trigger
+UDP_DEDUP_WINDOW = 1024    # Recent (gate, sequence) pairs remembered for duplicate suppression
 WIFI_SSID = 'SprintTimerNet'
 WIFI_PASSWORD = 'runfast' # Set to None for an open network
 
+# Hardware Backend
+HARDWARE_BACKEND = 'PI'  # 'PI', or 'SIM' for simulated GPIO, gate edges, SPI display, gpsd and PPS
+HEADLESS = False  # Primary without the Tk touchscreen UI (also: python main_app.py --headless)
+
 # Hardware Pin Configuration (using BCM numbering)
 # Primary Pi
 PRIMARY_GATE_PIN = 17
@@ -15,12 +23,46 @@ PRIMARY_DISPLAY_CS_PIN = 8 # SPI Chip Select for MAX7219
 SECONDARY_GATE_PIN = 17
 SECONDARY_DISPLAY_CS_PIN = 8
 
+# LED Display (MAX7219 8x8 modules)
+DISPLAY_CASCADED = 4   # Modules in the chain; "SS.ss" needs 4
+DISPLAY_INTENSITY = 4  # Brightness, 0-15
+
+# Course Definition
+# Gates in course order. 'role' is 'start', 'split' or 'finish'; 'distance' is
+# in metres; 'lane' ties a gate to one lane (None: the beam crosses every lane).
+# Each lane needs one start gate first and one finish gate last, e.g. splits
+# at 10 m and 20 m: add {'gate_id': 'SPLIT10', 'role': 'split', 'distance': 10}.
+COURSE_GATES = [
+    {'gate_id': 'LOCAL', 'role': 'start', 'distance': 0, 'lane': None},
+    {'gate_id': 'REMOTE', 'role': 'finish', 'distance': 40, 'lane': None},
+]
+COURSE_LANES = 1
+LOCAL_GATE_ID = 'LOCAL'    # Gate id of the primary Pi's own sensor
+REMOTE_GATE_ID = 'REMOTE'  # Gate id a remote gate reports (unique per remote Pi)
+REMOTE_HELLO_INTERVAL = 5.0  # Seconds between UDP hellos so the primary can reach the gate
+
+# Gate Sensor Backend
+GATE_SENSOR_BACKEND = 'AUTO'  # Options: 'CDEV' (kernel edge timestamps), 'RPI_GPIO', 'AUTO'
+GPIO_CHIP = '/dev/gpiochip0'  # Character device holding the header pins
+GPIO_EVENT_BUFFER = 64        # Edges the kernel queues per line before dropping
+
+# Isolated Capture Process
+CAPTURE_PROCESS = False    # Capture gate edges in a separate process, handed over through shared memory
+CAPTURE_RING_SLOTS = 256   # Edges the shared-memory ring holds before the oldest is overwritten
+CAPTURE_SCHED_FIFO = 0     # SCHED_FIFO priority for the capture process (1-99, needs root); 0 = normal
+CAPTURE_CPU = None         # CPU to pin the capture process to (e.g. 3 with isolcpus=3); None = any
+CAPTURE_MLOCKALL = False   # Lock the capture process's memory so it never waits on a page fault
+
 # GPS Configuration
 GPS_UART_TX = 14  # GPIO14 for UART TX
 GPS_UART_RX = 15  # GPIO15 for UART RX
 GPS_PPS_PIN = 18  # GPIO18 for PPS signal
+GPS_PPS_DEVICE = '/sys/class/pps/pps0/assert'  # Kernel PPS (pps-gpio overlay), preferred over the pin
 GPS_DEVICE = '/dev/ttyAMA0'
 GPS_SHARED_MEMORY = 0  # gpsd shared memory segment
+GPSD_HOST = '127.0.0.1'  # gpsd JSON socket, watched continuously by GpsMonitor
+GPSD_PORT = 2947
+GPS_NMEA_BAUDRATE = 9600  # Used when reading GPS_DEVICE directly (gpsd not running)
 
 # Wired Synchronization Configuration
 WIRED_MASTER_OUTPUT_PIN = 23  # GPIO23 for master output signal
@@ -35,11 +77,77 @@ AUTO_FALLBACK = True  # Automatically fallback to wired if GPS unavailable
 DATABASE_FILE = 'sprint_times.db'
 DEBOUNCE_TIME = 0.3 # Seconds to prevent multiple triggers
 
+# Timing Self-Test (admin panel)
+SELF_TEST_OUTPUT_PIN = WIRED_MASTER_OUTPUT_PIN  # Jumpered to PRIMARY_GATE_PIN for the test
+SELF_TEST_PULSES = 200
+SELF_TEST_RATE_HZ = 10.0
+SELF_TEST_PULSE_WIDTH = 0.001  # Seconds the output is held low per pulse
+
+# Database Connection Tuning
+DB_SYNCHRONOUS = 'NORMAL'     # WAL + NORMAL only fsyncs at checkpoints
+DB_CACHE_SIZE_KB = 8192       # Page cache per connection in KiB
+DB_MMAP_SIZE = 64 * 1024 * 1024  # Bytes of the database file to memory-map
+DB_BUSY_TIMEOUT_MS = 5000     # Wait this long for a lock before failing
+DB_STATEMENT_CACHE = 64       # Prepared statements kept per connection
+
+# Result Write-Behind
+RESULT_JOURNAL_FILE = 'results.journal'  # Finished runs waiting to be committed
+RESULT_JOURNAL_FSYNC = True   # fsync each journal append (survives power loss)
+RESULT_WRITER_BATCH_SIZE = 32 # Maximum results committed per transaction
+RESULT_JOURNAL_ATTEMPTS = 3   # Journal appends tried before a result is committed unjournaled
+RESULT_JOURNAL_RETRY_DELAY = 0.5  # Seconds between those attempts
+
+# Remote Gate Outbox
+REMOTE_OUTBOX_FILE = 'remote_outbox.journal'  # Triggers not yet acknowledged by the primary
+REMOTE_OUTBOX_FSYNC = True    # fsync each trigger before sending it
+REMOTE_RECONNECT_DELAY = 5    # Seconds between TCP reconnect attempts
+REMOTE_CONNECT_TIMEOUT = 3.0  # Seconds to wait for a TCP connection to the primary
+REMOTE_TRIG_DISPLAY_TIME = 1.0  # Seconds "TRIG" stays on the remote display
+
+# Web Server
+WEB_PORT = 80
+
+# Web Live Updates
+LIVE_STREAM_TICK_INTERVAL = 0.1  # Seconds between elapsed-time pushes while running
+LIVE_STREAM_KEEPALIVE = 15.0     # Seconds between SSE keep-alive comments when idle
+LIVE_HUB_ENABLED = True          # Serve live data over WebSockets as well
+LIVE_HUB_PORT = 8765
+LIVE_HUB_WRITE_TIMEOUT = 5.0     # Drop a spectator that can't take a frame in this time
+LIVE_HUB_WRITE_BUFFER = 16384    # Bytes buffered per spectator before backpressure
+
+# Web Workers
+WEB_WORKERS = 0                      # Extra web server processes for the fan view and public APIs (0 = none)
+WEB_WORKER_PORT = 8080
+LIVE_SNAPSHOT_EXTRA_BYTES = 16384    # Shared-memory room for lanes and clock status as JSON
+LIVE_SNAPSHOT_POLL_INTERVAL = 0.02   # Seconds between a worker's checks for new live events
+
+# Touchscreen UI
+UI_UPDATE_INTERVAL_MS = 50  # How often queued UI updates are applied on the Tk thread
+
+# Admin Panel
+ADMIN_PAGE_SIZE = 25  # Runners loaded per page as the admin scrolls
+
+# Network Clock Offset (ping/pong over the gate link)
+CLOCK_SYNC_ENABLED = True
+CLOCK_SYNC_INTERVAL = 1.0        # Seconds between pings to the remote gate
+CLOCK_SYNC_WINDOW = 64           # Samples kept
+CLOCK_SYNC_BEST_SAMPLES = 8      # Window stretches; each one's lowest-RTT sample is fitted
+CLOCK_SYNC_MIN_SAMPLES = 4       # Samples needed before remote timestamps are corrected
+CLOCK_SYNC_MIN_DRIFT_SPAN = 10   # Seconds the best samples must span to fit drift
+CLOCK_SYNC_MAX_AGE = 30          # Seconds without a sample before the estimate is stale
+CLOCK_SYNC_HOLDOVER_NS_PER_S = 1000  # Uncertainty growth without samples (about 1 ppm)
+
 # GPS Timeout Settings
 GPS_TIMEOUT_SECONDS = 30  # Time to wait for GPS lock
 GPS_MIN_SATELLITES = 4    # Minimum satellites for valid GPS
 GPS_MAX_AGE = 5.0         # Maximum age of GPS data in seconds
 
 # High Precision Timing
-USE_NANOSECOND_TIMING = True  # Use nanosecond precision when available
 TIMING_PRECISION = 1e-6       # Target timing precision in seconds
+
+# PPS Clock Model
+PPS_FILTER_WINDOW = 64        # PPS edges in the rolling offset/drift fit
+PPS_MIN_EDGES = 4             # Edges needed before GPS timestamps use the model
+PPS_MAX_AGE = 10.0            # Seconds without an edge before the model is stale
+PPS_MAX_RESIDUAL_NS = 1_000_000  # Edges further than this from the fit are rejected
+PPS_HOLDOVER_NS_PER_S = 50.0  # Assumed error growth per second without PPS
@@ -1,11 +1,125 @@
 # common/database.py
 import sqlite3
+import threading
+import weakref
 from datetime import datetime
+from . import config
+from .metrics import timed_query
+from .timestamp import to_seconds, from_seconds
 from .config import DATABASE_FILE
 
+# --- Connection Management ---
+# Opening a connection costs a file open, schema parse and page cache warm-up,
+# which is milliseconds on an SD card. Each thread instead borrows one
+# persistent connection from a small pool and keeps it until the thread exits,
+# at which point it goes back to the pool for the next thread (Flask starts a
+# thread per request). The database runs in WAL mode so readers never block
+# the writer, and sqlite3's per-connection statement cache keeps every query
+# below prepared after its first use.
+
+class _ThreadBinding:
+    """Holds a thread's pooled connection; returns it to the pool when freed."""
+    __slots__ = ('conn', '__weakref__')
+
+    def __init__(self, conn):
+        self.conn = conn
+
+class ConnectionPool:
+    """Pool of persistent, tuned SQLite connections bound one per thread."""
+
+    def __init__(self, database_file: str, max_idle: int = 8):
+        self.database_file = database_file
+        self.max_idle = max_idle
+        self._idle = []
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+    def _open(self) -> sqlite3.Connection:
+        """Opens a new connection and applies the performance pragmas."""
+        conn = sqlite3.connect(
+            self.database_file,
+            timeout=config.DB_BUSY_TIMEOUT_MS / 1000.0,
+            cached_statements=config.DB_STATEMENT_CACHE,
+            check_same_thread=False,  # Connections move between threads via the pool
+        )
+        conn.execute('PRAGMA journal_mode=WAL')
+        conn.execute(f'PRAGMA synchronous={config.DB_SYNCHRONOUS}')
+        conn.execute(f'PRAGMA cache_size=-{int(config.DB_CACHE_SIZE_KB)}')
+        conn.execute(f'PRAGMA mmap_size={int(config.DB_MMAP_SIZE)}')
+        conn.execute('PRAGMA temp_store=MEMORY')
+        return conn
+
+    def get_connection(self) -> sqlite3.Connection:
+        """Returns the calling thread's connection, checking one out on first use."""
+        binding = getattr(self._local, 'binding', None)
+        if binding is not None:
+            return binding.conn
+
+        with self._lock:
+            conn = self._idle.pop() if self._idle else None
+        if conn is None:
+            conn = self._open()
+
+        binding = _ThreadBinding(conn)
+        # The thread-local (and so the binding) is dropped when the thread exits
+        weakref.finalize(binding, self._release, conn)
+        self._local.binding = binding
+        return conn
+
+    def _release(self, conn: sqlite3.Connection):
+        """Returns a connection to the idle pool, closing it if the pool is full."""
+        try:
+            if conn.in_transaction:
+                conn.rollback()
+        except sqlite3.Error:
+            return
+        with self._lock:
+            if len(self._idle) < self.max_idle:
+                self._idle.append(conn)
+                return
+        conn.close()
+
+    def release_thread_connection(self):
+        """Returns the calling thread's connection to the pool early."""
+        binding = getattr(self._local, 'binding', None)
+        if binding is not None:
+            del self._local.binding
+
+    def close_all(self):
+        """Closes every idle connection (call on shutdown)."""
+        self.release_thread_connection()
+        with self._lock:
+            idle, self._idle = self._idle, []
+        for conn in idle:
+            conn.close()
+
+_pool = ConnectionPool(DATABASE_FILE)
+
+# Bumped after every committed write so callers can cache derived data
+# (e.g. the leaderboard) and cheaply tell when it has gone stale.
+_data_version = 0
+_data_version_lock = threading.Lock()
+
+def get_data_version() -> int:
+    """Returns a counter that changes whenever a write is committed."""
+    return _data_version
+
+def _bump_data_version():
+    global _data_version
+    with _data_version_lock:
+        _data_version += 1
+
+def get_connection() -> sqlite3.Connection:
+    """Returns the calling thread's persistent database connection."""
+    return _pool.get_connection()
+
+def close_connections():
+    """Closes pooled connections, e.g. before the application exits."""
+    _pool.close_all()
+
 def initialize_db():
     """Creates the database and tables if they don't exist."""
-    conn = sqlite3.connect(DATABASE_FILE)
+    conn = get_connection()
     cursor = conn.cursor()
     # Runners table
     cursor.execute('''
@@ -25,67 +139,267 @@ def initialize_db():
             FOREIGN KEY (runner_id) REFERENCES runners (id)
         )
     ''')
+    # Unique id of results written through the journal (see result_writer.py)
+    _add_column(cursor, 'times', 'entry_uid', 'TEXT')
+    # Exact run time in integer nanoseconds; run_time (seconds) is derived from it
+    _add_column(cursor, 'times', 'run_time_ns', 'INTEGER')
+    cursor.execute('CREATE UNIQUE INDEX IF NOT EXISTS idx_times_entry_uid ON times (entry_uid)')
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_times_run_time ON times (run_time)')
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_times_runner_time ON times (runner_id, run_time)')
+    # Split times, keyed to their run by entry_uid
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS splits (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            entry_uid TEXT NOT NULL,
+            gate_id TEXT NOT NULL,
+            distance REAL,
+            split_time REAL NOT NULL
+        )
+    ''')
+    _add_column(cursor, 'splits', 'split_time_ns', 'INTEGER')
+    cursor.execute('CREATE UNIQUE INDEX IF NOT EXISTS idx_splits_entry_gate ON splits (entry_uid, gate_id)')
+    cursor.execute('''
+        CREATE TRIGGER IF NOT EXISTS trg_times_delete_splits AFTER DELETE ON times
+        WHEN OLD.entry_uid IS NOT NULL
+        BEGIN
+            DELETE FROM splits WHERE entry_uid = OLD.entry_uid;
+        END
+    ''')
+    _create_runner_stats(cursor)
+    conn.commit()
+
+def _add_column(cursor, table: str, column: str, declaration: str):
+    """Adds a column to a table created by an older version."""
+    cursor.execute(f'PRAGMA table_info({table})')
+    if column not in [row[1] for row in cursor.fetchall()]:
+        cursor.execute(f'ALTER TABLE {table} ADD COLUMN {column} {declaration}')
+
+def _create_runner_stats(cursor):
+    """
+    Creates the per-runner aggregate table and the triggers that keep it in
+    step with the times table, so the leaderboard never has to scan history.
+    The triggers run inside the writing statement's transaction.
+    """
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS runner_stats (
+            runner_id INTEGER PRIMARY KEY,
+            run_count INTEGER NOT NULL DEFAULT 0,
+            total_time REAL NOT NULL DEFAULT 0,
+            best_time REAL
+        )
+    ''')
+    # Indexes matching the leaderboard's ORDER BY clauses exactly
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_runner_stats_count ON runner_stats (run_count)')
+    cursor.execute('''
+        CREATE INDEX IF NOT EXISTS idx_runner_stats_avg
+        ON runner_stats (total_time / run_count) WHERE run_count >= 3
+    ''')
+
+    cursor.execute('''
+        CREATE TRIGGER IF NOT EXISTS trg_times_insert AFTER INSERT ON times
+        BEGIN
+            INSERT OR IGNORE INTO runner_stats (runner_id) VALUES (NEW.runner_id);
+            UPDATE runner_stats
+            SET run_count = run_count + 1,
+                total_time = total_time + NEW.run_time,
+                best_time = MIN(COALESCE(best_time, NEW.run_time), NEW.run_time)
+            WHERE runner_id = NEW.runner_id;
+        END
+    ''')
+    cursor.execute('''
+        CREATE TRIGGER IF NOT EXISTS trg_times_delete AFTER DELETE ON times
+        BEGIN
+            UPDATE runner_stats
+            SET run_count = run_count - 1,
+                total_time = total_time - OLD.run_time,
+                best_time = (SELECT MIN(run_time) FROM times WHERE runner_id = OLD.runner_id)
+            WHERE runner_id = OLD.runner_id;
+            DELETE FROM runner_stats WHERE runner_id = OLD.runner_id AND run_count <= 0;
+        END
+    ''')
+    cursor.execute('''
+        CREATE TRIGGER IF NOT EXISTS trg_times_update AFTER UPDATE OF run_time, runner_id ON times
+        BEGIN
+            UPDATE runner_stats
+            SET run_count = run_count - 1,
+                total_time = total_time - OLD.run_time,
+                best_time = (SELECT MIN(run_time) FROM times WHERE runner_id = OLD.runner_id)
+            WHERE runner_id = OLD.runner_id;
+            DELETE FROM runner_stats WHERE runner_id = OLD.runner_id AND run_count <= 0;
+            INSERT OR IGNORE INTO runner_stats (runner_id) VALUES (NEW.runner_id);
+            UPDATE runner_stats
+            SET run_count = run_count + 1,
+                total_time = total_time + NEW.run_time,
+                best_time = (SELECT MIN(run_time) FROM times WHERE runner_id = NEW.runner_id)
+            WHERE runner_id = NEW.runner_id;
+        END
+    ''')
+
+    # Backfill databases created before runner_stats existed
+    cursor.execute('SELECT COUNT(*) FROM times')
+    times_count = cursor.fetchone()[0]
+    cursor.execute('SELECT COALESCE(SUM(run_count), 0) FROM runner_stats')
+    if cursor.fetchone()[0] != times_count:
+        rebuild_runner_stats(cursor)
+
+@timed_query
+def rebuild_runner_stats(cursor=None):
+    """Recomputes runner_stats from the times table."""
+    conn = get_connection()
+    if cursor is None:
+        cursor = conn.cursor()
+    cursor.execute('DELETE FROM runner_stats')
+    cursor.execute('''
+        INSERT INTO runner_stats (runner_id, run_count, total_time, best_time)
+        SELECT runner_id, COUNT(*), SUM(run_time), MIN(run_time)
+        FROM times
+        GROUP BY runner_id
+    ''')
     conn.commit()
-    conn.close()
+    _bump_data_version()
 
+@timed_query
 def add_runner(name: str) -> int:
     """Adds a new runner to the database. Returns the runner's ID."""
-    conn = sqlite3.connect(DATABASE_FILE)
-    cursor = conn.cursor()
+    conn = get_connection()
     try:
-        cursor.execute('INSERT INTO runners (name) VALUES (?)', (name,))
-        runner_id = cursor.lastrowid
-        conn.commit()
-        return runner_id
+        with conn:
+            cursor = conn.execute('INSERT INTO runners (name) VALUES (?)', (name,))
+        _bump_data_version()
+        return cursor.lastrowid
     except sqlite3.IntegrityError:
         # Runner already exists
-        cursor.execute('SELECT id FROM runners WHERE name = ?', (name,))
+        cursor = conn.execute('SELECT id FROM runners WHERE name = ?', (name,))
         return cursor.fetchone()[0]
-    finally:
-        conn.close()
 
+@timed_query
 def get_all_runners() -> list:
     """Returns a list of tuples with (id, name) for all runners."""
-    conn = sqlite3.connect(DATABASE_FILE)
-    cursor = conn.cursor()
-    cursor.execute('SELECT id, name FROM runners ORDER BY name')
-    runners = cursor.fetchall()
-    conn.close()
-    return runners
+    conn = get_connection()
+    return conn.execute('SELECT id, name FROM runners ORDER BY name').fetchall()
+
+@timed_query
+def get_runner(runner_id: int):
+    """Returns (id, name) for a runner, or None if there is no such runner."""
+    conn = get_connection()
+    return conn.execute('SELECT id, name FROM runners WHERE id = ?', (runner_id,)).fetchone()
 
+@timed_query
 def add_run_time(runner_id: int, time: float):
-    """Adds a new run time for a specific runner."""
-    conn = sqlite3.connect(DATABASE_FILE)
-    cursor = conn.cursor()
-    cursor.execute('INSERT INTO times (runner_id, run_time) VALUES (?, ?)', (runner_id, time))
-    conn.commit()
-    conn.close()
+    """Adds a new run time (seconds) for a specific runner."""
+    conn = get_connection()
+    with conn:
+        conn.execute('INSERT INTO times (runner_id, run_time, run_time_ns) VALUES (?, ?, ?)',
+                     (runner_id, time, from_seconds(time)))
+    _bump_data_version()
+
+@timed_query
+def add_run_times(results: list):
+    """
+    Adds a batch of results in one transaction. Each result is a dict with
+    'uid', 'runner_id', 'run_time_ns' and 'run_date', and optionally 'splits'
+    ([{'gate_id', 'distance', 'split_time_ns'}, ...]); results whose uid is
+    already stored are skipped, so replaying a batch is harmless. Journal
+    entries from older versions carry 'run_time' in seconds instead.
+    """
+    def nanoseconds(record, key):
+        return record[key + '_ns'] if key + '_ns' in record else from_seconds(record[key])
+
+    times, splits = [], []
+    for r in results:
+        run_time_ns = nanoseconds(r, 'run_time')
+        times.append((r['runner_id'], to_seconds(run_time_ns), run_time_ns, r['run_date'], r['uid']))
+        for split in r.get('splits', ()):
+            split_ns = nanoseconds(split, 'split_time')
+            splits.append((r['uid'], split['gate_id'], split['distance'], to_seconds(split_ns), split_ns))
+
+    conn = get_connection()
+    with conn:
+        conn.executemany(
+            'INSERT OR IGNORE INTO times (runner_id, run_time, run_time_ns, run_date, entry_uid) '
+            'VALUES (?, ?, ?, ?, ?)', times)
+        conn.executemany(
+            'INSERT OR IGNORE INTO splits (entry_uid, gate_id, distance, split_time, split_time_ns) '
+            'VALUES (?, ?, ?, ?, ?)', splits)
+    _bump_data_version()
+
+@timed_query
+def get_run_splits(time_id: int) -> list:
+    """Returns the split times of one run as (gate_id, distance, split_time), in course order."""
+    conn = get_connection()
+    return conn.execute('''
+        SELECT s.gate_id, s.distance, s.split_time FROM splits s
+        JOIN times t ON t.entry_uid = s.entry_uid
+        WHERE t.id = ? ORDER BY s.split_time
+    ''', (time_id,)).fetchall()
 
+@timed_query
 def get_runner_times(runner_id: int) -> list:
     """Returns all run times for a specific runner."""
-    conn = sqlite3.connect(DATABASE_FILE)
-    cursor = conn.cursor()
-    cursor.execute('SELECT id, run_time, run_date FROM times WHERE runner_id = ? ORDER BY run_date DESC', (runner_id,))
-    times = cursor.fetchall()
-    conn.close()
-    return times
+    conn = get_connection()
+    return conn.execute('SELECT id, run_time, run_date FROM times WHERE runner_id = ? ORDER BY run_date DESC',
+                        (runner_id,)).fetchall()
+
+@timed_query
+def get_runner_page(after_name: str = None, after_id: int = 0, limit: int = 25,
+                    name_filter: str = None) -> tuple:
+    """
+    Returns one page of runners with all their times for the admin dashboard:
+    ([{'id', 'name', 'times': [(time_id, run_time, run_date), ...]}, ...], next_cursor)
+
+    Pages are keyed on (name, id) rather than OFFSET, so every page is an
+    index seek on runners.name, and the times come from the same joined
+    query via the (runner_id, run_time) index. next_cursor is the
+    (after_name, after_id) pair for the following page, or None at the end.
+    """
+    pattern = '%'
+    if name_filter:
+        escaped = name_filter.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+        pattern = f'%{escaped}%'
 
+    rows = get_connection().execute('''
+        WITH page AS (
+            SELECT id, name FROM runners
+            WHERE (name, id) > (?, ?) AND name LIKE ? ESCAPE '\\'
+            ORDER BY name, id
+            LIMIT ?
+        )
+        SELECT p.id, p.name, t.id, t.run_time, t.run_date
+        FROM page p
+        LEFT JOIN times t ON t.runner_id = p.id
+        ORDER BY p.name, p.id, t.run_date DESC
+    ''', (after_name or '', after_id, pattern, limit)).fetchall()
+
+    runners = []
+    for runner_id, name, time_id, run_time, run_date in rows:
+        if not runners or runners[-1]['id'] != runner_id:
+            runners.append({'id': runner_id, 'name': name, 'times': []})
+        if time_id is not None:
+            runners[-1]['times'].append((time_id, run_time, run_date))
+
+    next_cursor = None
+    if len(runners) == limit:
+        next_cursor = (runners[-1]['name'], runners[-1]['id'])
+    return runners, next_cursor
+
+@timed_query
 def delete_run_time(time_id: int):
     """Deletes a specific run time entry."""
-    conn = sqlite3.connect(DATABASE_FILE)
-    cursor = conn.cursor()
-    cursor.execute('DELETE FROM times WHERE id = ?', (time_id,))
-    conn.commit()
-    conn.close()
+    conn = get_connection()
+    with conn:
+        conn.execute('DELETE FROM times WHERE id = ?', (time_id,))
+    _bump_data_version()
 
+@timed_query
 def update_run_time(time_id: int, new_time: float):
-    """Updates a specific run time entry."""
-    conn = sqlite3.connect(DATABASE_FILE)
-    cursor = conn.cursor()
-    cursor.execute('UPDATE times SET run_time = ? WHERE id = ?', (new_time, time_id))
-    conn.commit()
-    conn.close()
+    """Updates a specific run time entry (seconds)."""
+    conn = get_connection()
+    with conn:
+        conn.execute('UPDATE times SET run_time = ?, run_time_ns = ? WHERE id = ?',
+                     (new_time, from_seconds(new_time), time_id))
+    _bump_data_version()
 
+@timed_query
 def get_leaderboard_stats() -> dict:
     """
     Returns a dictionary with leaderboard statistics:
@@ -95,9 +409,10 @@ def get_leaderboard_stats() -> dict:
         'most_runs': (name, run_count),
         'top_10_fastest': [(name, time), ...]
     }
+    Every query is an index walk over times.run_time or runner_stats, so the
+    cost does not grow with the number of recorded runs.
     """
-    conn = sqlite3.connect(DATABASE_FILE)
-    cursor = conn.cursor()
+    cursor = get_connection().cursor()
     
     # Fastest single run
     cursor.execute('''
@@ -111,23 +426,21 @@ def get_leaderboard_stats() -> dict:
     
     # Fastest average time (minimum 3 runs)
     cursor.execute('''
-        SELECT r.name, AVG(t.run_time) as avg_time, COUNT(t.id) as run_count
-        FROM times t 
-        JOIN runners r ON t.runner_id = r.id 
-        GROUP BY r.id, r.name 
-        HAVING COUNT(t.id) >= 3
-        ORDER BY avg_time ASC 
+        SELECT r.name, s.total_time / s.run_count AS avg_time, s.run_count
+        FROM runner_stats s
+        CROSS JOIN runners r ON s.runner_id = r.id
+        WHERE s.run_count >= 3
+        ORDER BY s.total_time / s.run_count ASC
         LIMIT 1
     ''')
     fastest_avg = cursor.fetchone()
     
     # Most runs
     cursor.execute('''
-        SELECT r.name, COUNT(t.id) as run_count
-        FROM times t 
-        JOIN runners r ON t.runner_id = r.id 
-        GROUP BY r.id, r.name 
-        ORDER BY run_count DESC 
+        SELECT r.name, s.run_count
+        FROM runner_stats s
+        CROSS JOIN runners r ON s.runner_id = r.id
+        ORDER BY s.run_count DESC
         LIMIT 1
     ''')
     most_runs = cursor.fetchone()
@@ -142,8 +455,6 @@ def get_leaderboard_stats() -> dict:
     ''')
     top_10 = cursor.fetchall()
     
-    conn.close()
-    
     return {
         'fastest_single_run': fastest_single if fastest_single else (None, None),
         'fastest_average_time': fastest_avg if fastest_avg else (None, None),
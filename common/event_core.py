@@ -0,0 +1,108 @@
+# common/event_core.py
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from .metrics import Histogram, EVENT_QUEUE_WAIT, EVENT_HANDLE
+
+# Event kinds
+EVENT_GATE_TRIGGER = 'GATE_TRIGGER'
+EVENT_REMOTE_TRIGGER = 'REMOTE_TRIGGER'
+EVENT_ARM = 'ARM'
+EVENT_RESET = 'RESET'
+EVENT_MODE_CHANGE = 'MODE_CHANGE'
+EVENT_TIME_SYNC = 'TIME_SYNC'
+EVENT_UI_TICK = 'UI_TICK'
+EVENT_STATUS_POLL = 'STATUS_POLL'
+EVENT_SELF_TEST = 'SELF_TEST'
+
+class EventCore:
+    """
+    One asyncio event loop, on its own thread, that owns application state.
+
+    Every state transition is an event: other threads post() it, coroutines
+    running on the loop (the network listener) dispatch() it directly, and
+    every() turns periodic work into events too. Handlers therefore run one
+    at a time, in order, on the loop thread, and need no locking. Each
+    dispatch is timed from post to completion, so queueing delay and
+    handling time are measured in one place.
+
+    Handlers must not block. Slow I/O (journal fsyncs) goes through
+    run_blocking(), which runs it in order on a single worker thread.
+    """
+
+    def __init__(self):
+        self.loop = asyncio.new_event_loop()
+        self._handlers = {}
+        self._thread = None
+        self._blocking = ThreadPoolExecutor(max_workers=1, thread_name_prefix='core-io')
+        self._queue_wait = Histogram()  # All kinds; per-kind histograms are in common.metrics
+        self._handle = Histogram()
+
+        # Statistics
+        self.events = 0
+        self.errors = 0
+
+    def on(self, kind: str, handler):
+        """Registers the handler for one event kind; it is called with the event's keyword data."""
+        self._handlers[kind] = handler
+
+    def start(self):
+        """Runs the loop on a background thread."""
+        self._thread = threading.Thread(target=self._run, name='event-core', daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        asyncio.set_event_loop(self.loop)
+        self.loop.run_forever()
+
+    def in_loop(self) -> bool:
+        return threading.current_thread() is self._thread
+
+    # --- Event input ---
+    def post(self, kind: str, **data):
+        """Queues an event from any thread."""
+        self.loop.call_soon_threadsafe(self.dispatch, kind, data, time.perf_counter_ns())
+
+    def dispatch(self, kind: str, data: dict = None, posted_ns: int = None):
+        """Handles an event now. Only call this on the loop thread."""
+        start = time.perf_counter_ns()
+        try:
+            self._handlers[kind](**(data or {}))
+        except Exception as e:
+            self.errors += 1
+            print(f"Error handling {kind} event: {e}")
+        end = time.perf_counter_ns()
+        self.events += 1
+        wait_ns = start - (posted_ns or start)
+        self._queue_wait.observe_ns(wait_ns)
+        self._handle.observe_ns(end - start)
+        EVENT_QUEUE_WAIT.labels(kind).observe_ns(wait_ns)
+        EVENT_HANDLE.labels(kind).observe_ns(end - start)
+
+    def every(self, kind: str, interval: float):
+        """Dispatches `kind` every `interval` seconds."""
+        async def repeat():
+            while True:
+                await asyncio.sleep(interval)
+                self.dispatch(kind)
+        self.submit(repeat())
+
+    def submit(self, coroutine):
+        """Schedules a coroutine on the loop from any thread."""
+        return asyncio.run_coroutine_threadsafe(coroutine, self.loop)
+
+    def run_blocking(self, func, *args):
+        """Runs blocking work off the loop, in submission order."""
+        return self._blocking.submit(func, *args)
+
+    # --- Measurement ---
+    def stats(self) -> dict:
+        """Event counts and latency percentiles (microseconds, estimated from histogram buckets) since start."""
+        return {
+            'events': self.events,
+            'errors': self.errors,
+            'by_kind': {kind: histogram.count for kind, histogram in EVENT_HANDLE.children().items()},
+            'queue_wait_us': self._queue_wait.summary_us(),
+            'handle_us': self._handle.summary_us(),
+        }
@@ -0,0 +1,123 @@
+# common/gps_monitor.py
+import json
+import os
+import socket
+import threading
+import time
+from . import config
+
+# GPS status values reported to the UI and web server
+GPS_LOCKED = 'LOCKED'
+GPS_NO_FIX = 'NO_FIX'
+GPS_UNAVAILABLE = 'UNAVAILABLE'
+
+class GpsMonitor:
+    """
+    Background GPS fix tracker.
+
+    Keeps one persistent connection to gpsd's JSON socket (or, when gpsd is
+    not reachable, reads NMEA sentences from config.GPS_DEVICE) and updates
+    the fix quality, satellite count and fix age as reports arrive. has_lock()
+    and status() only read the cached state, so callers on the timestamping
+    path never wait on the GPS.
+    """
+
+    def __init__(self):
+        self.fix_mode = 0          # 0/1 = no fix, 2 = 2D, 3 = 3D
+        self.satellites_used = 0
+        self.last_fix_time = None  # time.monotonic() of the last report with a fix
+        self.source = None         # 'gpsd' or 'nmea' while connected
+        self._changed = threading.Condition()
+        self._thread = None
+
+    def start(self):
+        """Starts the monitor thread (idempotent)."""
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, daemon=True)
+            self._thread.start()
+
+    # --- Cached state ---
+    def has_lock(self) -> bool:
+        """True if the last fix is recent and uses enough satellites."""
+        last_fix = self.last_fix_time
+        return (self.fix_mode >= 2
+                and self.satellites_used >= config.GPS_MIN_SATELLITES
+                and last_fix is not None
+                and time.monotonic() - last_fix <= config.GPS_MAX_AGE)
+
+    def status(self) -> str:
+        if self.has_lock():
+            return GPS_LOCKED
+        return GPS_NO_FIX if self.source else GPS_UNAVAILABLE
+
+    def wait_for_lock(self, timeout: float) -> bool:
+        """Blocks until has_lock() is true or the timeout expires."""
+        with self._changed:
+            return self._changed.wait_for(self.has_lock, timeout)
+
+    def _update(self, fix_mode=None, satellites_used=None):
+        with self._changed:
+            if fix_mode is not None:
+                self.fix_mode = fix_mode
+                if fix_mode >= 2:
+                    self.last_fix_time = time.monotonic()
+            if satellites_used is not None:
+                self.satellites_used = satellites_used
+            self._changed.notify_all()
+
+    # --- Readers ---
+    def _run(self):
+        while True:
+            try:
+                self._read_gpsd()
+            except OSError:
+                try:
+                    self._read_nmea()
+                except Exception as e:
+                    if self.source is not None:
+                        print(f"GPS monitor error: {e}")
+            self.source = None
+            self._update(fix_mode=0)
+            time.sleep(2)
+
+    def _read_gpsd(self):
+        """Streams reports from gpsd until the connection drops."""
+        with socket.create_connection((config.GPSD_HOST, config.GPSD_PORT), timeout=10) as sock:
+            sock.sendall(b'?WATCH={"enable":true,"json":true};\n')
+            self.source = 'gpsd'
+            print("GPS monitor connected to gpsd")
+            # A read timeout means gpsd went quiet; reconnect
+            for line in sock.makefile('r', encoding='ascii', errors='replace'):
+                try:
+                    report = json.loads(line)
+                except ValueError:
+                    continue
+                report_class = report.get('class')
+                if report_class == 'TPV':
+                    self._update(fix_mode=report.get('mode', 0))
+                elif report_class == 'SKY':
+                    used = report.get('uSat')
+                    if used is None:
+                        used = sum(1 for sat in report.get('satellites', []) if sat.get('used'))
+                    self._update(satellites_used=used)
+
+    def _read_nmea(self):
+        """Reads GGA sentences straight from the GPS serial port."""
+        if not os.path.exists(config.GPS_DEVICE):
+            raise OSError(f"{config.GPS_DEVICE} not found")
+        import serial
+
+        with serial.Serial(config.GPS_DEVICE, config.GPS_NMEA_BAUDRATE, timeout=config.GPS_MAX_AGE) as port:
+            self.source = 'nmea'
+            print(f"GPS monitor reading NMEA from {config.GPS_DEVICE}")
+            while True:
+                line = port.readline().decode('ascii', errors='replace').strip()
+                if not line:
+                    raise OSError("No NMEA data")
+                # $GPGGA, $GNGGA, ...: field 6 is fix quality, field 7 satellites used
+                if line.startswith('$') and line[3:6] == 'GGA':
+                    parts = line.split('*')[0].split(',')
+                    if len(parts) >= 8:
+                        quality = int(parts[6]) if parts[6].isdigit() else 0
+                        satellites = int(parts[7]) if parts[7].isdigit() else 0
+                        self._update(fix_mode=3 if quality > 0 else 0, satellites_used=satellites)
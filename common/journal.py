@@ -0,0 +1,54 @@
+# common/journal.py
+import json
+import os
+import threading
+
+class AppendJournal:
+    """
+    A small append-only file of JSON records, one per line.
+
+    Each append is flushed (and by default fsynced) before returning, so a
+    record survives a crash or power cut the moment append() returns. A torn
+    final line from a crash mid-write is ignored on read.
+    """
+
+    def __init__(self, path: str, fsync: bool = True):
+        self.path = path
+        self.fsync = fsync
+        self._lock = threading.Lock()
+        self._file = open(path, 'a', encoding='utf-8')
+
+    def append(self, record: dict):
+        """Durably appends one record."""
+        line = json.dumps(record, separators=(',', ':')) + '\n'
+        with self._lock:
+            self._file.write(line)
+            self._file.flush()
+            if self.fsync:
+                os.fsync(self._file.fileno())
+
+    def read_all(self) -> list:
+        """Returns every complete record currently in the journal."""
+        records = []
+        with self._lock:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                for line in f:
+                    if not line.endswith('\n'):
+                        break  # Torn write from a crash
+                    try:
+                        records.append(json.loads(line))
+                    except ValueError:
+                        continue
+        return records
+
+    def truncate(self):
+        """Discards all records (call once they are safely stored elsewhere)."""
+        with self._lock:
+            self._file.truncate(0)
+            self._file.seek(0)
+            if self.fsync:
+                os.fsync(self._file.fileno())
+
+    def close(self):
+        with self._lock:
+            self._file.close()
@@ -0,0 +1,166 @@
+# common/live_snapshot.py
+"""
+The live state, published in shared memory for web worker processes.
+
+The main application is the only writer: LiveState publishes every change
+here. Workers read without locks or messages to the main process. A
+seqlock makes the reads consistent. The writer makes the sequence number
+odd, writes the fields, then makes it even again. A reader copies the
+block and keeps the copy only if it saw the same even sequence number
+before and after, so it never returns a torn mix of two updates.
+
+Fixed layout: counters, the running lane's start time (CLOCK_MONOTONIC
+ns, so workers compute the elapsed time themselves), the last run time,
+then fixed-width UTF-8 text fields. Lanes and clock status vary in size
+and follow as JSON, in a region of LIVE_SNAPSHOT_EXTRA_BYTES.
+"""
+import json
+import struct
+import time
+from multiprocessing.shared_memory import SharedMemory
+from . import config
+from .timestamp import to_seconds
+
+_SEQ = struct.Struct('<Q')
+# seq, version, event_version, data_version, elapsed base ns, last run time,
+# current runner, last run name, elapsed text, timing mode, GPS status, extra length
+_FIELDS = struct.Struct('<QQQQqd64s64s16s16s16sI')
+_TEXT_FIELDS = ('current_runner', 'last_run_name', 'elapsed_time', 'timing_mode', 'gps_status')
+_EXTRA_KEYS = ('lanes', 'clock_model', 'network_offset')
+
+def _text(value, size: int) -> bytes:
+    """UTF-8, cut to `size` bytes without splitting a character."""
+    encoded = str(value).encode('utf-8')
+    return encoded if len(encoded) <= size else encoded[:size].decode('utf-8', 'ignore').encode('utf-8')
+
+class LiveSnapshot:
+    """Writer side: created by the main application, which publishes its LiveState into it."""
+
+    def __init__(self, extra_bytes: int = None):
+        self.extra_bytes = extra_bytes or config.LIVE_SNAPSHOT_EXTRA_BYTES
+        self.shm = SharedMemory(create=True, size=_FIELDS.size + self.extra_bytes)
+        self._seq = 0
+        self._extra = b'{}'
+        self._extra_source = None
+
+        # Statistics
+        self.published = 0
+        self.oversize = 0
+
+    @property
+    def name(self) -> str:
+        return self.shm.name
+
+    def publish(self, state: dict, version: int = 0, event_version: int = 0):
+        """Writes a new snapshot of `state` (a LiveState's values). Callers must not publish concurrently."""
+        extra_source = tuple(state.get(key) for key in _EXTRA_KEYS)
+        if extra_source != self._extra_source:
+            # Only re-encoded when lanes or clock status changed, not on every elapsed tick
+            extra = json.dumps(dict(zip(_EXTRA_KEYS, extra_source))).encode('utf-8')
+            if len(extra) > self.extra_bytes:
+                self.oversize += 1
+                extra = json.dumps({'lanes': [], 'clock_model': {}, 'network_offset': {}}).encode('utf-8')
+            self._extra, self._extra_source = extra, extra_source
+        last_run = state.get('last_run') or {}
+        buf = self.shm.buf
+
+        seq = self._seq + 1
+        _SEQ.pack_into(buf, 0, seq)  # Odd: a write is in progress
+        _FIELDS.pack_into(
+            buf, 0, seq, version, event_version, state.get('data_version') or 0,
+            state.get('elapsed_base_ns') or 0, float(last_run.get('time') or 0.0),
+            _text(state.get('current_runner', 'N/A'), 64), _text(last_run.get('name', 'N/A'), 64),
+            _text(state.get('elapsed_time', '0.00'), 16), _text(state.get('timing_mode', 'SYSTEM'), 16),
+            _text(state.get('gps_status', 'UNKNOWN'), 16), len(self._extra))
+        buf[_FIELDS.size:_FIELDS.size + len(self._extra)] = self._extra
+        self._seq = seq + 1
+        _SEQ.pack_into(buf, 0, self._seq)  # Even again: consistent
+        self.published += 1
+
+    def close(self):
+        self.shm.close()
+        self.shm.unlink()
+
+class LiveSnapshotReader:
+    """
+    Reader side, in a web worker. Offers the parts of LiveState the web
+    server uses: get(), snapshot() and wait_for_event().
+    """
+
+    def __init__(self, name: str):
+        try:
+            self.shm = SharedMemory(name=name, track=False)  # Python 3.13+
+        except TypeError:
+            # A spawned worker shares its creator's resource tracker, where the block is already registered
+            self.shm = SharedMemory(name=name)
+        self._cached_seq = None
+        self._cached = None
+
+        # Statistics
+        self.retries = 0
+
+    def _read(self) -> dict:
+        buf = self.shm.buf
+        while True:
+            seq = _SEQ.unpack_from(buf, 0)[0]
+            if seq == self._cached_seq:
+                return self._cached
+            if seq & 1:
+                self.retries += 1
+                time.sleep(0)  # The writer is mid-update; let it finish
+                continue
+            header = bytes(buf[:_FIELDS.size])
+            fields = _FIELDS.unpack(header)
+            extra_length = min(fields[-1], len(buf) - _FIELDS.size)
+            extra = bytes(buf[_FIELDS.size:_FIELDS.size + extra_length])
+            if _SEQ.unpack_from(buf, 0)[0] != seq or fields[0] != seq:
+                self.retries += 1
+                continue
+            break
+
+        (_, version, event_version, data_version, elapsed_base_ns, last_run_time,
+         *texts, _) = fields
+        current_runner, last_run_name, elapsed_time, timing_mode, gps_status = (
+            text.rstrip(b'\0').decode('utf-8', 'ignore') for text in texts)
+        state = {
+            'version': version,
+            'event_version': event_version,
+            'data_version': data_version,
+            'elapsed_base_ns': elapsed_base_ns or None,
+            'current_runner': current_runner,
+            'elapsed_time': elapsed_time,
+            'last_run': {'name': last_run_name, 'time': last_run_time},
+            'timing_mode': timing_mode,
+            'gps_status': gps_status,
+        }
+        try:
+            # Keys the main process hasn't set yet are left out, so get() defaults apply
+            state.update((key, value) for key, value in json.loads(extra).items() if value is not None)
+        except ValueError:
+            pass
+        self._cached_seq, self._cached = seq, state
+        return state
+
+    def snapshot(self) -> dict:
+        """A consistent copy of the live state, with the elapsed time computed now while a run is in progress."""
+        state = dict(self._read())
+        base_ns = state['elapsed_base_ns']
+        if base_ns:
+            state['elapsed_time'] = f"{to_seconds(time.monotonic_ns() - base_ns):.2f}"
+        return state
+
+    def get(self, key, default=None):
+        return self.snapshot().get(key, default)
+
+    def wait_for_event(self, since_event_version: int, timeout: float) -> int:
+        """Polls (every LIVE_SNAPSHOT_POLL_INTERVAL) until event_version changes or the timeout expires."""
+        deadline = time.monotonic() + timeout
+        while True:
+            event_version = self._read()['event_version']
+            remaining = deadline - time.monotonic()
+            if event_version != since_event_version or remaining <= 0:
+                return event_version
+            time.sleep(min(config.LIVE_SNAPSHOT_POLL_INTERVAL, remaining))
+
+    def close(self):
+        self.shm.close()
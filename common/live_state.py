@@ -0,0 +1,68 @@
+# common/live_state.py
+import threading
+
+class LiveState(dict):
+    """
+    The live data dict shared between the main application and the web server.
+
+    It behaves like a plain dict, but assigning a *different* value to a key
+    bumps a version counter and wakes any threads waiting for changes, so the
+    web server can push updates instead of being polled. Keys listed in
+    `tick_keys` (the elapsed-time counter) change many times a second; they
+    bump `version` but not `event_version`, letting readers react to real
+    events immediately and sample the ticking values at their own rate.
+
+    With a mirror attached (a LiveSnapshot), every change is also published
+    to shared memory for web worker processes.
+    """
+
+    def __init__(self, initial: dict = None, tick_keys=()):
+        super().__init__(initial or {})
+        self.tick_keys = frozenset(tick_keys)
+        self.version = 0
+        self.event_version = 0
+        self.mirror = None
+        self._changed = threading.Condition()
+
+    def __setitem__(self, key, value):
+        with self._changed:
+            if key in self and dict.__getitem__(self, key) == value:
+                return
+            super().__setitem__(key, value)
+            self.version += 1
+            if key not in self.tick_keys:
+                self.event_version += 1
+                self._changed.notify_all()
+            if self.mirror is not None:
+                self.mirror.publish(self, self.version, self.event_version)
+
+    def attach_mirror(self, mirror):
+        """Publishes the current state to `mirror`, then every change after it."""
+        with self._changed:
+            self.mirror = mirror
+            mirror.publish(self, self.version, self.event_version)
+
+    def snapshot(self) -> dict:
+        """Returns a consistent shallow copy of the current values."""
+        with self._changed:
+            return dict(self)
+
+    def wait_for_event(self, since_event_version: int, timeout: float) -> int:
+        """
+        Blocks until event_version differs from `since_event_version` or the
+        timeout expires. Returns the current event_version.
+        """
+        with self._changed:
+            self._changed.wait_for(lambda: self.event_version != since_event_version, timeout)
+            return self.event_version
+
+def live_payload(shared_data) -> dict:
+    """Builds the live data payload sent to fan views, from any dict-like source."""
+    return {
+        'current_runner': shared_data.get('current_runner', 'N/A'),
+        'elapsed_time': shared_data.get('elapsed_time', '0.00'),
+        'last_run': shared_data.get('last_run', {'name': 'N/A', 'time': 0.0}),
+        'lanes': shared_data.get('lanes', []),
+        'timing_mode': shared_data.get('timing_mode', 'SYSTEM'),
+        'gps_status': shared_data.get('gps_status', 'UNKNOWN')
+    }
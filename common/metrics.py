@@ -0,0 +1,169 @@
+# common/metrics.py
+"""
+Hot-path latency histograms, exposed in Prometheus text format at
+/api/metrics.
+
+Each histogram has fixed bucket bounds in integer nanoseconds and
+preallocated counts, so observing a value is one bisect and a few integer
+additions under a lock: nothing is allocated per event. Labelled families
+(per event kind, database function or web route) create a child the first
+time a label value is seen and reuse it afterwards.
+"""
+import threading
+import time
+from bisect import bisect_left
+from .timestamp import NS_PER_SECOND
+
+# Upper bounds, 25 us to 10 s
+DEFAULT_BUCKETS_NS = (
+    25_000, 50_000, 100_000, 250_000, 500_000,
+    1_000_000, 2_500_000, 5_000_000, 10_000_000, 25_000_000, 50_000_000,
+    100_000_000, 250_000_000, 500_000_000, 1_000_000_000, 2_500_000_000, 10_000_000_000,
+)
+
+class Histogram:
+    """Cumulative latency histogram with fixed buckets (nanoseconds in, seconds out)."""
+
+    def __init__(self, buckets_ns=DEFAULT_BUCKETS_NS):
+        self.bounds = tuple(buckets_ns)
+        self.counts = [0] * (len(self.bounds) + 1)  # Last slot: above the highest bound
+        self.count = 0
+        self.sum_ns = 0
+        self.max_ns = 0
+        self._lock = threading.Lock()
+
+    def observe_ns(self, value_ns: int):
+        index = bisect_left(self.bounds, value_ns)
+        with self._lock:
+            self.counts[index] += 1
+            self.count += 1
+            self.sum_ns += value_ns
+            if value_ns > self.max_ns:
+                self.max_ns = value_ns
+
+    def quantile_ns(self, q: float) -> float:
+        """Estimated q-quantile, interpolated within its bucket as Prometheus does."""
+        with self._lock:
+            counts = list(self.counts)
+            total = self.count
+            max_ns = self.max_ns
+        if not total:
+            return 0.0
+        rank = q * total
+        cumulative = 0
+        for index, count in enumerate(counts):
+            if cumulative + count >= rank and count:
+                lower = self.bounds[index - 1] if index else 0
+                upper = min(self.bounds[index], max_ns) if index < len(self.bounds) else max_ns
+                return lower + (upper - lower) * (rank - cumulative) / count
+            cumulative += count
+        return float(max_ns)
+
+    def summary_us(self) -> dict:
+        """p50/p99/max in microseconds, for the JSON status endpoints."""
+        if not self.count:
+            return {}
+        return {'p50': round(self.quantile_ns(0.5) / 1000, 1),
+                'p99': round(self.quantile_ns(0.99) / 1000, 1),
+                'max': round(self.max_ns / 1000, 1)}
+
+    def time(self, func):
+        """Decorator observing each call's duration."""
+        def timed(*args, **kwargs):
+            start = time.perf_counter_ns()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                self.observe_ns(time.perf_counter_ns() - start)
+        timed.__name__ = func.__name__
+        timed.__doc__ = func.__doc__
+        return timed
+
+    def _render(self, name: str, labels: str, lines: list):
+        with self._lock:
+            counts = list(self.counts)
+            total = self.count
+            sum_ns = self.sum_ns
+        separator = ',' if labels else ''
+        cumulative = 0
+        for bound, count in zip(self.bounds, counts):
+            cumulative += count
+            lines.append(f'{name}_bucket{{{labels}{separator}le="{bound / NS_PER_SECOND:g}"}} {cumulative}')
+        lines.append(f'{name}_bucket{{{labels}{separator}le="+Inf"}} {total}')
+        suffix = f'{{{labels}}}' if labels else ''
+        lines.append(f'{name}_sum{suffix} {sum_ns / NS_PER_SECOND:.9f}')
+        lines.append(f'{name}_count{suffix} {total}')
+
+class HistogramFamily:
+    """Histograms of one metric, one per value of a label."""
+
+    def __init__(self, name: str, help_text: str, label: str, buckets_ns=DEFAULT_BUCKETS_NS):
+        self.name = name
+        self.help = help_text
+        self.label = label
+        self.buckets_ns = buckets_ns
+        self._children = {}
+        self._lock = threading.Lock()
+        REGISTRY.append(self)
+
+    def labels(self, value: str) -> Histogram:
+        child = self._children.get(value)
+        if child is None:
+            with self._lock:
+                child = self._children.setdefault(value, Histogram(self.buckets_ns))
+        return child
+
+    def children(self) -> dict:
+        return dict(self._children)
+
+    def render(self, lines: list):
+        lines.append(f'# HELP {self.name} {self.help}')
+        lines.append(f'# TYPE {self.name} histogram')
+        for value, child in sorted(self.children().items()):
+            escaped = str(value).replace('\\', '\\\\').replace('"', '\\"')
+            child._render(self.name, f'{self.label}="{escaped}"', lines)
+
+class SingleHistogram(Histogram):
+    """An unlabelled histogram registered for exposition."""
+
+    def __init__(self, name: str, help_text: str, buckets_ns=DEFAULT_BUCKETS_NS):
+        super().__init__(buckets_ns)
+        self.name = name
+        self.help = help_text
+        REGISTRY.append(self)
+
+    def render(self, lines: list):
+        lines.append(f'# HELP {self.name} {self.help}')
+        lines.append(f'# TYPE {self.name} histogram')
+        self._render(self.name, '', lines)
+
+REGISTRY = []
+
+# --- The pipeline's stages ---
+GATE_EDGE_TO_TIMESTAMP = SingleHistogram(
+    'sprint_gate_edge_to_timestamp_seconds', 'Gate edge (kernel time) to trigger timestamp produced.')
+NETWORK_RECEIVE_TO_HANDLE = SingleHistogram(
+    'sprint_network_receive_to_handle_seconds', 'Remote trigger received from the network to handled by the core.')
+ENGINE_TRIGGER = SingleHistogram(
+    'sprint_engine_trigger_seconds', 'Timing engine state machine handling of one trigger.')
+EVENT_QUEUE_WAIT = HistogramFamily(
+    'sprint_event_queue_seconds', 'Event posted to the core until its handler starts.', 'kind')
+EVENT_HANDLE = HistogramFamily(
+    'sprint_event_handle_seconds', 'Event handler run time on the core.', 'kind')
+DB_COMMIT = SingleHistogram(
+    'sprint_db_commit_seconds', 'Result writer batch commit, including retries.')
+DB_QUERY = HistogramFamily(
+    'sprint_db_query_seconds', 'Time spent in each database function.', 'function')
+WEB_REQUEST = HistogramFamily(
+    'sprint_web_request_seconds', 'Web request handling time, per route.', 'route')
+
+def timed_query(func):
+    """Decorator for database functions: observes each call in DB_QUERY under the function's name."""
+    return DB_QUERY.labels(func.__name__).time(func)
+
+def render_prometheus() -> str:
+    """Every registered metric in the Prometheus text exposition format."""
+    lines = []
+    for metric in REGISTRY:
+        metric.render(lines)
+    return '\n'.join(lines) + '\n'
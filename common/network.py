@@ -1,6 +1,11 @@
 # common/network.py
 import json
+import struct
+import threading
 import time
+from collections import OrderedDict
+from . import config
+from .timestamp import Timestamp, from_seconds
 
 # Message Types
 MSG_GATE_TRIGGER = 'GATE_TRIGGER'
@@ -11,6 +16,7 @@ MSG_RACE_FINISH = 'RACE_FINISH'
 MSG_TIMING_MODE = 'TIMING_MODE'
 MSG_GPS_STATUS = 'GPS_STATUS'
 MSG_WIRED_SYNC = 'WIRED_SYNC'
+MSG_ACK = 'ACK'
 
 def create_message(msg_type: str, payload: dict = None) -> bytes:
     """Creates a JSON message and encodes it to bytes for sending over a socket."""
@@ -25,20 +31,231 @@ def parse_message(data: bytes) -> dict:
     """Parses an incoming bytes message into a Python dictionary."""
     return json.loads(data.decode('utf-8'))
 
-def create_timing_message(timing_mode: str, timestamp: float, precision: float = None) -> bytes:
+def create_timing_message(timing_mode: str, timestamp, precision: float = None) -> bytes:
     """Creates a high-precision timing message."""
     payload = {
         'timing_mode': timing_mode,
-        'timestamp': timestamp,
+        'timestamp': to_ns(timestamp),
         'precision': precision or 1e-6
     }
     return create_message(MSG_TIME_SYNC, payload)
 
-def create_gate_trigger_message(timestamp: float, gate_id: str, timing_mode: str = None) -> bytes:
+def create_gate_trigger_message(timestamp, gate_id: str, timing_mode: str = None) -> bytes:
     """Creates a gate trigger message with high-precision timestamp."""
     payload = {
-        'timestamp': timestamp,
+        'timestamp': to_ns(timestamp),
         'gate_id': gate_id,
         'timing_mode': timing_mode or 'SYSTEM'
     }
     return create_message(MSG_GATE_TRIGGER, payload)
+
+# --- Framed binary protocol ---
+# Every frame is a fixed header followed by a payload:
+#   magic 'ST' | version u8 | message type u8 | payload length u32 (network order)
+# Gate triggers use a fixed binary payload with int64 nanosecond timestamps;
+# other message types carry their payload dict as JSON. Because frames are
+# length-prefixed, MessageDecoder can split a TCP byte stream back into
+# messages however the reads are coalesced or fragmented.
+PROTOCOL_MAGIC = b'ST'
+PROTOCOL_VERSION = 1
+MAX_FRAME_PAYLOAD = 64 * 1024
+
+_HEADER = struct.Struct('!2sBBI')
+# timestamp_ns int64, sent_ns int64, seq u32, timing mode u8, gate id length u8
+_GATE_TRIGGER = struct.Struct('!qqIBB')
+# sent_ns int64, followed by the JSON payload
+_JSON_BODY = struct.Struct('!q')
+
+MESSAGE_TYPE_CODES = {
+    MSG_GATE_TRIGGER: 1,
+    MSG_TIME_SYNC: 2,
+    MSG_CURRENT_RUNNER: 3,
+    MSG_RACE_START: 4,
+    MSG_RACE_FINISH: 5,
+    MSG_TIMING_MODE: 6,
+    MSG_GPS_STATUS: 7,
+    MSG_WIRED_SYNC: 8,
+    MSG_ACK: 9,
+}
+MESSAGE_TYPE_NAMES = {code: name for name, code in MESSAGE_TYPE_CODES.items()}
+
+TIMING_MODE_CODES = {'SYSTEM': 0, 'GPS': 1, 'WIRED': 2, 'AUTO': 3}
+TIMING_MODE_NAMES = {code: name for name, code in TIMING_MODE_CODES.items()}
+
+def to_ns(timestamp) -> int:
+    """
+    Converts a timestamp to integer nanoseconds: a Timestamp's ns, ints as
+    they are, floats (older JSON gates) as seconds.
+    """
+    if isinstance(timestamp, Timestamp):
+        return timestamp.ns
+    if isinstance(timestamp, int):
+        return timestamp
+    return from_seconds(timestamp)
+
+def encode_message(msg_type: str, payload: dict = None) -> bytes:
+    """Encodes a message as one binary frame (JSON payload; gate triggers use their binary layout)."""
+    if msg_type == MSG_GATE_TRIGGER:
+        # The decoder always reads trigger frames as the fixed binary payload, never JSON
+        payload = payload or {}
+        return encode_gate_trigger(payload['timestamp'], payload['gate_id'],
+                                   payload.get('timing_mode'), payload.get('seq', 0))
+    body =_JSON_BODY.pack(time.time_ns()) + json.dumps(payload or {}).encode('utf-8')
+    return _HEADER.pack(PROTOCOL_MAGIC, PROTOCOL_VERSION, MESSAGE_TYPE_CODES[msg_type], len(body)) + body
+
+def encode_gate_trigger(timestamp, gate_id: str, timing_mode: str = None, seq: int = 0) -> bytes:
+    """Encodes a gate trigger as one binary frame with a nanosecond timestamp."""
+    gate = gate_id.encode('utf-8')[:255]
+    body = _GATE_TRIGGER.pack(to_ns(timestamp), time.time_ns(), seq & 0xFFFFFFFF,
+                              TIMING_MODE_CODES.get(timing_mode or 'SYSTEM', 0), len(gate)) + gate
+    return _HEADER.pack(PROTOCOL_MAGIC, PROTOCOL_VERSION, MESSAGE_TYPE_CODES[MSG_GATE_TRIGGER],
+                        len(body)) + body
+
+def decode_frame_body(type_code: int, body, offset: int = 0, length: int = None) -> dict:
+    """Decodes a frame payload into the same dict shape as parse_message()."""
+    if type_code == 1:  # MSG_GATE_TRIGGER, the hot path
+        timestamp_ns, sent_ns, seq, mode, gate_len = _GATE_TRIGGER.unpack_from(body, offset)
+        gate_start = offset + _GATE_TRIGGER.size
+        gate_id = bytes(body[gate_start:gate_start + gate_len]).decode('utf-8')
+        return {
+            'type': MSG_GATE_TRIGGER,
+            'payload': {
+                'timestamp': timestamp_ns,
+                'gate_id': gate_id,
+                'timing_mode': TIMING_MODE_NAMES.get(mode, 'SYSTEM'),
+                'seq': seq,
+            },
+            'timestamp': sent_ns,
+        }
+    if length is None:
+        length = len(body) - offset
+    sent_ns, = _JSON_BODY.unpack_from(body, offset)
+    return {
+        'type': MESSAGE_TYPE_NAMES[type_code],
+        'payload': json.loads(bytes(body[offset + _JSON_BODY.size:offset + length]).decode('utf-8')),
+        'timestamp': sent_ns,
+    }
+
+class MessageDecoder:
+    """
+    Streaming decoder for a socket's byte stream.
+
+    feed() takes whatever recv() returned and yields every complete message
+    it now holds, keeping any partial message for the next call. Both binary
+    frames and the older unframed JSON messages (create_message) are accepted,
+    so remote gates can be upgraded one at a time.
+    """
+
+    def __init__(self):
+        self._buffer = bytearray()
+        self._json = json.JSONDecoder()
+        self.errors = 0
+
+    def feed(self, data: bytes) -> list:
+        """Adds received bytes and returns the complete messages decoded so far."""
+        buffer = self._buffer
+        buffer.extend(data)
+        messages = []
+        pos = 0
+        size = len(buffer)
+        while pos < size:
+            if buffer[pos:pos + 2] == PROTOCOL_MAGIC:
+                if size - pos < _HEADER.size:
+                    break
+                _, version, type_code, length = _HEADER.unpack_from(buffer, pos)
+                if length > MAX_FRAME_PAYLOAD:
+                    del buffer[:pos]
+                    self._resync(1)
+                    pos, size = 0, len(buffer)
+                    continue
+                body_start = pos + _HEADER.size
+                if size < body_start + length:
+                    break
+                pos = body_start + length
+                if version != PROTOCOL_VERSION or type_code not in MESSAGE_TYPE_NAMES:
+                    self.errors += 1
+                    continue
+                try:
+                    messages.append(decode_frame_body(type_code, buffer, body_start, length))
+                except (struct.error, ValueError):
+                    self.errors += 1
+                continue
+
+            # Slow paths work on the front of the buffer
+            del buffer[:pos]
+            pos = 0
+            first = buffer[:1]
+            if first == b'{':
+                message, used = self._decode_legacy()
+                if used == 0:
+                    break
+                if message is not None:
+                    messages.append(message)
+            elif first in (b' ', b'\n', b'\r', b'\t'):
+                del buffer[:1]
+            elif first == PROTOCOL_MAGIC[:1] and len(buffer) == 1:
+                break  # Possibly the first byte of a frame
+            else:
+                self._resync(1)
+            size = len(buffer)
+        del buffer[:pos]
+        return messages
+
+    def _decode_legacy(self):
+        """Decodes one legacy JSON message. Returns (message or None, bytes consumed)."""
+        buffer = self._buffer
+        try:
+            text = buffer.decode('utf-8')
+        except UnicodeDecodeError as e:
+            # A binary frame may follow the JSON; decode just the text before it
+            text = buffer[:e.start].decode('utf-8')
+        try:
+            message, end = self._json.raw_decode(text)
+        except ValueError:
+            if len(buffer) > MAX_FRAME_PAYLOAD:
+                self._resync(1)
+                return None, 1
+            return None, 0  # Incomplete; wait for more data
+        del buffer[:len(text[:end].encode('utf-8'))]
+        return message, end
+
+    def _resync(self, skip: int):
+        """Drops corrupt bytes up to the next plausible message start."""
+        self.errors += 1
+        buffer = self._buffer
+        del buffer[:skip]
+        starts = [i for i in (buffer.find(PROTOCOL_MAGIC), buffer.find(b'{')) if i >= 0]
+        if starts:
+            del buffer[:min(starts)]
+        elif buffer[-1:] == PROTOCOL_MAGIC[:1]:
+            del buffer[:-1]  # Keep what may be the first byte of the next frame
+        else:
+            buffer.clear()
+
+def decode_datagram(data: bytes) -> list:
+    """Decodes the messages in one UDP datagram (each datagram holds whole frames)."""
+    return MessageDecoder().feed(data)
+
+class DuplicateFilter:
+    """
+    Remembers recently handled (gate id, sequence number) pairs so that
+    triggers re-sent after a lost ack or a reconnect are handled only once.
+    """
+
+    def __init__(self, window: int = None):
+        self.window = window or config.UDP_DEDUP_WINDOW
+        self._seen = OrderedDict()
+        self._lock = threading.Lock()
+        self.duplicates = 0
+
+    def is_duplicate(self, gate_id: str, seq: int) -> bool:
+        """Returns True if this trigger was already seen; otherwise records it."""
+        key = (gate_id, seq)
+        with self._lock:
+            if key in self._seen:
+                self.duplicates += 1
+                return True
+            self._seen[key] = True
+            if len(self._seen) > self.window:
+                self._seen.popitem(last=False)
+        return False
@@ -0,0 +1,51 @@
+# common/outbox.py
+import threading
+from collections import OrderedDict
+from .journal import AppendJournal
+
+class Outbox:
+    """
+    Store-and-forward buffer of triggers the primary has not acknowledged.
+
+    Triggers are journaled to disk when added and stay pending until
+    mark_sent() is called for their sequence number, so triggers captured
+    while the link is down, or lost with a dropped connection, are replayed
+    after a reconnect or a restart. Delivered triggers are recorded as 'done'
+    entries and the journal is truncated whenever nothing is pending.
+    """
+
+    def __init__(self, path: str, fsync: bool = True):
+        self.journal = AppendJournal(path, fsync=fsync)
+        self._pending = OrderedDict()
+        self._lock = threading.Lock()
+        for record in self.journal.read_all():
+            if 'done' in record:
+                self._pending.pop(record['done'], None)
+            else:
+                self._pending[record['seq']] = record
+        if self._pending:
+            print(f"Outbox holds {len(self._pending)} unsent trigger(s)")
+
+    def add(self, record: dict):
+        """Durably adds a trigger record (must have a 'seq' key)."""
+        with self._lock:
+            self.journal.append(record)
+            self._pending[record['seq']] = record
+
+    def mark_sent(self, seq: int):
+        """Removes an acknowledged trigger."""
+        with self._lock:
+            if self._pending.pop(seq, None) is None:
+                return
+            if self._pending:
+                self.journal.append({'done': seq})
+            else:
+                self.journal.truncate()
+
+    def pending(self) -> list:
+        """Returns the unacknowledged trigger records, oldest first."""
+        with self._lock:
+            return list(self._pending.values())
+
+    def __len__(self):
+        return len(self._pending)
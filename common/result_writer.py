@@ -0,0 +1,139 @@
+# common/result_writer.py
+import queue
+import threading
+import time
+import uuid
+from datetime import datetime, timezone
+from . import config, database
+from .journal import AppendJournal
+from .metrics import DB_COMMIT
+
+class ResultWriter:
+    """
+    Write-behind queue for finished runs.
+
+    submit() appends the result to a crash-safe journal and returns at once;
+    a dedicated thread commits queued results to SQLite in batches. Results
+    left in the journal by a crash are replayed on start(). Every result
+    carries a unique id stored with the row, so a replay after a crash
+    between commit and journal truncation cannot insert it twice.
+    """
+
+    def __init__(self, journal_path: str = None):
+        self.journal = AppendJournal(journal_path or config.RESULT_JOURNAL_FILE,
+                                     fsync=config.RESULT_JOURNAL_FSYNC)
+        self._queue = queue.Queue()
+        # Serializes journal appends against truncation once the queue drains
+        self._lock = threading.Lock()
+        self._thread = None
+
+        # Statistics
+        self.submitted = 0
+        self.committed = 0
+        self.unjournaled = 0
+        self.batches = 0
+        self.last_commit_ms = 0.0
+        self.max_commit_ms = 0.0
+        self._total_commit_ms = 0.0
+
+    def start(self):
+        """Replays any journaled results, then starts the writer thread."""
+        pending = self.journal.read_all()
+        for record in pending:
+            self._queue.put(record)
+        self.submitted += len(pending)
+        if pending:
+            print(f"Replaying {len(pending)} journaled result(s)")
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def submit(self, runner_id: int, run_time_ns: int, splits: list = None) -> str:
+        """
+        Durably records a result for writing to the database. Returns its id.
+        `splits` is an optional list of {'gate_id', 'distance', 'split_time_ns'}.
+        """
+        record = {
+            'uid': uuid.uuid4().hex,
+            'runner_id': runner_id,
+            'run_time_ns': run_time_ns,
+            # Keep the finish time even if the commit happens much later; UTC in the
+            # format of the column's CURRENT_TIMESTAMP default, like direct inserts
+            'run_date': datetime.now(timezone.utc).strftime('%Y-%m-%d %H:%M:%S'),
+        }
+        if splits:
+            record['splits'] = splits
+        # Callers don't wait on the result, so a journal error is handled here rather than raised
+        for attempt in range(1, config.RESULT_JOURNAL_ATTEMPTS + 1):
+            try:
+                with self._lock:
+                    self.journal.append(record)
+                    self._queue.put(record)
+                    self.submitted += 1
+                return record['uid']
+            except Exception as e:
+                print(f"Result journal error (attempt {attempt}): {e}")
+                time.sleep(config.RESULT_JOURNAL_RETRY_DELAY)
+        # Still commit it; only crash safety is lost. A retried append may have left a copy
+        # in the journal, but a replay can't insert the same uid twice.
+        print(f"Result {record['uid']} not journaled; committing it without crash protection")
+        with self._lock:
+            self._queue.put(record)
+            self.submitted += 1
+        self.unjournaled += 1
+        return record['uid']
+
+    def _run(self):
+        while True:
+            batch = [self._queue.get()]
+            while len(batch) < config.RESULT_WRITER_BATCH_SIZE:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            self._commit(batch)
+
+    def _commit(self, batch: list):
+        start = time.perf_counter_ns()
+        while True:
+            try:
+                database.add_run_times(batch)
+                break
+            except Exception as e:
+                # The results are safe in the journal; keep trying
+                print(f"Result writer error: {e}. Retrying...")
+                time.sleep(1)
+        elapsed_ns = time.perf_counter_ns() - start
+        DB_COMMIT.observe_ns(elapsed_ns)
+        elapsed_ms = elapsed_ns / 1e6
+
+        self.committed += len(batch)
+        self.batches += 1
+        self.last_commit_ms = elapsed_ms
+        self.max_commit_ms = max(self.max_commit_ms, elapsed_ms)
+        self._total_commit_ms += elapsed_ms
+
+        with self._lock:
+            if self._queue.empty():
+                self.journal.truncate()
+
+    def flush(self, timeout: float = 5.0) -> bool:
+        """Waits until everything submitted so far is committed."""
+        target = self.submitted
+        deadline = time.monotonic() + timeout
+        while self.committed < target:
+            if time.monotonic() > deadline:
+                return False
+            time.sleep(0.01)
+        return True
+
+    def stats(self) -> dict:
+        """Queue depth and commit latency, for the status API."""
+        return {
+            'queue_depth': self._queue.qsize(),
+            'committed': self.committed,
+            'unjournaled': self.unjournaled,
+            'batches': self.batches,
+            'last_commit_ms': round(self.last_commit_ms, 3),
+            'max_commit_ms': round(self.max_commit_ms, 3),
+            'avg_commit_ms': round(self._total_commit_ms / self.batches, 3) if self.batches else 0.0,
+        }
@@ -0,0 +1,95 @@
+# common/shm_ring.py
+"""
+Single-producer, single-consumer ring of gate edges in shared memory.
+
+The capture process pushes, the main application reads; neither side ever
+takes a lock or waits for the other. The producer never blocks: when the
+consumer falls more than a ring behind, the oldest edges are overwritten
+and counted as dropped on the consumer side.
+
+Layout: a header holding the number of edges ever written, then fixed-size
+slots. Each slot carries its own sequence number. The producer first sets
+it to 0 (invalid), then writes the payload, then the new sequence number,
+and updates the header count last. The consumer keeps a slot only if its
+sequence number is the one expected both before and after copying it. A
+slot being overwritten mid-read therefore fails the check and is never
+returned torn.
+"""
+import struct
+from multiprocessing.shared_memory import SharedMemory
+
+_HEADER = struct.Struct('<QI4x')  # edges written, slot count
+_SEQ = struct.Struct('<Q')
+_SLOT = struct.Struct('<QqQQ')     # slot sequence (1-based), edge CLOCK_MONOTONIC ns, line seqno, rising
+
+class SharedRing:
+    """An edge ring in a named shared memory block; create() on one side, attach() on the other."""
+
+    def __init__(self, shm: SharedMemory, owner: bool):
+        self.shm = shm
+        self.buf = shm.buf
+        self.owner = owner
+        self.slots = _HEADER.unpack_from(self.buf, 0)[1]
+        self._written = _HEADER.unpack_from(self.buf, 0)[0]  # Producer position
+        self._read = self._written                              # Consumer position
+
+        # Statistics (consumer side)
+        self.dropped = 0
+
+    @classmethod
+    def create(cls, slots: int) -> 'SharedRing':
+        shm = SharedMemory(create=True, size=_HEADER.size + slots * _SLOT.size)
+        _HEADER.pack_into(shm.buf, 0, 0, slots)
+        return cls(shm, owner=True)
+
+    @classmethod
+    def attach(cls, name: str) -> 'SharedRing':
+        try:
+            shm = SharedMemory(name=name, track=False)  # Python 3.13+
+        except TypeError:
+            # A spawned child shares its creator's resource tracker, where the block is already registered
+            shm = SharedMemory(name=name)
+        return cls(shm, owner=False)
+
+    @property
+    def name(self) -> str:
+        return self.shm.name
+
+    # --- Producer ---
+    def push(self, edge_ns: int, line_seqno: int = 0, rising: bool = False):
+        sequence = self._written + 1
+        offset = _HEADER.size + (self._written % self.slots) * _SLOT.size
+        # Invalidate the slot, then the payload, then the slot's sequence, then the header count
+        _SEQ.pack_into(self.buf, offset, 0)
+        struct.pack_into('<qQQ', self.buf, offset + _SEQ.size, edge_ns, line_seqno, rising)
+        _SEQ.pack_into(self.buf, offset, sequence)
+        self._written = sequence
+        _SEQ.pack_into(self.buf, 0, sequence)
+
+    # --- Consumer ---
+    def read(self) -> list:
+        """Every edge written since the last read, as (edge_ns, line_seqno, rising) tuples."""
+        written = _SEQ.unpack_from(self.buf, 0)[0]
+        if written - self._read > self.slots:
+            self.dropped += written - self.slots - self._read
+            self._read = written - self.slots
+        edges = []
+        while self._read < written:
+            expected = self._read + 1
+            offset = _HEADER.size + (self._read % self.slots) * _SLOT.size
+            sequence, edge_ns, line_seqno, rising = _SLOT.unpack_from(self.buf, offset)
+            if sequence < expected:
+                # Not visible yet (or invalidated for a later lap, which the next read counts as dropped)
+                break
+            if sequence == expected and _SEQ.unpack_from(self.buf, offset)[0] == expected:
+                edges.append((edge_ns, line_seqno, bool(rising)))
+            else:
+                self.dropped += 1  # Overwritten while we were behind
+            self._read = expected
+        return edges
+
+    def close(self):
+        self.buf = None
+        self.shm.close()
+        if self.owner:
+            self.shm.unlink()
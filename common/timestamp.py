@@ -0,0 +1,61 @@
+# common/timestamp.py
+"""
+Trigger timestamps: integer nanoseconds since the Unix epoch plus a tag
+naming the clock they were read from. Durations (run and split times) are
+the integer difference of two timestamps; conversion to seconds happens
+only where a time is shown or stored for people (UI, LED, web, database
+REAL columns). Elapsed time on screen is measured on CLOCK_MONOTONIC, so a
+wall-clock step during a run cannot make it jump.
+"""
+import time
+
+NS_PER_SECOND = 1_000_000_000
+
+# Clock sources
+CLOCK_SYSTEM = 'SYSTEM'    # Local wall clock, not disciplined
+CLOCK_GPS = 'GPS'          # Local clock disciplined to GPS PPS
+CLOCK_WIRED = 'WIRED'      # Local wall clock, referenced to the wired sync pulse
+CLOCK_NETWORK = 'NETWORK'  # A remote gate's clock mapped onto ours by the network offset estimate
+
+class Timestamp:
+    """
+    One instant: `ns` on the shared UTC timeline, the clock `source` it came
+    from and, when known, `mono_ns`, the same instant on the local
+    CLOCK_MONOTONIC.
+    """
+    __slots__ = ('ns', 'source', 'mono_ns')
+
+    def __init__(self, ns: int, source: str = CLOCK_SYSTEM, mono_ns: int = None):
+        self.ns = ns
+        self.source = source
+        self.mono_ns = mono_ns
+
+    @classmethod
+    def now(cls, source: str = CLOCK_SYSTEM):
+        """The local wall clock, now."""
+        mono_ns = time.monotonic_ns()
+        return cls(time.time_ns(), source, mono_ns)
+
+    def __sub__(self, other) -> int:
+        """Nanoseconds between two timestamps."""
+        return self.ns - other.ns
+
+    def __eq__(self, other):
+        return isinstance(other, Timestamp) and self.ns == other.ns and self.source == other.source
+
+    def __hash__(self):
+        return hash((self.ns, self.source))
+
+    def __repr__(self):
+        return f"Timestamp({self.ns}, {self.source!r})"
+
+    def __str__(self):
+        return f"{self.ns} ns ({self.source})"
+
+def to_seconds(ns: int) -> float:
+    """Nanoseconds as float seconds, for display and storage edges."""
+    return ns / NS_PER_SECOND
+
+def from_seconds(seconds: float) -> int:
+    """Float seconds (config values, older messages) as integer nanoseconds."""
+    return int(round(seconds * NS_PER_SECOND))
@@ -0,0 +1,192 @@
+# common/timing_engine.py
+import threading
+import time
+from collections import deque
+from . import config
+from .metrics import ENGINE_TRIGGER
+from .timestamp import Timestamp, to_seconds
+
+# Gate roles
+GATE_START = 'start'
+GATE_SPLIT = 'split'
+GATE_FINISH = 'finish'
+
+# Lane states
+STATE_IDLE = 'IDLE'
+STATE_ARMED = 'ARMED' # Ready for a run
+STATE_RUNNING = 'RUNNING'
+STATE_FINISHED = 'FINISHED'
+
+# Events passed to the engine's listener
+EVENT_START = 'START'
+EVENT_SPLIT = 'SPLIT'
+EVENT_FINISH = 'FINISH'
+
+class Gate:
+    """One timing gate of the course."""
+    __slots__ = ('gate_id', 'role', 'distance', 'lane')
+
+    def __init__(self, gate_id: str, role: str, distance: float = 0.0, lane: int = None):
+        self.gate_id = gate_id
+        self.role = role
+        self.distance = distance
+        self.lane = lane  # None when the beam crosses every lane
+
+class Course:
+    """
+    The gates in course order and the number of lanes. Each lane runs
+    through its own gates plus the shared ones: one start gate, any number
+    of split gates and one finish gate.
+    """
+
+    def __init__(self, gates: list, lanes: int = 1):
+        self.gates = gates
+        self.lanes = lanes
+        self._lane_gates = {}
+        for lane in range(1, lanes + 1):
+            sequence = [g for g in gates if g.lane in (None, lane)]
+            roles = [g.role for g in sequence]
+            if roles.count(GATE_START) != 1 or roles[0] != GATE_START:
+                raise ValueError(f"Lane {lane} needs exactly one start gate, first in the course")
+            if roles.count(GATE_FINISH) != 1 or roles[-1] != GATE_FINISH:
+                raise ValueError(f"Lane {lane} needs exactly one finish gate, last in the course")
+            self._lane_gates[lane] = sequence
+
+    @classmethod
+    def from_config(cls):
+        gates = [Gate(g['gate_id'], g['role'], g.get('distance', 0.0), g.get('lane'))
+                 for g in config.COURSE_GATES]
+        return cls(gates, config.COURSE_LANES)
+
+    def lane_gates(self, lane: int) -> list:
+        """The gates a runner in `lane` passes, in order."""
+        return self._lane_gates[lane]
+
+class Lane:
+    """Run state of one lane."""
+
+    def __init__(self, number: int, gates: list):
+        self.number = number
+        self.gates = gates
+        self.reset()
+
+    def reset(self):
+        self.state = STATE_IDLE
+        self.runner = None # (id, name)
+        self.start_time = None  # Timestamp
+        self.finish_time = None
+        self.run_time_ns = None
+        self.splits = []  # (gate, ns since start)
+        self.next_gate = 0  # Index into self.gates
+
+    def snapshot(self) -> dict:
+        return {
+            'lane': self.number,
+            'state': self.state,
+            'runner': self.runner[1] if self.runner else None,
+            'splits': [{'gate_id': gate.gate_id, 'distance': gate.distance, 'time': to_seconds(split_ns)}
+                       for gate, split_ns in self.splits],
+            'run_time': to_seconds(self.run_time_ns) if self.run_time_ns is not None else None,
+        }
+
+class TimingEngine:
+    """
+    Per-lane run state for a course with any number of gates and lanes.
+
+    Each gate keeps a FIFO of the lanes whose runner is due there next, so
+    matching a trigger to a lane is one deque pop: a lane's own gate only
+    ever has that lane waiting, and a shared beam goes to whichever runner
+    reached the previous gate first (runners on a shared course are assumed
+    not to overtake between gates). The listener is called with
+    (event, lane, gate) after the engine's lock is released, so slow work
+    there never holds up the next trigger.
+    """
+
+    def __init__(self, course: Course, listener=None):
+        self.course = course
+        self.listener = listener
+        self.lanes = [Lane(number, course.lane_gates(number)) for number in range(1, course.lanes + 1)]
+        self._waiting = {gate.gate_id: deque() for gate in course.gates}
+        self._lock = threading.Lock()
+
+        # Statistics
+        self.triggers = 0
+        self.unmatched = 0
+
+    def arm(self, runner: tuple, lane: int = None):
+        """
+        Arms `lane` (or the first lane that is free) for `runner` (id, name).
+        Returns the armed Lane, or None if no lane is free.
+        """
+        with self._lock:
+            if lane is None:
+                candidates = [l for l in self.lanes if l.state in (STATE_IDLE, STATE_FINISHED)]
+            else:
+                candidates = [l for l in self.lanes
+                              if l.number == lane and l.state in (STATE_IDLE, STATE_FINISHED, STATE_ARMED)]
+            if not candidates:
+                return None
+            target = candidates[0]
+            self._unqueue(target)
+            target.reset()
+            target.state = STATE_ARMED
+            target.runner = runner
+            self._waiting[target.gates[0].gate_id].append(target)
+            return target
+
+    def reset(self, lane: int = None):
+        """Returns one lane (or every lane) to idle, abandoning any run in progress."""
+        with self._lock:
+            for target in self.lanes:
+                if lane is None or target.number == lane:
+                    self._unqueue(target)
+                    target.reset()
+
+    def _unqueue(self, lane: Lane):
+        if lane.state in (STATE_ARMED, STATE_RUNNING):
+            waiting = self._waiting[lane.gates[lane.next_gate].gate_id]
+            if lane in waiting:
+                waiting.remove(lane)
+
+    def handle_trigger(self, gate_id: str, timestamp: Timestamp):
+        """Matches a trigger to a lane and advances it. Returns the Lane, or None if no lane was due."""
+        start = time.perf_counter_ns()
+        with self._lock:
+            self.triggers += 1
+            waiting = self._waiting.get(gate_id)
+            if not waiting:
+                self.unmatched += 1
+                ENGINE_TRIGGER.observe_ns(time.perf_counter_ns() - start)
+                return None
+            lane = waiting.popleft()
+            gate = lane.gates[lane.next_gate]
+            if gate.role == GATE_START:
+                lane.state = STATE_RUNNING
+                lane.start_time = timestamp
+                event = EVENT_START
+            elif gate.role == GATE_SPLIT:
+                lane.splits.append((gate, timestamp - lane.start_time))
+                event = EVENT_SPLIT
+            else:
+                lane.state = STATE_FINISHED
+                lane.finish_time = timestamp
+                lane.run_time_ns = timestamp - lane.start_time
+                event = EVENT_FINISH
+            lane.next_gate += 1
+            if lane.next_gate < len(lane.gates):
+                self._waiting[lane.gates[lane.next_gate].gate_id].append(lane)
+        ENGINE_TRIGGER.observe_ns(time.perf_counter_ns() - start)
+
+        if self.listener:
+            self.listener(event, lane, gate)
+        return lane
+
+    def latest_running(self):
+        """The running lane that started last, or None."""
+        running = [l for l in self.lanes if l.state == STATE_RUNNING]
+        return max(running, key=lambda l: l.start_time.ns) if running else None
+
+    def snapshot(self) -> list:
+        """Every lane's state, for the web views."""
+        with self._lock:
+            return [lane.snapshot() for lane in self.lanes]
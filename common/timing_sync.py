@@ -5,8 +5,11 @@ import subprocess
 import socket
 import json
 from typing import Optional, Callable
-import RPi.GPIO as GPIO
+from hardware.gpio import GPIO
 from . import config
+from .gps_monitor import GpsMonitor, GPS_UNAVAILABLE
+from .clock_model import PpsClockModel
+from .timestamp import Timestamp, CLOCK_SYSTEM, CLOCK_GPS, CLOCK_WIRED
 
 class TimingSynchronizer:
     """High-precision timing synchronization using GPS or wired fallback."""
@@ -18,6 +21,8 @@ class TimingSynchronizer:
         self.wired_connected = False
         self.sync_callback = None
         self.start_timestamp = None
+        self.gps_monitor = None
+        self.clock_model = None
         
         # Initialize GPIO for wired mode
         if self.timing_mode in ['WIRED', 'AUTO']:
@@ -54,12 +59,23 @@ class TimingSynchronizer:
                 print("GPS system not available")
         except Exception as e:
             print(f"GPS setup error: {e}")
+
+        # Track the fix in the background (falls back to NMEA without gpsd)
+        self.gps_monitor = GpsMonitor()
+        self.gps_monitor.start()
+
+        # Discipline a local clock model to the PPS edges
+        self.clock_model = PpsClockModel()
+        try:
+            self.clock_model.start()
+        except Exception as e:
+            print(f"PPS setup error: {e}")
     
     def _wired_interrupt_handler(self, channel):
         """Interrupt handler for wired synchronization signal."""
         if not self.is_master and self.sync_callback:
             # Capture timestamp immediately
-            timestamp = time.time_ns() if config.USE_NANOSECOND_TIMING else time.time()
+            timestamp = self.get_precise_timestamp()
             self.start_timestamp = timestamp
             self.sync_callback('WIRED', timestamp)
     
@@ -67,58 +83,61 @@ class TimingSynchronizer:
         """Wait for GPS lock with timeout."""
         if timeout is None:
             timeout = config.GPS_TIMEOUT_SECONDS
+        if self.gps_monitor is None:
+            return False
         
         print(f"Waiting for GPS lock (timeout: {timeout}s)...")
-        start_time = time.time()
-        
-        while time.time() - start_time < timeout:
-            try:
-                # Check GPS status using gpspipe
-                result = subprocess.run(['gpspipe', '-w', '-n', '10'], 
-                                      capture_output=True, text=True, timeout=5)
-                
-                if result.returncode == 0 and 'GPGGA' in result.stdout:
-                    # Parse GPS data to check satellite count
-                    lines = result.stdout.split('\n')
-                    for line in lines:
-                        if line.startswith('$GPGGA'):
-                            parts = line.split(',')
-                            if len(parts) >= 8:
-                                satellites = int(parts[7]) if parts[7] else 0
-                                if satellites >= config.GPS_MIN_SATELLITES:
-                                    print(f"GPS lock acquired with {satellites} satellites")
-                                    return True
-                
-                time.sleep(1)
-            except Exception as e:
-                print(f"GPS check error: {e}")
-                time.sleep(1)
+        if self.gps_monitor.wait_for_lock(timeout):
+            print(f"GPS lock acquired with {self.gps_monitor.satellites_used} satellites")
+            return True
         
         print("GPS lock timeout")
         return False
     
-    def get_gps_timestamp(self) -> Optional[float]:
+    def get_gps_status(self) -> str:
+        """Get the cached GPS status ('LOCKED', 'NO_FIX' or 'UNAVAILABLE')."""
+        if self.gps_monitor is None:
+            return GPS_UNAVAILABLE
+        return self.gps_monitor.status()
+    
+    def get_gps_timestamp(self) -> Optional[Timestamp]:
         """Get current GPS timestamp with high precision."""
-        try:
-            # Use chrony to get precise time
-            result = subprocess.run(['chronyc', 'tracking'], 
-                                  capture_output=True, text=True, timeout=2)
-            
-            if result.returncode == 0:
-                # Parse chrony output for reference time
-                for line in result.stdout.split('\n'):
-                    if 'Reference time' in line:
-                        # Extract timestamp from chrony output
-                        # Format: Reference time : Thu Jan 01 00:00:00 1970
-                        # This is a simplified parser - in practice you'd need more robust parsing
-                        return time.time()
-            
-            # Fallback to system time
-            return time.time_ns() if config.USE_NANOSECOND_TIMING else time.time()
-            
-        except Exception as e:
-            print(f"GPS timestamp error: {e}")
-            return None
+        return self.timestamp_from_monotonic(time.monotonic_ns())
+    
+    def timestamp_from_monotonic(self, mono_ns: int) -> Timestamp:
+        """
+        Converts a CLOCK_MONOTONIC reading to a Timestamp, through the PPS
+        clock model when it is disciplined and by the current wall-clock
+        offset otherwise; the tag says which.
+        """
+        return Timestamp(self.utc_ns_from_monotonic(mono_ns), self.clock_source(), mono_ns)
+    
+    def utc_ns_from_monotonic(self, mono_ns: int) -> int:
+        """Like timestamp_from_monotonic(), but just the integer nanoseconds."""
+        if self.clock_model is not None and self.clock_model.is_valid():
+            return self.clock_model.to_utc_ns(mono_ns)
+        return time.time_ns() - (time.monotonic_ns() - mono_ns)
+    
+    def monotonic_from_utc_ns(self, utc_ns: int) -> int:
+        """The local CLOCK_MONOTONIC reading at a UTC instant (inverse of utc_ns_from_monotonic)."""
+        mono_ns = time.monotonic_ns()
+        return mono_ns - (self.utc_ns_from_monotonic(mono_ns) - utc_ns)
+    
+    def clock_source(self) -> str:
+        """The clock utc_ns_from_monotonic() currently reads."""
+        if self.clock_model is not None and self.clock_model.is_valid():
+            return CLOCK_GPS
+        return CLOCK_WIRED if self.get_current_mode() == 'WIRED' else CLOCK_SYSTEM
+    
+    def now_ns(self) -> int:
+        """Current time in nanoseconds on the same clock as trigger timestamps."""
+        return self.utc_ns_from_monotonic(time.monotonic_ns())
+    
+    def get_clock_status(self) -> dict:
+        """Get the PPS clock model state, including its uncertainty estimate."""
+        if self.clock_model is None:
+            return {'source': None, 'valid': False}
+        return self.clock_model.status()
     
     def send_wired_signal(self):
         """Send wired synchronization signal (master only)."""
@@ -126,7 +145,7 @@ class TimingSynchronizer:
             return
         
         # Capture timestamp immediately before signal
-        timestamp = time.time_ns() if config.USE_NANOSECOND_TIMING else time.time()
+        timestamp = self.get_precise_timestamp()
         self.start_timestamp = timestamp
         
         # Send signal
@@ -144,21 +163,16 @@ class TimingSynchronizer:
     def get_current_mode(self) -> str:
         """Get current timing mode."""
         if self.timing_mode == 'AUTO':
-            if self.gps_available and self.wait_for_gps_lock(5):
+            # Cached by the GPS monitor thread, so this never blocks
+            if self.gps_monitor.has_lock():
                 return 'GPS'
             else:
                 return 'WIRED'
         return self.timing_mode
     
-    def get_precise_timestamp(self) -> float:
-        """Get current timestamp with maximum precision."""
-        if self.get_current_mode() == 'GPS':
-            gps_time = self.get_gps_timestamp()
-            if gps_time:
-                return gps_time
-        
-        # Fallback to system time
-        return time.time_ns() if config.USE_NANOSECOND_TIMING else time.time()
+    def get_precise_timestamp(self) -> Timestamp:
+        """Get current timestamp with maximum precision (GPS-disciplined when locked, else system time)."""
+        return self.timestamp_from_monotonic(time.monotonic_ns())
     
     def cleanup(self):
         """Cleanup GPIO and other resources."""
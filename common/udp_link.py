@@ -0,0 +1,177 @@
+# common/udp_link.py
+"""
+Optional UDP transport for gate triggers.
+
+Over TCP a single lost Wi-Fi frame stalls every later byte until the
+retransmission timer fires (200 ms or more), and a trigger written to a
+dead connection is simply lost. Here each trigger is its own datagram
+carrying a sequence number. The remote gate re-sends it every
+UDP_RETRY_INTERVAL until the primary acknowledges it, and the primary acks
+every copy but handles each (gate id, sequence number) only once. Clock
+offset pings (MSG_TIME_SYNC) from the primary are answered on the same socket.
+"""
+import random
+import socket
+import threading
+import time
+from . import config
+from .network import (encode_gate_trigger, encode_message, decode_datagram, DuplicateFilter,
+                      MSG_GATE_TRIGGER, MSG_TIME_SYNC, MSG_TIMING_MODE, MSG_ACK)
+from .clock_offset import time_sync_reply
+
+class UdpTriggerSender:
+    """Remote-gate side: sends triggers and retransmits them until acknowledged."""
+
+    def __init__(self, address: tuple = None, gate_id: str = 'REMOTE', on_ack=None, clock=None):
+        self.address = address or (config.PRIMARY_PI_IP, config.UDP_TRIGGER_PORT)
+        self.gate_id = gate_id
+        self.on_ack = on_ack  # Called with the sequence number once a trigger is acknowledged
+        self.clock = clock    # Returns trigger-clock ns; clock offset pings are answered when set
+        self.sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        # Random start so a restarted gate's sequence numbers aren't mistaken for duplicates
+        self._seq = random.getrandbits(31)
+        self._pending = {}  # seq -> [frame, first_sent, last_sent]
+        self._lock = threading.Lock()
+
+        # Statistics
+        self.sent = 0
+        self.retransmits = 0
+        self.acked = 0
+
+        threading.Thread(target=self._receive_acks, daemon=True).start()
+        threading.Thread(target=self._retransmit, daemon=True).start()
+
+    def send_trigger(self, timestamp, timing_mode: str = None, seq: int = None) -> int:
+        """
+        Sends a trigger; it is re-sent until acked. Returns its sequence number.
+        Pass `seq` to re-send a trigger that already has one (e.g. from an outbox).
+        """
+        with self._lock:
+            if seq is None:
+                self._seq = (self._seq + 1) & 0xFFFFFFFF
+                seq = self._seq
+            frame = encode_gate_trigger(timestamp, self.gate_id, timing_mode, seq)
+            now = time.monotonic()
+            self._pending[seq] = [frame, now, now]
+        self._send(frame)
+        self.sent += 1
+        return seq
+
+    def send_hello(self, timing_mode: str = None):
+        """Announces this gate so the primary knows where to send clock offset pings."""
+        self._send(encode_message(MSG_TIMING_MODE, {'gate_id': self.gate_id,
+                                                    'timing_mode': timing_mode or 'SYSTEM'}))
+
+    def pending_count(self) -> int:
+        return len(self._pending)
+
+    def _send(self, frame: bytes):
+        try:
+            self.sock.sendto(frame, self.address)
+        except OSError as e:
+            # Network down; the retransmit loop keeps trying
+            print(f"UDP send error: {e}")
+
+    def _retransmit(self):
+        interval = config.UDP_RETRY_INTERVAL
+        while True:
+            time.sleep(interval / 2)
+            now = time.monotonic()
+            with self._lock:
+                due = [entry for entry in self._pending.values() if now - entry[2] >= interval]
+                for entry in due:
+                    entry[2] = now
+            for frame, _, _ in due:
+                self._send(frame)
+                self.retransmits += 1
+
+    def _receive_acks(self):
+        while True:
+            try:
+                data, _ = self.sock.recvfrom(2048)
+            except OSError:
+                time.sleep(config.UDP_RETRY_INTERVAL)
+                continue
+            received_ns = self.clock() if self.clock else 0
+            for message in decode_datagram(data):
+                if message['type'] == MSG_TIME_SYNC and self.clock:
+                    if message['payload'].get('op') == 'ping':
+                        reply = time_sync_reply(message['payload'], received_ns, self.clock(), self.gate_id)
+                        self._send(encode_message(MSG_TIME_SYNC, reply))
+                    continue
+                if message['type'] != MSG_ACK:
+                    continue
+                seq = message['payload'].get('seq')
+                with self._lock:
+                    entry = self._pending.pop(seq, None)
+                if entry is not None:
+                    self.acked += 1
+                    if self.on_ack:
+                        self.on_ack(seq)
+
+class UdpTriggerReceiver:
+    """Primary side: acknowledges triggers and passes each one on exactly once."""
+
+    def __init__(self, handler, port: int = None, host: str = '0.0.0.0', on_time_sync=None):
+        self.handler = handler  # Called with (new decoded GATE_TRIGGER message, CLOCK_MONOTONIC ns at receipt)
+        self.on_time_sync = on_time_sync  # Called with (TIME_SYNC message, CLOCK_MONOTONIC ns at receipt)
+        self.peers = {}  # gate id -> address the gate was last heard from
+        self.sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self.sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        self.sock.bind((host, port if port is not None else config.UDP_TRIGGER_PORT))
+        self.port = self.sock.getsockname()[1]
+        self.dedup = DuplicateFilter()
+
+        # Statistics
+        self.received = 0
+        self.ignored = 0
+
+    def serve_forever(self):
+        print(f"UDP trigger listener started on port {self.port}")
+        while True:
+            try:
+                data, address = self.sock.recvfrom(2048)
+            except OSError as e:
+                print(f"UDP listener error: {e}")
+                continue
+            received_mono_ns = time.monotonic_ns()
+            # One bad datagram must not stop the trigger listener
+            try:
+                messages = decode_datagram(data)
+            except Exception as e:
+                print(f"UDP datagram from {address} not decoded: {e}")
+                continue
+            for message in messages:
+                try:
+                    self._handle(message, address, received_mono_ns)
+                except Exception as e:
+                    print(f"UDP message error from {address}: {e}")
+
+    def _handle(self, message: dict, address: tuple, received_mono_ns: int):
+        payload = message['payload']
+        if 'gate_id' in payload:
+            self.peers[payload['gate_id']] = address
+        if message['type'] == MSG_TIME_SYNC and self.on_time_sync:
+            self.on_time_sync(message, received_mono_ns)
+            return
+        if message['type'] != MSG_GATE_TRIGGER:
+            return
+        if 'seq' not in payload or 'gate_id' not in payload:
+            # Legacy JSON triggers carry no sequence number, so they can't be acked or deduplicated
+            self.ignored += 1
+            print(f"UDP trigger without seq/gate_id from {address} ignored")
+            return
+        # Ack every copy: the sender retransmits if an earlier ack was lost
+        try:
+            self.sock.sendto(encode_message(MSG_ACK, {'seq': payload['seq'],
+                                                      'gate_id': payload['gate_id']}), address)
+        except OSError as e:
+            print(f"UDP ack error: {e}")  # The gate re-sends and the next copy is acked
+        if self.dedup.is_duplicate(payload['gate_id'], payload['seq']):
+            return
+        self.received += 1
+        self.handler(message, received_mono_ns)
+
+    def send_to_peer(self, gate_id: str, frame: bytes):
+        """Sends a frame to a remote gate at the address it was last heard from."""
+        self.sock.sendto(frame, self.peers[gate_id])
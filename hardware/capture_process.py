@@ -0,0 +1,162 @@
+# hardware/capture_process.py
+"""
+Gate edge capture in its own small process (config.CAPTURE_PROCESS).
+
+In the main application the capture thread shares the GIL with the web
+server, the Tk UI, the LED renderer and SQLite, so a busy moment there can
+delay it. The capture process does nothing but wait for edges and push
+their CLOCK_MONOTONIC times into a shared-memory ring (common.shm_ring),
+optionally with SCHED_FIFO priority, pinned to a CPU and with its memory
+locked. CLOCK_MONOTONIC is the same clock in every process, so the main
+application converts those times to UTC (GPS/PPS model, wired or system)
+exactly as if it had captured them itself.
+
+CaptureProcess is an edge source for CdevGateSensor, like
+GpioLineEventReader, so debouncing and timestamping are unchanged.
+"""
+import atexit
+import ctypes
+import ctypes.util
+import multiprocessing
+import os
+import select
+import time
+from common import config
+from common.shm_ring import SharedRing
+from .gpio_cdev import EdgeEvent, GpioLineEventReader
+
+MCL_CURRENT = 1
+MCL_FUTURE = 2
+
+def apply_realtime(priority: int = 0, cpu: int = None, lock_memory: bool = False):
+    """Real-time settings for the calling process; each one is skipped, with a message, if not permitted."""
+    if cpu is not None:
+        try:
+            os.sched_setaffinity(0, {cpu})
+        except (OSError, ValueError) as e:
+            print(f"Capture process: CPU affinity not set ({e})")
+    if priority:
+        try:
+            os.sched_setscheduler(0, os.SCHED_FIFO, os.sched_param(priority))
+        except (OSError, AttributeError) as e:
+            print(f"Capture process: SCHED_FIFO not set ({e})")
+    if lock_memory:
+        libc = ctypes.CDLL(ctypes.util.find_library('c'), use_errno=True)
+        if libc.mlockall(MCL_CURRENT | MCL_FUTURE) != 0:
+            print(f"Capture process: mlockall failed ({os.strerror(ctypes.get_errno())})")
+
+class _RpiGpioEdges:
+    """Falling edges through RPi.GPIO, stamped when the wait returns."""
+
+    def __init__(self, pin: int):
+        from .gpio import GPIO
+        self.GPIO = GPIO
+        self.pin = pin
+        self.seqno = 0
+        GPIO.setmode(GPIO.BCM)
+        GPIO.setup(pin, GPIO.IN, pull_up_down=GPIO.PUD_UP)
+
+    def read_events(self, timeout: float = None) -> list:
+        self.GPIO.wait_for_edge(self.pin, self.GPIO.FALLING)
+        self.seqno += 1
+        return [EdgeEvent(time.monotonic_ns(), False, self.seqno)]
+
+def _open_edges(source: str, pin: int, edge_pipe):
+    if source == 'PIPE':
+        return GpioLineEventReader.from_fd(edge_pipe.fileno())
+    if source == 'CDEV':
+        return GpioLineEventReader(config.GPIO_CHIP, pin, falling=True, pull_up=True)
+    return _RpiGpioEdges(pin)
+
+def _capture_main(ring_name: str, doorbell, source: str, pin: int, edge_pipe, stamp_on_read: bool,
+                  realtime: tuple):
+    """The capture process: edges in, ring slots and a doorbell byte out."""
+    apply_realtime(*realtime)
+    ring = SharedRing.attach(ring_name)
+    edges = _open_edges(source, pin, edge_pipe)
+    doorbell_fd = doorbell.fileno()
+    while True:
+        events = edges.read_events(None)
+        now = time.monotonic_ns()
+        for edge in events:
+            ring.push(now if stamp_on_read else edge.timestamp_ns, edge.seqno, edge.rising)
+        try:
+            os.write(doorbell_fd, b'\0')
+        except BrokenPipeError:
+            return  # The main application has gone
+
+class CaptureProcess:
+    """
+    Starts and reads the capture process for one gate pin.
+
+    `source` is 'CDEV' (kernel edge timestamps), 'RPI_GPIO' (stamped on
+    wake-up in the capture process), or 'PIPE': kernel-format edges written
+    to `edge_pipe` by the simulator or a benchmark. `stamp_on_read` replaces
+    the edges' own times with the capture process's wake-up time.
+    """
+
+    def __init__(self, pin: int, source: str, edge_pipe=None, stamp_on_read: bool = False,
+                 slots: int = None, realtime: tuple = None):
+        self.pin = pin
+        self.source = source
+        self.edge_pipe = edge_pipe
+        self.stamp_on_read = stamp_on_read
+        self.realtime = realtime if realtime is not None else (
+            config.CAPTURE_SCHED_FIFO, config.CAPTURE_CPU, config.CAPTURE_MLOCKALL)
+        self.ring = SharedRing.create(slots or config.CAPTURE_RING_SLOTS)
+        self.process = None
+        self._doorbell = None
+        self._closed = False
+
+        # Statistics
+        self.restarts = 0
+
+        self._start()
+        # Before multiprocessing's own exit handler terminates the child, so it isn't restarted
+        atexit.register(self.close)
+
+    def _start(self):
+        # spawn: the child must not inherit the main application's threads and locks
+        context = multiprocessing.get_context('spawn')
+        self._doorbell, doorbell_writer = context.Pipe(duplex=False)
+        self.process = context.Process(
+            target=_capture_main, name=f'capture-{self.pin}', daemon=True,
+            args=(self.ring.name, doorbell_writer, self.source, self.pin, self.edge_pipe,
+                  self.stamp_on_read, self.realtime))
+        self.process.start()
+        doorbell_writer.close()
+
+    def read_events(self, timeout: float = None) -> list:
+        """Returns every edge pushed since the last call, waiting up to `timeout` (None = forever) for one."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            if self._closed:
+                time.sleep(1.0 if timeout is None else timeout)
+                return []
+            edges = self.ring.read()
+            if edges:
+                return [EdgeEvent(edge_ns, rising, seqno) for edge_ns, seqno, rising in edges]
+            wait = 1.0 if deadline is None else min(1.0, deadline - time.monotonic())
+            if wait <= 0:
+                return []
+            fd = self._doorbell.fileno()
+            if select.select([fd], [], [], wait)[0]:
+                try:
+                    os.read(fd, 4096)  # Drain; the ring holds the edges
+                except OSError:
+                    pass
+            if not self.process.is_alive() and not self._closed:
+                print(f"Capture process for pin {self.pin} exited ({self.process.exitcode}); restarting")
+                self.restarts += 1
+                self._doorbell.close()
+                self._start()
+
+    def close(self):
+        if self._closed:
+            return
+        self._closed = True
+        if self.process.is_alive():
+            self.process.terminate()
+        self.process.join(1)
+        self._doorbell.close()
+        self.ring.close()
@@ -1,26 +1,81 @@
 # hardware/display_driver.py
-from luma.led_matrix.device import max7219
-from luma.core.interface.serial import spi, noop
-from luma.core.render import canvas
-from luma.core.legacy import text
+import threading
+from common import config
+from .led_matrix import Max7219Chain
+
+class NullDisplay:
+    """Takes display updates until the real display has attached."""
+
+    def show_time(self, elapsed_time: float):
+        pass
+
+    def show_message(self, message: str):
+        pass
+
+    def clear(self):
+        pass
 
 class TimingDisplay:
-    def __init__(self, cs_pin: int):
+    """
+    MAX7219 LED display driven by its own worker thread.
+
+    show_time(), show_message() and clear() only leave the text in a
+    latest-value mailbox and return, so callers (the event core's 20 Hz
+    tick) never wait on SPI. The worker renders whatever is newest from
+    pre-rendered glyphs, skipping anything superseded in the meantime, and
+    the chain sends only the columns that changed.
+    """
+
+    def __init__(self, cs_pin: int, cascaded: int = None, serial=None):
         """Initializes the MAX7219 display."""
-        serial = spi(port=0, device=cs_pin, gpio=noop())
-        self.device = max7219(serial, cascaded=1, block_orientation=0)
+        if serial is None and config.HARDWARE_BACKEND == 'SIM':
+            from .sim import SimSpi
+            serial = SimSpi()
+        elif serial is None:
+            from luma.core.interface.serial import spi, noop
+            serial = spi(port=0, device=cs_pin, gpio=noop())
+        self.matrix = Max7219Chain(serial, cascaded or config.DISPLAY_CASCADED, config.DISPLAY_INTENSITY)
+        self._latest = None
+        self._fresh = threading.Condition()
+
+        # Statistics
+        self.posted = 0
+
+        threading.Thread(target=self._worker, name='display', daemon=True).start()
 
     def show_time(self, elapsed_time: float):
         """Displays the time formatted as SS.ss"""
-        time_str = f"{elapsed_time:05.2f}"
-        with canvas(self.device) as draw:
-            text(draw, (0, 0), time_str, fill="white")
+        self._post(f"{elapsed_time:05.2f}")
 
     def show_message(self, message: str):
         """Displays a short text message."""
-        with canvas(self.device) as draw:
-            text(draw, (0, 0), message, fill="white")
-            
+        self._post(message)
+
     def clear(self):
         """Clears the display."""
-        self.device.clear()
+        self._post("")
+
+    def _post(self, text: str):
+        with self._fresh:
+            self._latest = text
+            self.posted += 1
+            self._fresh.notify()
+
+    def _worker(self):
+        while True:
+            with self._fresh:
+                while self._latest is None:
+                    self._fresh.wait()
+                text, self._latest = self._latest, None
+            try:
+                self.matrix.show(text)
+            except Exception as e:
+                print(f"Display error: {e}")
+
+    def stats(self) -> dict:
+        return {
+            'posted': self.posted,
+            'frames': self.matrix.frames,
+            'frames_sent': self.matrix.frames_sent,
+            'spi_bytes': self.matrix.bytes_sent,
+        }
@@ -1,14 +1,18 @@
 # hardware/gate_sensor.py
-import RPi.GPIO as GPIO
+from .gpio import GPIO
+import os
 import time
 from common import config
+from common.metrics import GATE_EDGE_TO_TIMESTAMP
+from common.timestamp import Timestamp, from_seconds
 
 class GateSensor:
     def __init__(self, pin: int, debounce_time: float, timing_sync=None):
         """Initializes the sensor on the given GPIO pin with high-precision timing."""
         self.pin = pin
         self.debounce_time = debounce_time
-        self.last_trigger_time = 0
+        self.debounce_ns = from_seconds(debounce_time)
+        self.last_trigger_mono_ns = None
         self.timing_sync = timing_sync
         GPIO.setmode(GPIO.BCM)
         GPIO.setup(self.pin, GPIO.IN, pull_up_down=GPIO.PUD_UP)
@@ -16,20 +20,21 @@ class GateSensor:
     def wait_for_trigger(self):
         """Blocks until the sensor is triggered (beam broken) with high precision."""
         GPIO.wait_for_edge(self.pin, GPIO.FALLING)
-        current_time = self._get_precise_timestamp()
+        mono_ns = time.monotonic_ns()
         
-        # Debounce logic
-        if (current_time - self.last_trigger_time) > self.debounce_time:
-            self.last_trigger_time = current_time
-            return current_time
-        return None
+        # Debounce logic, in monotonic nanoseconds
+        if self.last_trigger_mono_ns is not None and mono_ns - self.last_trigger_mono_ns <= self.debounce_ns:
+            return None
+        self.last_trigger_mono_ns = mono_ns
+        timestamp = self._get_precise_timestamp(mono_ns)
+        GATE_EDGE_TO_TIMESTAMP.observe_ns(time.monotonic_ns() - mono_ns)
+        return timestamp
     
-    def _get_precise_timestamp(self) -> float:
+    def _get_precise_timestamp(self, mono_ns: int) -> Timestamp:
         """Get timestamp with maximum precision available."""
         if self.timing_sync:
-            return self.timing_sync.get_precise_timestamp()
-        else:
-            return time.time_ns() if config.USE_NANOSECOND_TIMING else time.time()
+            return self.timing_sync.timestamp_from_monotonic(mono_ns)
+        return Timestamp(time.time_ns() - (time.monotonic_ns() - mono_ns), mono_ns=mono_ns)
     
     def get_timing_mode(self) -> str:
         """Get current timing mode."""
@@ -40,3 +45,39 @@ class GateSensor:
     def set_timing_sync(self, timing_sync):
         """Set the timing synchronizer for high-precision timing."""
         self.timing_sync = timing_sync
+
+def create_gate_sensor(pin: int, debounce_time: float, timing_sync=None):
+    """
+    Creates the gate sensor for config.GATE_SENSOR_BACKEND: 'CDEV' (kernel
+    edge timestamps via the GPIO character device), 'RPI_GPIO', or 'AUTO'
+    (CDEV when the chip can be opened, else RPi.GPIO). With the simulated
+    hardware backend, edges come from the simulator's queue for the pin.
+    With config.CAPTURE_PROCESS, edges are captured in a separate process.
+    """
+    if config.CAPTURE_PROCESS:
+        from .gpio_cdev import CdevGateSensor
+        return CdevGateSensor(pin, debounce_time, timing_sync, edge_source=_capture_process(pin))
+    if config.HARDWARE_BACKEND == 'SIM':
+        from .gpio_cdev import CdevGateSensor
+        from .sim import gate_edges
+        return CdevGateSensor(pin, debounce_time, timing_sync, edge_source=gate_edges(pin))
+    backend = config.GATE_SENSOR_BACKEND
+    if backend in ('CDEV', 'AUTO'):
+        try:
+            from .gpio_cdev import CdevGateSensor
+            return CdevGateSensor(pin, debounce_time, timing_sync)
+        except OSError as e:
+            if backend == 'CDEV':
+                raise
+            print(f"GPIO character device unavailable ({e}), using RPi.GPIO")
+    return GateSensor(pin, debounce_time, timing_sync)
+
+def _capture_process(pin: int):
+    from .capture_process import CaptureProcess
+    if config.HARDWARE_BACKEND == 'SIM':
+        from .sim import pipe_gate_edges
+        return CaptureProcess(pin, 'PIPE', edge_pipe=pipe_gate_edges(pin))
+    backend = config.GATE_SENSOR_BACKEND
+    if backend == 'CDEV' or (backend == 'AUTO' and os.path.exists(config.GPIO_CHIP)):
+        return CaptureProcess(pin, 'CDEV')
+    return CaptureProcess(pin, 'RPI_GPIO')
@@ -0,0 +1,8 @@
+# hardware/gpio.py
+"""The GPIO module for config.HARDWARE_BACKEND: RPi.GPIO on a Pi, the simulator's otherwise."""
+from common import config
+
+if config.HARDWARE_BACKEND == 'SIM':
+    from .sim import GPIO
+else:
+    import RPi.GPIO as GPIO
@@ -0,0 +1,190 @@
+# hardware/gpio_cdev.py
+"""
+Gate sensor backend on the Linux GPIO character device (uAPI v2).
+
+The kernel timestamps each edge in its interrupt handler and queues it in a
+per-line event buffer, so the recorded time no longer includes the wake-up
+and scheduling latency of the thread that reads it, and a burst of edges
+queues up instead of being lost while that thread is busy.
+"""
+import fcntl
+import os
+import select
+import struct
+import threading
+import time
+from collections import deque
+from common import config
+from common.metrics import GATE_EDGE_TO_TIMESTAMP
+from common.timestamp import Timestamp, from_seconds
+
+# --- linux/gpio.h (v2 uAPI) ---
+GPIO_V2_LINES_MAX = 64
+GPIO_V2_LINE_NUM_ATTRS_MAX = 10
+
+GPIO_V2_LINE_FLAG_INPUT = 1 << 2
+GPIO_V2_LINE_FLAG_EDGE_RISING = 1 << 4
+GPIO_V2_LINE_FLAG_EDGE_FALLING = 1 << 5
+GPIO_V2_LINE_FLAG_BIAS_PULL_UP = 1 << 8
+GPIO_V2_LINE_FLAG_BIAS_PULL_DOWN = 1 << 9
+
+GPIO_V2_LINE_ATTR_ID_DEBOUNCE = 3
+
+GPIO_V2_LINE_EVENT_RISING_EDGE = 1
+GPIO_V2_LINE_EVENT_FALLING_EDGE = 2
+
+# struct gpio_v2_line_request: offsets[64], consumer[32], config
+# {flags, num_attrs, padding[5], attrs[10] {id, padding, value, mask}},
+# num_lines, event_buffer_size, padding[5], fd
+_LINE_REQUEST = struct.Struct('=64I32sQI5I' + 'IIQQ' * GPIO_V2_LINE_NUM_ATTRS_MAX + 'II5Ii')
+_LINE_REQUEST_FD_OFFSET = _LINE_REQUEST.size - 4
+# struct gpio_v2_line_event: timestamp_ns, id, offset, seqno, line_seqno, padding[6]
+_LINE_EVENT = struct.Struct('=QIIII24x')
+
+def _iowr(type_, nr, size):
+    return (3 << 30) | (size << 16) | (type_ << 8) | nr
+
+GPIO_V2_GET_LINE_IOCTL = _iowr(0xB4, 0x07, _LINE_REQUEST.size)
+
+class EdgeEvent:
+    """One edge as delivered by the kernel (timestamp on CLOCK_MONOTONIC)."""
+    __slots__ = ('timestamp_ns', 'rising', 'seqno')
+
+    def __init__(self, timestamp_ns: int, rising: bool, seqno: int):
+        self.timestamp_ns = timestamp_ns
+        self.rising = rising
+        self.seqno = seqno
+
+class GpioLineEventReader:
+    """Requests one input line with edge detection and reads its kernel events."""
+
+    def __init__(self, chip_path: str, offset: int, falling: bool = True, rising: bool = False,
+                 pull_up: bool = True, debounce_us: int = 0, buffer_size: int = None):
+        flags = GPIO_V2_LINE_FLAG_INPUT
+        flags |= GPIO_V2_LINE_FLAG_BIAS_PULL_UP if pull_up else GPIO_V2_LINE_FLAG_BIAS_PULL_DOWN
+        if falling:
+            flags |= GPIO_V2_LINE_FLAG_EDGE_FALLING
+        if rising:
+            flags |= GPIO_V2_LINE_FLAG_EDGE_RISING
+
+        attrs = [0, 0, 0, 0] * GPIO_V2_LINE_NUM_ATTRS_MAX
+        num_attrs = 0
+        if debounce_us:
+            # The debounce period travels in the attribute's 64-bit union
+            attrs[0:4] = [GPIO_V2_LINE_ATTR_ID_DEBOUNCE, 0, debounce_us, 1]
+            num_attrs = 1
+
+        offsets = [offset] + [0] * (GPIO_V2_LINES_MAX - 1)
+        request = bytearray(_LINE_REQUEST.pack(
+            *offsets, b'sprint_timer', flags, num_attrs, *([0] * 5), *attrs,
+            1, buffer_size or config.GPIO_EVENT_BUFFER, *([0] * 5), -1))
+
+        chip_fd = os.open(chip_path, os.O_RDWR | os.O_CLOEXEC)
+        try:
+            fcntl.ioctl(chip_fd, GPIO_V2_GET_LINE_IOCTL, request, True)
+        finally:
+            os.close(chip_fd)
+        self.fd = struct.unpack_from('=i', request, _LINE_REQUEST_FD_OFFSET)[0]
+
+    @classmethod
+    def from_fd(cls, fd: int) -> 'GpioLineEventReader':
+        """Reads line events from an already open descriptor (for example a pipe fed by encode_line_event())."""
+        reader = cls.__new__(cls)
+        reader.fd = fd
+        return reader
+
+    def read_events(self, timeout: float = None) -> list:
+        """Returns every queued edge, waiting up to `timeout` (None = forever) for one."""
+        readable, _, _ = select.select([self.fd], [], [], timeout)
+        if not readable:
+            return []
+        # One read drains as many queued events as fit in the buffer
+        data = os.read(self.fd, _LINE_EVENT.size * config.GPIO_EVENT_BUFFER)
+        events = []
+        for i in range(0, len(data) - _LINE_EVENT.size + 1, _LINE_EVENT.size):
+            timestamp_ns, event_id, _, _, line_seqno = _LINE_EVENT.unpack_from(data, i)
+            events.append(EdgeEvent(timestamp_ns, event_id == GPIO_V2_LINE_EVENT_RISING_EDGE, line_seqno))
+        return events
+
+    def close(self):
+        os.close(self.fd)
+
+def encode_line_event(timestamp_ns: int, rising: bool = False, seqno: int = 0) -> bytes:
+    """One edge in the kernel's struct gpio_v2_line_event layout."""
+    event_id = GPIO_V2_LINE_EVENT_RISING_EDGE if rising else GPIO_V2_LINE_EVENT_FALLING_EDGE
+    return _LINE_EVENT.pack(timestamp_ns, event_id, 0, seqno, seqno)
+
+class SyntheticEdgeSource:
+    """
+    Test double for GpioLineEventReader: edges are injected from code (for
+    example a test or simulator thread) and read back with the same interface.
+    """
+
+    def __init__(self):
+        self._events = deque()
+        self._available = threading.Condition()
+        self._seqno = 0
+
+    def inject(self, timestamp_ns: int = None, rising: bool = False):
+        """Queues an edge; defaults to 'now' on CLOCK_MONOTONIC."""
+        with self._available:
+            self._seqno += 1
+            self._events.append(EdgeEvent(timestamp_ns if timestamp_ns is not None else time.monotonic_ns(),
+                                          rising, self._seqno))
+            self._available.notify_all()
+
+    def read_events(self, timeout: float = None) -> list:
+        with self._available:
+            self._available.wait_for(lambda: self._events, timeout)
+            events = list(self._events)
+            self._events.clear()
+            return events
+
+    def close(self):
+        pass
+
+class CdevGateSensor:
+    """Gate sensor using kernel edge timestamps; same interface as GateSensor."""
+
+    def __init__(self, pin: int, debounce_time: float, timing_sync=None, edge_source=None):
+        self.pin = pin
+        self.debounce_time = debounce_time
+        self.debounce_ns = from_seconds(debounce_time)
+        self.timing_sync = timing_sync
+        self.edge_source = edge_source or GpioLineEventReader(config.GPIO_CHIP, pin, falling=True, pull_up=True)
+        self._pending = deque()
+        self._last_edge_ns = None
+
+    def wait_for_trigger(self):
+        """Blocks until the beam is broken; returns the edge's timestamp, or None if debounced."""
+        while not self._pending:
+            self._pending.extend(self.edge_source.read_events(None))
+        edge = self._pending.popleft()
+
+        # Debounce on the kernel's monotonic timestamps, in nanoseconds
+        if (self._last_edge_ns is not None
+                and edge.timestamp_ns - self._last_edge_ns <= self.debounce_ns):
+            return None
+        self._last_edge_ns = edge.timestamp_ns
+        timestamp = self._timestamp_from_edge(edge.timestamp_ns)
+        GATE_EDGE_TO_TIMESTAMP.observe_ns(time.monotonic_ns() - edge.timestamp_ns)
+        return timestamp
+
+    def _timestamp_from_edge(self, mono_ns: int) -> Timestamp:
+        """Converts the kernel's CLOCK_MONOTONIC edge time to a Timestamp."""
+        if self.timing_sync:
+            return self.timing_sync.timestamp_from_monotonic(mono_ns)
+        return Timestamp(time.time_ns() - (time.monotonic_ns() - mono_ns), mono_ns=mono_ns)
+
+    def get_timing_mode(self) -> str:
+        """Get current timing mode."""
+        if self.timing_sync:
+            return self.timing_sync.get_current_mode()
+        return 'SYSTEM'
+
+    def set_timing_sync(self, timing_sync):
+        """Set the timing synchronizer for high-precision timing."""
+        self.timing_sync = timing_sync
+
+    def cleanup(self):
+        self.edge_source.close()
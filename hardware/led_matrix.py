@@ -0,0 +1,139 @@
+# hardware/led_matrix.py
+"""
+Register-level driver for a chain of cascaded MAX7219 8x8 LED modules.
+
+Text is drawn from pre-rendered glyphs (column bytes, bit 0 = top row) into a
+frame of 8 columns per module. The layout matches luma's max7219 device with
+block_orientation=0: digit register d of a module holds its column d, and the
+module nearest the Pi is the leftmost. Only digit registers whose columns
+changed since the last frame are sent, so an unchanged frame costs no SPI
+traffic and a ticking clock resends only the columns that moved.
+"""
+
+# MAX7219 registers
+REG_NOOP = 0x00
+REG_DIGIT0 = 0x01
+REG_DECODE_MODE = 0x09
+REG_INTENSITY = 0x0A
+REG_SCAN_LIMIT = 0x0B
+REG_SHUTDOWN = 0x0C
+REG_DISPLAY_TEST = 0x0F
+
+# 5x7 glyphs as column bytes, bit 0 = top row
+FONT = {
+    ' ': (0x00, 0x00, 0x00),
+    '.': (0x60, 0x60),
+    ':': (0x36, 0x36),
+    '-': (0x08, 0x08, 0x08, 0x08),
+    '0': (0x3E, 0x51, 0x49, 0x45, 0x3E),
+    '1': (0x00, 0x42, 0x7F, 0x40, 0x00),
+    '2': (0x42, 0x61, 0x51, 0x49, 0x46),
+    '3': (0x21, 0x41, 0x45, 0x4B, 0x31),
+    '4': (0x18, 0x14, 0x12, 0x7F, 0x10),
+    '5': (0x27, 0x45, 0x45, 0x45, 0x39),
+    '6': (0x3C, 0x4A, 0x49, 0x49, 0x30),
+    '7': (0x01, 0x71, 0x09, 0x05, 0x03),
+    '8': (0x36, 0x49, 0x49, 0x49, 0x36),
+    '9': (0x06, 0x49, 0x49, 0x29, 0x1E),
+    'A': (0x7E, 0x11, 0x11, 0x11, 0x7E),
+    'B': (0x7F, 0x49, 0x49, 0x49, 0x36),
+    'C': (0x3E, 0x41, 0x41, 0x41, 0x22),
+    'D': (0x7F, 0x41, 0x41, 0x22, 0x1C),
+    'E': (0x7F, 0x49, 0x49, 0x49, 0x41),
+    'F': (0x7F, 0x09, 0x09, 0x09, 0x01),
+    'G': (0x3E, 0x41, 0x49, 0x49, 0x7A),
+    'H': (0x7F, 0x08, 0x08, 0x08, 0x7F),
+    'I': (0x41, 0x7F, 0x41),
+    'J': (0x20, 0x40, 0x41, 0x3F, 0x01),
+    'K': (0x7F, 0x08, 0x14, 0x22, 0x41),
+    'L': (0x7F, 0x40, 0x40, 0x40, 0x40),
+    'M': (0x7F, 0x02, 0x0C, 0x02, 0x7F),
+    'N': (0x7F, 0x04, 0x08, 0x10, 0x7F),
+    'O': (0x3E, 0x41, 0x41, 0x41, 0x3E),
+    'P': (0x7F, 0x09, 0x09, 0x09, 0x06),
+    'Q': (0x3E, 0x41, 0x51, 0x21, 0x5E),
+    'R': (0x7F, 0x09, 0x19, 0x29, 0x46),
+    'S': (0x46, 0x49, 0x49, 0x49, 0x31),
+    'T': (0x01, 0x01, 0x7F, 0x01, 0x01),
+    'U': (0x3F, 0x40, 0x40, 0x40, 0x3F),
+    'V': (0x1F, 0x20, 0x40, 0x20, 0x1F),
+    'W': (0x3F, 0x40, 0x38, 0x40, 0x3F),
+    'X': (0x63, 0x14, 0x08, 0x14, 0x63),
+    'Y': (0x07, 0x08, 0x70, 0x08, 0x07),
+    'Z': (0x61, 0x51, 0x49, 0x45, 0x43),
+}
+
+# Glyphs with their one-column gap appended, ready to concatenate
+GLYPHS = {char: bytes(columns) + b'\x00' for char, columns in FONT.items()}
+
+class Max7219Chain:
+    """
+    Cascaded MAX7219 modules behind one chip select.
+
+    `serial` is anything with a data(list_of_bytes) method that writes one
+    chip-select transaction: luma's spi interface on the Pi, or a stand-in
+    that counts bytes.
+    """
+
+    def __init__(self, serial, cascaded: int = 1, intensity: int = 4):
+        self.serial = serial
+        self.cascaded = cascaded
+        self.width = 8 * cascaded
+        self._frame = None  # Columns currently on the modules (None: unknown)
+        self._text_cache = {}
+
+        # Statistics
+        self.frames = 0       # Frames shown
+        self.frames_sent = 0  # Frames that needed any SPI traffic
+        self.bytes_sent = 0
+
+        self._write_all(REG_SCAN_LIMIT, 7)
+        self._write_all(REG_DECODE_MODE, 0)
+        self._write_all(REG_DISPLAY_TEST, 0)
+        self.set_intensity(intensity)
+        self._write_all(REG_SHUTDOWN, 1)
+        self.show_frame(bytes(self.width), full=True)
+
+    def set_intensity(self, level: int):
+        """Brightness, 0-15."""
+        self._write_all(REG_INTENSITY, max(0, min(15, level)))
+
+    def render(self, text: str) -> bytes:
+        """Text as a frame of column bytes, left-aligned and clipped to the chain's width."""
+        frame = self._text_cache.get(text)
+        if frame is None:
+            columns = b''.join(GLYPHS.get(char, GLYPHS[' ']) for char in text.upper())
+            frame = columns[:self.width].ljust(self.width, b'\x00')
+            if len(self._text_cache) > 256:
+                self._text_cache.clear()
+            self._text_cache[text] = frame
+        return frame
+
+    def show(self, text: str):
+        self.show_frame(self.render(text))
+
+    def show_frame(self, frame: bytes, full: bool = False):
+        """Writes the digit registers whose columns differ from what is displayed (all of them if full)."""
+        previous = self._frame
+        self.frames += 1
+        sent = False
+        for digit in range(8):
+            columns = frame[digit::8]  # This digit's column on each module, left to right
+            if not full and previous is not None and previous[digit::8] == columns:
+                continue
+            # The first pair shifted in ends up in the farthest (rightmost) module
+            packet = []
+            for column in reversed(columns):
+                packet += (REG_DIGIT0 + digit, column)
+            self._send(packet)
+            sent = True
+        self._frame = frame
+        if sent:
+            self.frames_sent += 1
+
+    def _write_all(self, register: int, value: int):
+        self._send([register, value] * self.cascaded)
+
+    def _send(self, packet):
+        self.serial.data(packet)
+        self.bytes_sent += len(packet)
@@ -0,0 +1,145 @@
+# hardware/self_test.py
+"""
+Timing self-test: certifies the local gate's timestamp path before a meet.
+
+A jumper from SELF_TEST_OUTPUT_PIN to the gate pin stands in for the beam.
+The test pulls the output low at a fixed rate, and each falling edge goes
+through the real gate sensor and timing synchronizer while the rest of the
+system (web server, touchscreen, LED display) keeps running. For every
+pulse it records:
+
+  - edge:    output pulled low -> edge time recorded by the sensor
+  - convert: edge time -> Timestamp handed back to the caller
+  - error:   the Timestamp's spacing from the first pulse minus the
+             commanded spacing; its spread is the jitter a runner's time
+             would see
+"""
+import statistics
+import threading
+import time
+from common import config
+from common.timestamp import NS_PER_SECOND, to_seconds
+from .gpio import GPIO
+
+class TimingSelfTest:
+    """Pulses a looped-back output into a gate sensor and reports capture latency and jitter."""
+
+    def __init__(self, sensor, output_pin: int = None):
+        self.sensor = sensor
+        self.output_pin = output_pin if output_pin is not None else config.SELF_TEST_OUTPUT_PIN
+        self._lock = threading.Lock()
+        self._fired = []     # CLOCK_MONOTONIC ns at which each pulse was pulled low
+        self._captures = {}  # pulse index -> (Timestamp, CLOCK_MONOTONIC ns when it was returned)
+        self.unexpected = 0  # Triggers with no pulse outstanding
+        self.running = False
+        self.started_mono_ns = None
+        self.last_report = {}
+
+    def start(self, pulses: int = None, rate_hz: float = None, timing_mode: str = None) -> bool:
+        """Starts a test on its own thread; returns False if one is already running."""
+        with self._lock:
+            if self.running:
+                return False
+            self.running = True
+            self._fired = []
+            self._captures = {}
+            self.unexpected = 0
+            self.started_mono_ns = time.monotonic_ns()
+        pulses = pulses or config.SELF_TEST_PULSES
+        rate_hz = rate_hz or config.SELF_TEST_RATE_HZ
+        self.last_report = {'status': 'running', 'pulses': pulses, 'rate_hz': rate_hz}
+        threading.Thread(target=self._run, args=(pulses, rate_hz, timing_mode),
+                         name='self-test', daemon=True).start()
+        return True
+
+    def elapsed(self) -> float:
+        return to_seconds(time.monotonic_ns() - self.started_mono_ns) if self.running else 0.0
+
+    def capture(self, timestamp):
+        """Called with each trigger from the gate sensor while the test runs."""
+        returned_ns = time.monotonic_ns()
+        with self._lock:
+            index = len(self._fired) - 1
+            if index < 0 or index in self._captures:
+                self.unexpected += 1
+                return
+            self._captures[index] = (timestamp, returned_ns)
+
+    def _run(self, pulses: int, rate_hz: float, timing_mode: str):
+        period_ns = int(NS_PER_SECOND / rate_hz)
+        width = min(config.SELF_TEST_PULSE_WIDTH, period_ns / NS_PER_SECOND / 2)
+        # A driven output doesn't bounce; the beam debounce would swallow most pulses
+        debounce_ns = self.sensor.debounce_ns
+        self.sensor.debounce_ns = min(debounce_ns, period_ns // 2)
+        if config.HARDWARE_BACKEND == 'SIM':
+            GPIO.connect(self.output_pin, self.sensor.pin)  # The jumper
+        try:
+            GPIO.setup(self.output_pin, GPIO.OUT, initial=GPIO.HIGH)
+            GPIO.output(self.output_pin, GPIO.HIGH)
+            next_ns = time.monotonic_ns() + period_ns
+            for _ in range(pulses):
+                delay = next_ns - time.monotonic_ns()
+                if delay > 0:
+                    time.sleep(delay / NS_PER_SECOND)
+                with self._lock:
+                    self._fired.append(time.monotonic_ns())
+                GPIO.output(self.output_pin, GPIO.LOW)
+                time.sleep(width)
+                GPIO.output(self.output_pin, GPIO.HIGH)
+                next_ns += period_ns
+            # Let the last capture arrive
+            time.sleep(min(0.5, period_ns / NS_PER_SECOND))
+        except Exception as e:
+            print(f"Self-test error: {e}")
+        finally:
+            GPIO.output(self.output_pin, GPIO.LOW)
+            if config.HARDWARE_BACKEND == 'SIM':
+                GPIO.disconnect(self.output_pin, self.sensor.pin)
+            self.sensor.debounce_ns = debounce_ns
+            self.last_report = self._report(pulses, rate_hz, timing_mode)
+            self.running = False
+            print(f"Self-test finished: {self.last_report.get('captured')}/{pulses} captured, "
+                  f"jitter {self.last_report.get('error_us', {}).get('stdev')} us")
+
+    def _report(self, pulses: int, rate_hz: float, timing_mode: str) -> dict:
+        with self._lock:
+            fired = list(self._fired)
+            captures = dict(self._captures)
+            unexpected = self.unexpected
+        edge, convert, error = [], [], []
+        first = None
+        for index, fired_ns in enumerate(fired):
+            if index not in captures:
+                continue
+            timestamp, returned_ns = captures[index]
+            edge_ns = timestamp.mono_ns if timestamp.mono_ns is not None else returned_ns
+            edge.append(edge_ns - fired_ns)
+            convert.append(returned_ns - edge_ns)
+            if first is None:
+                first = (fired_ns, timestamp.ns)
+            error.append((timestamp.ns - first[1]) - (fired_ns - first[0]))
+        report = {
+            'status': 'finished',
+            'timing_mode': timing_mode,
+            'pulses': pulses,
+            'rate_hz': rate_hz,
+            'captured': len(edge),
+            'missed': len(fired) - len(edge),
+            'unexpected': unexpected,
+            'edge_us': _distribution(edge),
+            'convert_us': _distribution(convert),
+            'error_us': _distribution(error),
+        }
+        if len(error) > 1:
+            report['error_us']['stdev'] = round(statistics.pstdev(error) / 1000, 2)
+            report['error_us']['peak_to_peak'] = round((max(error) - min(error)) / 1000, 2)
+        return report
+
+def _distribution(values_ns: list) -> dict:
+    """min/p50/p99/max in microseconds."""
+    if not values_ns:
+        return {}
+    values = sorted(values_ns)
+    pick = lambda fraction: values[min(len(values) - 1, int(len(values) * fraction))]
+    return {name: round(value / 1000, 2) for name, value in
+            (('min', values[0]), ('p50', pick(0.5)), ('p99', pick(0.99)), ('max', values[-1]))}
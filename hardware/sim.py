@@ -0,0 +1,251 @@
+# hardware/sim.py
+"""
+Simulated hardware, selected with config.HARDWARE_BACKEND = 'SIM'.
+
+Lets the primary and remote gate run (and be benchmarked) on any machine:
+  - GPIO: an in-process stand-in for RPi.GPIO. Pins keep a level; output()
+    on a pin also drives the pins wired to it (by default the wired sync
+    cable, WIRED_MASTER_OUTPUT_PIN -> WIRED_SLAVE_INPUT_PIN), firing edge
+    callbacks and waking wait_for_edge().
+  - Gate sensors: falling edges on a gate pin are queued, with their
+    CLOCK_MONOTONIC time, in that pin's SyntheticEdgeSource, as the kernel
+    does for the GPIO character device (see gate_edges()). With
+    CAPTURE_PROCESS they go down a pipe to the capture process instead.
+  - SPI: SimSpi accepts the LED display's register writes and counts them.
+  - GPS: SimGpsd serves gpsd's JSON protocol with a steady 3D fix, and a PPS
+    thread pulses GPS_PPS_PIN at the top of every system-clock second.
+
+Everything runs in one process, so a primary and a remote gate started side
+by side share the same pins, clock and gpsd.
+"""
+import json
+import multiprocessing
+import os
+import socket
+import threading
+import time
+from common import config
+from .gpio_cdev import SyntheticEdgeSource, encode_line_event
+
+class SimGPIO:
+    """The subset of RPi.GPIO this project uses, plus drive() and connect() for the simulation."""
+
+    BCM = 11
+    BOARD = 10
+    OUT = 0
+    IN = 1
+    LOW = 0
+    HIGH = 1
+    PUD_OFF = 20
+    PUD_DOWN = 21
+    PUD_UP = 22
+    RISING = 31
+    FALLING = 32
+    BOTH = 33
+
+    def __init__(self):
+        self._levels = {}
+        self._callbacks = {}  # pin -> [(edge, callback)]
+        self._wiring = {}     # output pin -> [input pins]
+        self._changed = threading.Condition()
+        self._edges = {}      # pin -> SyntheticEdgeSource (gate sensors)
+
+    # --- RPi.GPIO interface ---
+    def setmode(self, mode):
+        pass
+
+    def setwarnings(self, flag):
+        pass
+
+    def setup(self, pin, direction, pull_up_down=None, initial=None):
+        with self._changed:
+            if initial is not None:
+                self._levels[pin] = initial
+            elif pin not in self._levels:
+                self._levels[pin] = self.HIGH if pull_up_down == self.PUD_UP else self.LOW
+
+    def input(self, pin) -> int:
+        return self._levels.get(pin, self.LOW)
+
+    def output(self, pin, value):
+        self.drive(pin, value)
+
+    def add_event_detect(self, pin, edge, callback=None, bouncetime=None):
+        with self._changed:
+            self._callbacks.setdefault(pin, []).append((edge, callback))
+
+    def add_event_callback(self, pin, callback):
+        self.add_event_detect(pin, self.BOTH, callback)
+
+    def remove_event_detect(self, pin):
+        with self._changed:
+            self._callbacks.pop(pin, None)
+
+    def wait_for_edge(self, pin, edge, timeout=None):
+        """Blocks until `pin` sees `edge`; returns the pin, or None after `timeout` ms."""
+        with self._changed:
+            start = self._levels.get(pin, self.LOW)
+            wanted = {self.RISING: (self.HIGH,), self.FALLING: (self.LOW,)}.get(edge, (self.LOW, self.HIGH))
+
+            def changed():
+                level = self._levels.get(pin, self.LOW)
+                return level != start and level in wanted
+            if self._changed.wait_for(changed, timeout / 1000 if timeout else None):
+                return pin
+            return None
+
+    def cleanup(self, pin=None):
+        pass
+
+    # --- Simulation ---
+    def connect(self, output_pin: int, input_pin: int):
+        """Wires an output pin to an input pin (on either simulated Pi)."""
+        with self._changed:
+            self._wiring.setdefault(output_pin, []).append(input_pin)
+
+    def disconnect(self, output_pin: int, input_pin: int):
+        with self._changed:
+            if input_pin in self._wiring.get(output_pin, ()):
+                self._wiring[output_pin].remove(input_pin)
+
+    def drive(self, pin: int, level: int):
+        """Sets a pin's level from outside (a beam, a PPS pulse) and propagates it along the wiring."""
+        mono_ns = time.monotonic_ns()
+        for target in [pin] + self._wiring.get(pin, []):
+            self._set_level(target, level, mono_ns)
+
+    def pulse(self, pin: int, width: float = 0.001):
+        """Drives a pin high for `width` seconds."""
+        self.drive(pin, self.HIGH)
+        time.sleep(width)
+        self.drive(pin, self.LOW)
+
+    def _set_level(self, pin: int, level: int, mono_ns: int):
+        with self._changed:
+            previous = self._levels.get(pin, self.LOW)
+            self._levels[pin] = level
+            if previous == level:
+                return
+            self._changed.notify_all()
+            callbacks = list(self._callbacks.get(pin, ()))
+            source = self._edges.get(pin)
+        edge = self.RISING if level == self.HIGH else self.FALLING
+        if source is not None and edge == self.FALLING:
+            source.inject(mono_ns)
+        for wanted, callback in callbacks:
+            if callback and wanted in (edge, self.BOTH):
+                callback(pin)
+
+    def route_edges(self, pin: int, sink):
+        """Sends the edges of a gate pin to `sink` (anything with inject()) instead of a SyntheticEdgeSource."""
+        with self._changed:
+            self._edges[pin] = sink
+            self._levels.setdefault(pin, self.HIGH)
+
+    def gate_edges(self, pin: int):
+        """Where edges on gate pin `pin` go: a SyntheticEdgeSource, unless routed elsewhere."""
+        with self._changed:
+            source = self._edges.get(pin)
+            if source is None:
+                source = self._edges[pin] = SyntheticEdgeSource()
+                self._levels.setdefault(pin, self.HIGH)  # Pulled up until the beam breaks
+            return source
+
+GPIO = SimGPIO()
+GPIO.connect(config.WIRED_MASTER_OUTPUT_PIN, config.WIRED_SLAVE_INPUT_PIN)
+
+def gate_edges(pin: int):
+    return GPIO.gate_edges(pin)
+
+class PipeEdgeWriter:
+    """Writes a gate pin's edges, in the kernel's line event format, to a capture process's pipe."""
+
+    def __init__(self, connection):
+        self.connection = connection  # Keeps the descriptor open
+        self.fd = connection.fileno()
+        self._seqno = 0
+
+    def inject(self, timestamp_ns: int = None, rising: bool = False):
+        self._seqno += 1
+        os.write(self.fd, encode_line_event(timestamp_ns if timestamp_ns is not None else time.monotonic_ns(),
+                                            rising, self._seqno))
+
+def pipe_gate_edges(pin: int):
+    """Routes a gate pin's edges into a new pipe; returns its read end, for a capture process."""
+    reader, writer = multiprocessing.get_context('spawn').Pipe(duplex=False)
+    GPIO.route_edges(pin, PipeEdgeWriter(writer))
+    return reader
+
+def break_beam(pin: int):
+    """One beam break on a gate pin: a falling edge, then the beam is restored."""
+    GPIO.drive(pin, GPIO.LOW)
+    GPIO.drive(pin, GPIO.HIGH)
+
+class SimSpi:
+    """Stands in for luma's SPI interface: takes data() transactions and counts them."""
+
+    def __init__(self):
+        self.bytes = 0
+        self.transactions = 0
+        self.last_packet = None
+
+    def data(self, packet):
+        self.bytes += len(packet)
+        self.transactions += 1
+        self.last_packet = packet
+
+class SimGpsd:
+    """Serves gpsd's JSON watch stream on config.GPSD_HOST:GPSD_PORT with a steady 3D fix."""
+
+    def __init__(self, satellites: int = 9):
+        self.satellites = satellites
+        self.clients = 0
+
+    def start(self) -> bool:
+        try:
+            server = socket.create_server((config.GPSD_HOST, config.GPSD_PORT))
+        except OSError as e:
+            print(f"Simulated gpsd not started ({e})")
+            return False
+        threading.Thread(target=self._accept, args=(server,), daemon=True).start()
+        return True
+
+    def _accept(self, server):
+        while True:
+            conn, _ = server.accept()
+            self.clients += 1
+            threading.Thread(target=self._serve, args=(conn,), daemon=True).start()
+
+    def _serve(self, conn):
+        with conn:
+            try:
+                conn.recv(1024)  # ?WATCH=...
+                conn.sendall(b'{"class":"VERSION","release":"sim"}\n')
+                while True:
+                    now = time.strftime('%Y-%m-%dT%H:%M:%S.000Z', time.gmtime())
+                    conn.sendall((json.dumps({'class': 'TPV', 'mode': 3, 'time': now}) + '\n'
+                                  + json.dumps({'class': 'SKY', 'uSat': self.satellites}) + '\n').encode('ascii'))
+                    time.sleep(1)
+            except OSError:
+                pass
+
+def _pps_loop():
+    """Pulses GPS_PPS_PIN at the start of every second of the system clock."""
+    while True:
+        now_ns = time.time_ns()
+        time.sleep((1_000_000_000 - now_ns % 1_000_000_000) / 1e9)
+        GPIO.pulse(config.GPS_PPS_PIN, 0.1)
+
+_started = False
+_start_lock = threading.Lock()
+
+def start_simulator():
+    """Starts the simulated gpsd and PPS source (once per process)."""
+    global _started
+    with _start_lock:
+        if _started:
+            return
+        _started = True
+    SimGpsd().start()
+    threading.Thread(target=_pps_loop, name='sim-pps', daemon=True).start()
+    print("Hardware simulator running")
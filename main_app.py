@@ -1,48 +1,152 @@
 # main_app.py
+import asyncio
+import sys
 import time
-import socket
 import threading
-from ui.app_ui import SprintTimerUI
-from hardware.gate_sensor import GateSensor
-from hardware.display_driver import TimingDisplay
+from ui.headless import HeadlessUI
+from hardware.gate_sensor import create_gate_sensor
+from hardware.display_driver import NullDisplay
+from hardware.self_test import TimingSelfTest
 from common import config, database
 from common.timing_sync import TimingSynchronizer
-from common.network import parse_message, MSG_GATE_TRIGGER, MSG_TIME_SYNC
-from web import server
-
-# Application states
-STATE_IDLE = 'IDLE'
-STATE_ARMED = 'ARMED' # Ready for a run
-STATE_RUNNING = 'RUNNING'
-STATE_FINISHED = 'FINISHED'
+from common.live_state import LiveState
+from common.metrics import NETWORK_RECEIVE_TO_HANDLE
+from common.result_writer import ResultWriter
+from common.udp_link import UdpTriggerReceiver
+from common.clock_offset import NetworkClockOffset
+from common.timestamp import Timestamp, to_seconds, CLOCK_SYSTEM, CLOCK_GPS, CLOCK_NETWORK
+from common.timing_engine import (Course, TimingEngine, EVENT_START, EVENT_SPLIT, EVENT_FINISH,
+                                  STATE_IDLE, STATE_FINISHED)
+from common.event_core import (EventCore, EVENT_GATE_TRIGGER, EVENT_REMOTE_TRIGGER, EVENT_ARM, EVENT_RESET,
+                               EVENT_MODE_CHANGE, EVENT_TIME_SYNC, EVENT_UI_TICK, EVENT_STATUS_POLL,
+                               EVENT_SELF_TEST)
+from common.network import (MessageDecoder, DuplicateFilter, encode_message, to_ns,
+                            MSG_GATE_TRIGGER, MSG_TIME_SYNC, MSG_ACK)
 
 class MainApplication:
-    def __init__(self):
+    """
+    The primary Pi. Application state is owned by the event core: the Tk
+    UI, the local gate thread and the UDP listener post events to it, and
+    the TCP listener runs on its loop, so state is only ever touched from
+    the core's thread.
+
+    Startup brings up the gate path first (gate sensor, event core, network
+    listeners); the LED display, the web server and the Tk UI attach after,
+    and their libraries are only imported then. Until they do, updates go
+    to stand-ins. In headless mode there is no Tk UI at all.
+    """
+
+    def __init__(self, ui_factory=None, headless: bool = None):
+        self.started_mono_ns = time.monotonic_ns()
+        self.headless = config.HEADLESS if headless is None else headless
+
         # App state
-        self.state = STATE_IDLE
-        self.current_runner = None # (id, name)
-        self.start_time = 0
-        self.finish_time = 0
+        self.current_runner = None # (id, name) last armed from the UI
         self.timing_mode = 'SYSTEM'
-        
+        self.engine = TimingEngine(Course.from_config(), self.on_timing_event)
+
         # Shared data for the web server
-        self.shared_web_data = {
+        self.shared_web_data = LiveState({
             'current_runner': 'N/A',
             'elapsed_time': '0.00',
             'last_run': {'name': 'N/A', 'time': 0.0},
+            'lanes': self.engine.snapshot(),
             'timing_mode': 'SYSTEM',
             'gps_status': 'UNKNOWN'
-        }
+        }, tick_keys=('elapsed_time',))
+
+        if config.HARDWARE_BACKEND == 'SIM':
+            from hardware.sim import start_simulator
+            start_simulator()
 
         # Initialize timing synchronizer (master mode)
         self.timing_sync = TimingSynchronizer(is_master=True)
-        
+
         # Initialize components
         database.initialize_db()
-        self.local_gate = GateSensor(config.PRIMARY_GATE_PIN, config.DEBOUNCE_TIME, self.timing_sync)
-        self.display = TimingDisplay(config.PRIMARY_DISPLAY_CS_PIN)
-        
-        # UI setup
+        self.result_writer = ResultWriter()
+        self.result_writer.start()
+        self.local_gate = create_gate_sensor(config.PRIMARY_GATE_PIN, config.DEBOUNCE_TIME, self.timing_sync)
+        self.self_test = TimingSelfTest(self.local_gate)
+        self.display = NullDisplay()  # Until the LED display attaches
+        self.ui = HeadlessUI()        # Until the Tk UI attaches, or for good when headless
+        self.web_workers = []         # Web worker processes, when WEB_WORKERS is set
+
+        # Remote gates
+        self.remote_dedup = DuplicateFilter()  # Remote gates replay their outbox after reconnecting
+        self.clock_offsets = {}  # gate id -> NetworkClockOffset
+        self.remote_links = {}   # gate id -> function sending a frame over that gate's TCP connection
+
+        # Event core: every state transition is handled on its loop
+        self.core = EventCore()
+        self.core.on(EVENT_GATE_TRIGGER, self.handle_gate_trigger)
+        self.core.on(EVENT_REMOTE_TRIGGER, self.handle_remote_trigger)
+        self.core.on(EVENT_ARM, self.handle_arm)
+        self.core.on(EVENT_RESET, self.handle_reset)
+        self.core.on(EVENT_MODE_CHANGE, self.handle_mode_change)
+        self.core.on(EVENT_TIME_SYNC, self.handle_time_sync)
+        self.core.on(EVENT_UI_TICK, self.update_elapsed)
+        self.core.on(EVENT_STATUS_POLL, self.poll_timing_status)
+        self.core.on(EVENT_SELF_TEST, self.handle_self_test)
+        self.udp_receiver = UdpTriggerReceiver(
+            lambda message, received_mono_ns: self.core.post(
+                EVENT_REMOTE_TRIGGER, message=message, received_mono_ns=received_mono_ns),
+            on_time_sync=lambda message, received_mono_ns: self.core.post(
+                EVENT_TIME_SYNC, message=message, received_mono_ns=received_mono_ns))
+        self.core.start()
+        self.core.submit(self.network_listener())
+        if config.CLOCK_SYNC_ENABLED:
+            self.core.submit(self.clock_sync_pinger())
+        self.core.every(EVENT_UI_TICK, 0.05)  # Update 20 times per second
+        self.core.every(EVENT_STATUS_POLL, 5)  # Check every 5 seconds
+
+        # Start background threads
+        threading.Thread(target=self.udp_receiver.serve_forever, daemon=True).start()
+        threading.Thread(target=self.local_gate_handler, daemon=True).start()
+        self.gates_ready_mono_ns = time.monotonic_ns()
+        print(f"Gates ready in {to_seconds(self.gates_ready_mono_ns - self.started_mono_ns) * 1000:.0f} ms")
+
+        # Everything else attaches behind the gates
+        threading.Thread(target=self.attach_display, daemon=True).start()
+        threading.Thread(target=self.attach_web, daemon=True).start()
+        if not self.headless:
+            self.attach_ui(ui_factory)
+
+    def attach_display(self):
+        from hardware.display_driver import TimingDisplay
+        try:
+            self.display = TimingDisplay(config.PRIMARY_DISPLAY_CS_PIN)
+        except Exception as e:
+            print(f"LED display not available: {e}")
+
+    def attach_web(self):
+        try:
+            from web import server, live_hub
+        except ImportError as e:
+            print(f"Web server not available: {e}")
+            return
+        if config.LIVE_HUB_ENABLED:
+            threading.Thread(target=live_hub.run_hub, args=(self.shared_web_data,), daemon=True).start()
+        if config.WEB_WORKERS:
+            self.start_web_workers()
+        server.run_server(self.shared_web_data, self.result_writer, self.core, self.self_test)
+
+    def start_web_workers(self):
+        """Publishes the live state to shared memory and starts the web worker processes on it."""
+        from common.live_snapshot import LiveSnapshot
+        from web import workers
+        try:
+            snapshot = LiveSnapshot()
+            self.shared_web_data.attach_mirror(snapshot)
+            self.web_workers = workers.start_workers(snapshot)
+        except (OSError, ImportError) as e:
+            print(f"Web workers not started: {e}")
+
+    def attach_ui(self, ui_factory=None):
+        """Builds the touchscreen UI; Tk requires this on the main thread."""
+        if ui_factory is None:
+            from ui.app_ui import SprintTimerUI
+            ui_factory = SprintTimerUI
         app_callbacks = {
             'set_runner': self.set_runner,
             'add_runner': self.add_runner,
@@ -50,191 +154,299 @@ class MainApplication:
             'start_gps_sync': self.start_gps_sync,
             'send_wired_signal': self.send_wired_signal,
         }
-        self.ui = SprintTimerUI(app_callbacks)
-        
-        # Start background threads
-        threading.Thread(target=self.network_listener, daemon=True).start()
-        threading.Thread(target=self.local_gate_handler, daemon=True).start()
-        threading.Thread(target=self.ui_updater, daemon=True).start()
-        threading.Thread(target=self.timing_monitor, daemon=True).start()
-        threading.Thread(target=server.run_server, args=(self.shared_web_data,), daemon=True).start()
+        self.ui = ui_factory(app_callbacks)  # SprintTimerUI, or a stand-in when driven by a benchmark
 
     def run(self):
-        """Starts the Tkinter main loop."""
+        """Starts the Tkinter main loop, or waits forever when headless."""
         self.refresh_runner_list()
         self.reset_system()
-        self.ui.mainloop()
+        if self.headless:
+            threading.Event().wait()
+        else:
+            self.ui.mainloop()
 
-    # --- State Machine and Logic ---
+    # --- UI Callbacks (Tk thread) ---
     def set_runner(self, runner_id, runner_name):
-        if self.state in [STATE_IDLE, STATE_FINISHED]:
-            self.current_runner = (runner_id, runner_name)
-            self.state = STATE_ARMED
-            self.ui.update_current_runner(runner_name)
-            self.shared_web_data['current_runner'] = runner_name
-            self.display.show_message("RDY")
-            print(f"Armed for runner: {runner_name}")
-
-    def start_run(self, timestamp):
-        if self.state == STATE_ARMED:
-            self.state = STATE_RUNNING
-            self.start_time = timestamp
-            print(f"Run started at {self.start_time} (mode: {self.timing_mode})")
-
-    def finish_run(self, timestamp):
-        if self.state == STATE_RUNNING:
-            self.state = STATE_FINISHED
-            self.finish_time = timestamp
-            run_time = self.finish_time - self.start_time
-            print(f"Run finished. Time: {run_time:.6f}s (mode: {self.timing_mode})")
-            
-            # Save to DB
-            if self.current_runner:
-                database.add_run_time(self.current_runner[0], run_time)
-            
-            # Update UI and displays
-            self.ui.update_last_run_time(f"{run_time:.3f}")
-            self.display.show_time(run_time)
-            # update shared web data
-            self.shared_web_data['last_run'] = {'name': self.current_runner[1], 'time': run_time}
+        self.core.post(EVENT_ARM, runner=(runner_id, runner_name))
 
     def reset_system(self):
-        self.state = STATE_IDLE if not self.current_runner else STATE_ARMED
-        self.start_time = 0
-        self.finish_time = 0
-        self.ui.update_elapsed_time("0.00")
-        self.ui.update_last_run_time("--.--")
-        self.shared_web_data['elapsed_time'] = "0.00"
-        self.display.clear()
-        print("System reset.")
+        self.core.post(EVENT_RESET)
 
     def start_gps_sync(self):
         """Start GPS synchronization."""
-        if self.timing_sync.wait_for_gps_lock():
-            self.timing_mode = 'GPS'
-            self.shared_web_data['timing_mode'] = 'GPS'
-            self.shared_web_data['gps_status'] = 'LOCKED'
-            print("GPS synchronization active")
-        else:
-            print("GPS synchronization failed")
+        def wait_for_lock():
+            if self.timing_sync.wait_for_gps_lock():
+                self.core.post(EVENT_MODE_CHANGE, mode='GPS')
+                print("GPS synchronization active")
+            else:
+                print("GPS synchronization failed")
+        # Waiting can take GPS_TIMEOUT_SECONDS; keep it off the UI and the core
+        threading.Thread(target=wait_for_lock, daemon=True).start()
 
     def send_wired_signal(self):
         """Send wired synchronization signal."""
         if self.timing_sync.get_current_mode() == 'WIRED':
             timestamp = self.timing_sync.send_wired_signal()
-            self.timing_mode = 'WIRED'
-            self.shared_web_data['timing_mode'] = 'WIRED'
+            self.core.post(EVENT_MODE_CHANGE, mode='WIRED')
             print(f"Wired signal sent at {timestamp}")
 
-    # --- Handlers and Threads ---
+    def add_runner(self, name):
+        # Add to DB and refresh the UI list
+        try:
+            database.add_runner(name)
+            self.refresh_runner_list()
+            print(f"Added runner: {name}")
+        except Exception as e:
+            print(f"Error adding runner: {e}")
+
+    def refresh_runner_list(self):
+        runners = database.get_all_runners()
+        self.ui.update_runner_list(runners)
+
+    # --- Event Handlers (core thread) ---
+    def handle_arm(self, runner):
+        if self.self_test.running:
+            print("Timing self-test in progress; not arming")
+            return
+        # Arms the first free lane
+        lane = self.engine.arm(runner)
+        if lane:
+            self.current_runner = runner
+            self.ui.update_current_runner(runner[1])
+            self.shared_web_data['current_runner'] = runner[1]
+            self.shared_web_data['lanes'] = self.engine.snapshot()
+            self.display.show_message("RDY")
+            print(f"Armed lane {lane.number} for runner: {runner[1]}")
+
+    def handle_self_test(self, pulses=None, rate_hz=None):
+        """Starts the timing self-test, if no lane is armed or running."""
+        if any(lane.state not in (STATE_IDLE, STATE_FINISHED) for lane in self.engine.lanes):
+            self.self_test.last_report = {'status': 'refused', 'reason': 'A lane is armed or running'}
+            return
+        if self.self_test.start(pulses, rate_hz, self.timing_mode):
+            self.display.show_message("TEST")
+            print("Timing self-test started")
+
+    def handle_reset(self):
+        self.engine.reset()
+        if self.current_runner:
+            self.engine.arm(self.current_runner)
+        self.shared_web_data['lanes'] = self.engine.snapshot()
+        self.publish_elapsed_base()
+        self.ui.update_elapsed_time("0.00")
+        self.ui.update_last_run_time("--.--")
+        self.shared_web_data['elapsed_time'] = "0.00"
+        self.display.clear()
+        print("System reset.")
+
+    def handle_mode_change(self, mode):
+        if mode != self.timing_mode:
+            self.timing_mode = mode
+            self.shared_web_data['timing_mode'] = mode
+            self.ui.update_timing_mode(mode)
+            print(f"Timing mode changed to: {mode}")
+            # The monitor's real lock state, never assumed from the mode
+            gps_status = self.timing_sync.get_gps_status()
+            self.shared_web_data['gps_status'] = gps_status
+            self.ui.update_gps_status(gps_status)
+
+    def handle_gate_trigger(self, gate_id, timestamp: Timestamp, timing_mode=None):
+        """Unified logic for handling a trigger from any gate."""
+        print(f"Trigger from gate {gate_id} at {timestamp} (mode: {timing_mode})")
+
+        # Update timing mode if provided
+        if timing_mode:
+            self.timing_mode = timing_mode
+            self.shared_web_data['timing_mode'] = timing_mode
+
+        # The engine matches the trigger to a lane according to the course
+        self.engine.handle_trigger(gate_id, timestamp)
+
+    def handle_remote_trigger(self, message, received_mono_ns: int = None):
+        """A (deduplicated) trigger from a remote gate, over TCP or UDP."""
+        payload = message['payload']
+        self.handle_gate_trigger(payload['gate_id'], self.remote_timestamp(payload),
+                                 payload.get('timing_mode', 'SYSTEM'))
+        if received_mono_ns is not None:
+            NETWORK_RECEIVE_TO_HANDLE.observe_ns(time.monotonic_ns() - received_mono_ns)
+
+    def on_timing_event(self, event, lane, gate):
+        """Listener for the timing engine: a lane started, passed a split, or finished."""
+        if event == EVENT_START:
+            print(f"Lane {lane.number} started at {lane.start_time} (mode: {self.timing_mode})")
+        elif event == EVENT_SPLIT:
+            print(f"Lane {lane.number} split at {gate.gate_id} ({gate.distance} m): "
+                  f"{to_seconds(lane.splits[-1][1]):.6f}s")
+        elif event == EVENT_FINISH:
+            self.finish_run(lane)
+        self.shared_web_data['lanes'] = self.engine.snapshot()
+        self.publish_elapsed_base()
+
+    def publish_elapsed_base(self):
+        """Start of the latest running lane on CLOCK_MONOTONIC, so web workers can compute the elapsed time."""
+        running = self.engine.latest_running()
+        self.shared_web_data['elapsed_base_ns'] = running.start_time.mono_ns if running else None
+
+    def finish_run(self, lane):
+        run_time_ns = lane.run_time_ns
+        run_time = to_seconds(run_time_ns)  # Seconds only for display
+        runner_id, runner_name = lane.runner
+        print(f"Lane {lane.number} finished. Time: {run_time:.6f}s "
+              f"({lane.start_time.source} -> {lane.finish_time.source}, mode: {self.timing_mode})")
+
+        # Journal the result (an fsync, so off the core); the writer thread commits it to the DB
+        splits = [{'gate_id': gate.gate_id, 'distance': gate.distance, 'split_time_ns': split_ns}
+                  for gate, split_ns in lane.splits]
+        future = self.core.run_blocking(self.result_writer.submit, runner_id, run_time_ns, splits)
+        future.add_done_callback(lambda done: self.check_submitted(done, runner_name, run_time))
+
+        # Update UI and displays
+        self.ui.update_last_run_time(f"{run_time:.3f}")
+        self.display.show_time(run_time)
+        # update shared web data
+        self.shared_web_data['last_run'] = {'name': runner_name, 'time': run_time}
+
+    def check_submitted(self, future, runner_name, run_time):
+        """Logs a result that failed to submit; submit() retries journal errors itself, so this is a last resort."""
+        error = future.exception()
+        if error is not None:
+            print(f"Result for {runner_name} ({run_time:.3f}s) NOT RECORDED: {error}")
+
+    def handle_time_sync(self, message, received_mono_ns):
+        """Feeds a clock offset pong from a remote gate to its estimator."""
+        payload = message['payload']
+        if payload.get('op') == 'pong':
+            self.clock_offset(payload.get('gate_id', config.REMOTE_GATE_ID)).add_reply(
+                payload, self.timing_sync.utc_ns_from_monotonic(received_mono_ns))
+
+    def update_elapsed(self):
+        """Periodic: the running time on the UI, the LED display and the web."""
+        # Lets web workers tell when their leaderboard cache is stale
+        self.shared_web_data['data_version'] = database.get_data_version()
+        lane = self.engine.latest_running()
+        if lane:
+            # On the monotonic clock, so a wall-clock step can't make it jump
+            elapsed = to_seconds(time.monotonic_ns() - lane.start_time.mono_ns)
+        elif self.self_test.running:
+            # The same updates as a run, so the self-test measures under that load
+            elapsed = self.self_test.elapsed()
+        else:
+            return
+        time_str = f"{elapsed:.2f}"
+        self.ui.update_elapsed_time(time_str)
+        self.display.show_time(elapsed)
+        self.shared_web_data['elapsed_time'] = time_str
+
+    def poll_timing_status(self):
+        """Periodic: timing mode, GPS and clock offset status."""
+        self.handle_mode_change(self.timing_sync.get_current_mode())
+        gps_status = self.timing_sync.get_gps_status()
+        self.shared_web_data['gps_status'] = gps_status
+        self.ui.update_gps_status(gps_status)
+        self.shared_web_data['clock_model'] = self.timing_sync.get_clock_status()
+        self.shared_web_data['network_offset'] = {gate_id: estimator.status()
+                                                  for gate_id, estimator in self.clock_offsets.items()}
+
+    # --- Gate Inputs ---
     def local_gate_handler(self):
         """Thread to monitor the local gate."""
         while True:
             timestamp = self.local_gate.wait_for_trigger()
-            if timestamp:
-                self.handle_gate_trigger('local', timestamp)
-
-    def network_listener(self):
-        """Thread to listen for connections from the remote gate."""
-        with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as server_socket:
-            server_socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
-            server_socket.bind(('0.0.0.0', config.NETWORK_PORT))
-            server_socket.listen(1)
-            print(f"Network listener started on port {config.NETWORK_PORT}")
-            
-            while True:
-                try:
-                    client_socket, address = server_socket.accept()
-                    print(f"Remote gate connected from {address}")
-                    
-                    # Handle the connection in a separate thread
-                    threading.Thread(target=self.handle_remote_connection, 
-                                  args=(client_socket,), daemon=True).start()
-                except Exception as e:
-                    print(f"Network listener error: {e}")
-
-    def handle_remote_connection(self, client_socket):
-        """Handle a connection from the remote gate."""
+            if timestamp and self.self_test.running:
+                self.self_test.capture(timestamp)
+            elif timestamp:
+                self.core.post(EVENT_GATE_TRIGGER, gate_id=config.LOCAL_GATE_ID, timestamp=timestamp)
+
+    async def network_listener(self):
+        """Accepts connections from remote gates on the core's loop."""
+        listener = await asyncio.start_server(self.handle_remote_connection, '0.0.0.0',
+                                              config.NETWORK_PORT, reuse_address=True)
+        print(f"Network listener started on port {config.NETWORK_PORT}")
+        async with listener:
+            await listener.serve_forever()
+
+    async def handle_remote_connection(self, reader, writer):
+        """Handle a connection from a remote gate."""
+        print(f"Remote gate connection from {writer.get_extra_info('peername')}")
+        decoder = MessageDecoder()
+        gate_id = None
         try:
             while True:
-                data = client_socket.recv(1024)
+                data = await reader.read(4096)
+                received_mono_ns = time.monotonic_ns()
                 if not data:
                     break
-                
-                message = parse_message(data)
-                if message['type'] == MSG_GATE_TRIGGER:
-                    timestamp = message['payload']['timestamp']
-                    timing_mode = message['payload'].get('timing_mode', 'SYSTEM')
-                    self.handle_gate_trigger('remote', timestamp, timing_mode)
-                    
+
+                # TCP may split or merge messages; the decoder reassembles them
+                for message in decoder.feed(data):
+                    payload = message['payload']
+                    if gate_id is None and 'gate_id' in payload:
+                        gate_id = payload['gate_id']
+                        self.remote_links[gate_id] = writer.write
+                        print(f"Remote gate {gate_id} connected")
+                    if message['type'] == MSG_GATE_TRIGGER:
+                        seq = payload.get('seq')
+                        if seq is not None:
+                            # Ack so the remote can drop it from its outbox
+                            writer.write(encode_message(MSG_ACK, {'seq': seq, 'gate_id': payload['gate_id']}))
+                            if self.remote_dedup.is_duplicate(payload['gate_id'], seq):
+                                continue
+                        self.core.dispatch(EVENT_REMOTE_TRIGGER, {'message': message,
+                                                                  'received_mono_ns': received_mono_ns})
+                    elif message['type'] == MSG_TIME_SYNC:
+                        self.core.dispatch(EVENT_TIME_SYNC, {'message': message,
+                                                             'received_mono_ns': received_mono_ns})
+
         except Exception as e:
             print(f"Remote connection error: {e}")
         finally:
-            client_socket.close()
+            if gate_id is not None and self.remote_links.get(gate_id) == writer.write:
+                del self.remote_links[gate_id]
+            writer.close()
 
-    def handle_gate_trigger(self, source, timestamp, timing_mode=None):
-        """Unified logic for handling a trigger from any gate."""
-        print(f"Trigger from {source} gate at {timestamp} (mode: {timing_mode})")
-        
-        # Update timing mode if provided
-        if timing_mode:
-            self.timing_mode = timing_mode
-            self.shared_web_data['timing_mode'] = timing_mode
-        
-        # Logic based on system configuration (which gate is start/stop)
-        # For now, assume local is start and remote is stop.
-        if source == 'local' and self.state == STATE_ARMED:
-            self.start_run(timestamp)
-        elif source == 'remote' and self.state == STATE_RUNNING:
-            self.finish_run(timestamp)
-
-    def timing_monitor(self):
-        """Thread to monitor timing system status."""
-        while True:
-            try:
-                current_mode = self.timing_sync.get_current_mode()
-                if current_mode != self.timing_mode:
-                    self.timing_mode = current_mode
-                    self.shared_web_data['timing_mode'] = current_mode
-                    print(f"Timing mode changed to: {current_mode}")
-                
-                # Update GPS status
-                if current_mode == 'GPS':
-                    self.shared_web_data['gps_status'] = 'LOCKED'
-                else:
-                    self.shared_web_data['gps_status'] = 'UNAVAILABLE'
-                
-                time.sleep(5)  # Check every 5 seconds
-            except Exception as e:
-                print(f"Timing monitor error: {e}")
-                time.sleep(5)
-
-    def ui_updater(self):
-        """Thread to periodically update the UI time display."""
+    def clock_offset(self, gate_id):
+        """The clock offset estimator for one remote gate."""
+        estimator = self.clock_offsets.get(gate_id)
+        if estimator is None:
+            estimator = self.clock_offsets[gate_id] = NetworkClockOffset()
+        return estimator
+
+    def remote_timestamp(self, payload) -> Timestamp:
+        """
+        The remote trigger's timestamp on our clock. When both Pis are on GPS
+        time the clocks already agree; otherwise the gate's network offset
+        estimate is applied once it is valid.
+        """
+        timestamp_ns = to_ns(payload['timestamp'])
+        both_gps = payload.get('timing_mode') == CLOCK_GPS and self.timing_sync.clock_source() == CLOCK_GPS
+        estimator = self.clock_offsets.get(payload['gate_id'])
+        if both_gps:
+            source = CLOCK_GPS
+        elif estimator is not None and estimator.is_valid():
+            timestamp_ns = estimator.to_local(timestamp_ns)
+            source = CLOCK_NETWORK
+        else:
+            source = CLOCK_SYSTEM
+        return Timestamp(timestamp_ns, source, self.timing_sync.monotonic_from_utc_ns(timestamp_ns))
+
+    async def clock_sync_pinger(self):
+        """Pings each remote gate for clock offset samples, over TCP or else UDP."""
         while True:
-            if self.state == STATE_RUNNING:
-                elapsed = time.time() - self.start_time
-                time_str = f"{elapsed:.2f}"
-                self.ui.update_elapsed_time(time_str)
-                self.display.show_time(elapsed)
-                self.shared_web_data['elapsed_time'] = time_str
-            time.sleep(0.05) # Update 20 times per second
-
-    # --- UI Callbacks ---
-    def add_runner(self, name):
-        # Add to DB and refresh the UI list
-        try:
-            database.add_runner(name)
-            self.refresh_runner_list()
-            print(f"Added runner: {name}")
-        except Exception as e:
-            print(f"Error adding runner: {e}")
-    
-    def refresh_runner_list(self):
-        runners = database.get_all_runners()
-        self.ui.update_runner_list(runners)
+            await asyncio.sleep(config.CLOCK_SYNC_INTERVAL)
+            links = dict.fromkeys(list(self.udp_receiver.peers))
+            links.update(self.remote_links)
+            for gate_id, send in links.items():
+                try:
+                    ping = self.clock_offset(gate_id).make_ping(self.timing_sync.now_ns())
+                    frame = encode_message(MSG_TIME_SYNC, ping)
+                    if send:
+                        send(frame)
+                    else:
+                        self.udp_receiver.send_to_peer(gate_id, frame)
+                except OSError as e:
+                    print(f"Clock sync ping error ({gate_id}): {e}")
 
 
 if __name__ == "__main__":
-    app = MainApplication()
+    app = MainApplication(headless=True if '--headless' in sys.argv[1:] else None)
     app.run()
@@ -1,65 +1,212 @@
 # remote_gate.py
+import queue
+import random
 import socket
+import threading
 import time
-from hardware.gate_sensor import GateSensor
+from hardware.gate_sensor import create_gate_sensor
 from hardware.display_driver import TimingDisplay
 from common import config
 from common.timing_sync import TimingSynchronizer
-from common.network import create_gate_trigger_message, parse_message, MSG_GATE_TRIGGER
+from common.network import (encode_gate_trigger, encode_message, MessageDecoder,
+                            MSG_ACK, MSG_TIME_SYNC, MSG_TIMING_MODE)
+from common.clock_offset import time_sync_reply
+from common.outbox import Outbox
+from common.udp_link import UdpTriggerSender
+
+class RemoteGate:
+    """
+    The remote gate as three independent threads:
+
+    - capture: waits on the sensor and queues each trigger. It never touches
+      the network or the display, so back-to-back runners are all captured.
+    - sender: moves triggers from the queue into the on-disk outbox and sends
+      them. Triggers stay in the outbox until the primary acks them and are
+      replayed after a reconnect or a restart.
+    - display: shows status messages, holding "TRIG" briefly before "RDY".
+    """
+
+    def __init__(self, sensor, display, timing_sync):
+        self.sensor = sensor
+        self.display = display
+        self.timing_sync = timing_sync
+        self.outbox = Outbox(config.REMOTE_OUTBOX_FILE, fsync=config.REMOTE_OUTBOX_FSYNC)
+        self.triggers = queue.Queue()
+        self.messages = queue.Queue()
+        # Random start so a restarted gate's sequence numbers aren't mistaken for duplicates
+        self._seq = random.getrandbits(31)
+
+    def show(self, message: str):
+        """Posts a message to the display worker (never blocks)."""
+        self.messages.put_nowait(message)
+
+    def run(self):
+        threading.Thread(target=self._display_worker, daemon=True).start()
+        threading.Thread(target=self._capture, daemon=True).start()
+        self.show("RDY")
+        if config.TRIGGER_TRANSPORT == 'UDP':
+            self._run_udp()
+        else:
+            self._run_tcp()
+
+    # --- Capture ---
+
+    def _capture(self):
+        while True:
+            trigger_time = self.sensor.wait_for_trigger()
+            if trigger_time:
+                self._seq = (self._seq + 1) & 0xFFFFFFFF
+                self.triggers.put_nowait({
+                    'seq': self._seq,
+                    'timestamp': trigger_time.ns,
+                    # The clock the timestamp was actually read from, so the primary
+                    # knows whether it is GPS time
+                    'timing_mode': trigger_time.source,
+                })
+                self.show("TRIG")
+                print(f"Gate triggered at {trigger_time}")
+
+    # --- Sending ---
+
+    def _next_trigger(self, timeout: float = None):
+        """Takes the next captured trigger and stores it in the outbox; None on timeout."""
+        try:
+            record = self.triggers.get(timeout=timeout)
+        except queue.Empty:
+            return None
+        self.outbox.add(record)
+        return record
+
+    def _frame(self, record: dict) -> bytes:
+        return encode_gate_trigger(record['timestamp'], config.REMOTE_GATE_ID,
+                                   record['timing_mode'], record['seq'])
+
+    def _run_tcp(self):
+        while True:
+            try:
+                sock = socket.create_connection((config.PRIMARY_PI_IP, config.NETWORK_PORT),
+                                                timeout=config.REMOTE_CONNECT_TIMEOUT)
+            except OSError as e:
+                print(f"Connection error: {e}. Retrying in {config.REMOTE_RECONNECT_DELAY} seconds...")
+                self.show("ERR")
+                # Keep moving triggers into the outbox while disconnected
+                deadline = time.monotonic() + config.REMOTE_RECONNECT_DELAY
+                while (remaining := deadline - time.monotonic()) > 0:
+                    self._next_trigger(remaining)
+                self.show("RDY")
+                continue
+
+            sock.settimeout(None)
+            self.show("CONN")
+            print("Connected to primary Pi.")
+            closed = threading.Event()
+            send_lock = threading.Lock()
+
+            def send(frame):
+                # Clock sync replies are sent from the reader thread
+                with send_lock:
+                    sock.sendall(frame)
+
+            threading.Thread(target=self._read_acks, args=(sock, send, closed), daemon=True).start()
+            try:
+                # Identify this gate to the primary
+                send(encode_message(MSG_TIMING_MODE, {'gate_id': config.REMOTE_GATE_ID,
+                                                      'timing_mode': self.timing_sync.get_current_mode()}))
+                pending = self.outbox.pending()
+                if pending:
+                    print(f"Replaying {len(pending)} unsent trigger(s)")
+                for record in pending:
+                    send(self._frame(record))
+                while not closed.is_set():
+                    record = self._next_trigger(timeout=0.5)
+                    if record:
+                        send(self._frame(record))
+                print("Connection to primary Pi closed.")
+            except OSError as e:
+                print(f"Connection error: {e}")
+            finally:
+                closed.set()
+                sock.close()
+            self.show("ERR")
+
+    def _read_acks(self, sock, send, closed: threading.Event):
+        """Reads acks and answers the primary's clock offset pings."""
+        decoder = MessageDecoder()
+        try:
+            while not closed.is_set():
+                data = sock.recv(4096)
+                received_ns = self.timing_sync.now_ns()
+                if not data:
+                    break
+                for message in decoder.feed(data):
+                    if message['type'] == MSG_ACK:
+                        self.outbox.mark_sent(message['payload']['seq'])
+                    elif message['type'] == MSG_TIME_SYNC and message['payload'].get('op') == 'ping':
+                        reply = time_sync_reply(message['payload'], received_ns, self.timing_sync.now_ns(),
+                                                config.REMOTE_GATE_ID)
+                        send(encode_message(MSG_TIME_SYNC, reply))
+        except OSError:
+            pass
+        finally:
+            closed.set()
+
+    def _run_udp(self):
+        sender = UdpTriggerSender(gate_id=config.REMOTE_GATE_ID, on_ack=self.outbox.mark_sent,
+                                  clock=self.timing_sync.now_ns)
+        print(f"Sending triggers over UDP to {config.PRIMARY_PI_IP}:{config.UDP_TRIGGER_PORT}")
+        sender.send_hello(self.timing_sync.get_current_mode())
+        for record in self.outbox.pending():
+            sender.send_trigger(record['timestamp'], record['timing_mode'], seq=record['seq'])
+        while True:
+            record = self._next_trigger(timeout=config.REMOTE_HELLO_INTERVAL)
+            if record:
+                sender.send_trigger(record['timestamp'], record['timing_mode'], seq=record['seq'])
+            else:
+                # Datagrams carry no connection; keep the primary able to reach us after its restart
+                sender.send_hello(self.timing_sync.get_current_mode())
+
+    # --- Display ---
+
+    def _display_worker(self):
+        timeout = None
+        while True:
+            try:
+                message = self.messages.get(timeout=timeout)
+            except queue.Empty:
+                self.display.show_message("RDY")
+                timeout = None
+                continue
+            # Only the latest message matters
+            while not self.messages.empty():
+                message = self.messages.get_nowait()
+            self.display.show_message(message)
+            timeout = config.REMOTE_TRIG_DISPLAY_TIME if message == "TRIG" else None
 
 def main():
     """Main loop for the remote gate with high-precision timing."""
+    if config.HARDWARE_BACKEND == 'SIM':
+        from hardware.sim import start_simulator
+        start_simulator()
+
     # Initialize timing synchronizer (slave mode)
     timing_sync = TimingSynchronizer(is_master=False)
-    
+
     # Initialize hardware with timing sync
-    sensor = GateSensor(config.SECONDARY_GATE_PIN, config.DEBOUNCE_TIME, timing_sync)
+    sensor = create_gate_sensor(config.SECONDARY_GATE_PIN, config.DEBOUNCE_TIME, timing_sync)
     display = TimingDisplay(config.SECONDARY_DISPLAY_CS_PIN)
-    display.show_message("RDY")
+    gate = RemoteGate(sensor, display, timing_sync)
 
     # Set up synchronization callback
     def sync_callback(mode, timestamp):
         print(f"Synchronization event: {mode} at {timestamp}")
-        display.show_message("SYNC")
+        gate.show("SYNC")
 
     timing_sync.set_sync_callback(sync_callback)
 
-    while True:
-        try:
-            with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as s:
-                s.connect((config.PRIMARY_PI_IP, config.NETWORK_PORT))
-                display.show_message("CONN")
-                print("Connected to primary Pi.")
-                
-                # Send timing mode information
-                current_mode = timing_sync.get_current_mode()
-                print(f"Current timing mode: {current_mode}")
-                
-                while True:
-                    # Wait for the gate to be triggered
-                    trigger_time = sensor.wait_for_trigger()
-                    if trigger_time:
-                        print(f"Gate triggered at {trigger_time}")
-                        
-                        # Create high-precision trigger message
-                        message = create_gate_trigger_message(
-                            timestamp=trigger_time,
-                            gate_id='REMOTE',
-                            timing_mode=current_mode
-                        )
-                        
-                        s.sendall(message)
-                        display.show_message("TRIG")
-                        time.sleep(1) # Show TRIG message briefly
-                        display.show_message("RDY")
-
-        except (ConnectionRefusedError, BrokenPipeError, TimeoutError) as e:
-            print(f"Connection error: {e}. Retrying in 5 seconds...")
-            display.show_message("ERR")
-            time.sleep(5)
-            display.show_message("RDY")
-        finally:
-            timing_sync.cleanup()
+    try:
+        gate.run()
+    finally:
+        timing_sync.cleanup()
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,6 @@
+# tests/conftest.py
+import os
+import sys
+
+# The project runs from its root (python main_app.py, python -m benchmarks.X); tests import it the same way
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
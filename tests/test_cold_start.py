@@ -0,0 +1,70 @@
+# tests/test_cold_start.py
+"""
+Cold start regression test: a fresh headless primary on the simulated
+hardware, from process launch to a finished run read back from the
+database, must stay under MAX_MS. benchmarks.cold_start_bench breaks the
+same path down by stage.
+"""
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+MAX_MS = 1500.0
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+def child(result_file: str, launched_ns: int):
+    """The primary under test; writes its marks (ms from launch) to `result_file`."""
+    import socket
+    from types import SimpleNamespace
+    from benchmarks.e2e_latency_bench import configure, wait_until
+    from common import config
+    configure(tempfile.mkdtemp(prefix='sprint_cold_test_'), SimpleNamespace(transport='UDP'))
+
+    import main_app
+    from common import database
+    from common.event_core import EVENT_ARM
+    from common.network import encode_gate_trigger
+    from common.timing_engine import STATE_ARMED, STATE_RUNNING
+    from hardware import sim
+
+    app = main_app.MainApplication(headless=True)
+    marks = {'gates': app.gates_ready_mono_ns}
+    runner_id = database.add_runner('Cold Start')
+    app.core.post(EVENT_ARM, runner=(runner_id, 'Cold Start'))
+    if wait_until(lambda: app.engine.lanes[0].state == STATE_ARMED, timeout=10):
+        sim.break_beam(config.PRIMARY_GATE_PIN)
+        if wait_until(lambda: app.engine.lanes[0].state == STATE_RUNNING, timeout=10):
+            marks['trigger'] = time.monotonic_ns()
+            # The finish, as the remote gate would send it
+            sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+            sock.sendto(encode_gate_trigger(time.time_ns(), config.REMOTE_GATE_ID, 'SYSTEM', 1),
+                        ('127.0.0.1', config.UDP_TRIGGER_PORT))
+            if wait_until(lambda: database.get_runner_times(runner_id), timeout=10):
+                marks['result'] = time.monotonic_ns()
+
+    with open(result_file, 'w') as f:
+        json.dump({'marks': {stage: (ns - launched_ns) / 1e6 for stage, ns in marks.items()},
+                   'times': [list(row) for row in database.get_runner_times(runner_id)]}, f)
+    os._exit(0)  # Don't wait on the app's threads
+
+def test_cold_start_to_first_result():
+    result_file = os.path.join(tempfile.mkdtemp(prefix='sprint_cold_result_'), 'result.json')
+    launched_ns = time.monotonic_ns()
+    process = subprocess.run([sys.executable, os.path.abspath(__file__), result_file, str(launched_ns)],
+                             cwd=ROOT, capture_output=True, text=True, timeout=120)
+    assert os.path.exists(result_file), process.stdout + process.stderr
+    with open(result_file) as f:
+        result = json.load(f)
+    marks = result['marks']
+
+    assert 'trigger' in marks, f"start trigger not accepted\n{process.stdout}"
+    assert 'result' in marks, f"finished run not recorded\n{process.stdout}"
+    assert len(result['times']) == 1 and result['times'][0][1] >= 0
+    assert marks['result'] <= MAX_MS, f"launch to first result {marks['result']:.0f} ms > {MAX_MS:.0f} ms"
+
+if __name__ == '__main__':
+    sys.path.insert(0, ROOT)
+    child(sys.argv[1], int(sys.argv[2]))
@@ -0,0 +1,64 @@
+# tests/test_gpio_cdev.py
+"""The character-device gate path, fed synthetic edges instead of a GPIO line."""
+import os
+import time
+
+from common.timestamp import Timestamp, from_seconds
+from hardware.gpio_cdev import CdevGateSensor, GpioLineEventReader, SyntheticEdgeSource, encode_line_event
+
+DEBOUNCE = 0.3
+
+def edge_times(count: int) -> list:
+    """Edge times on CLOCK_MONOTONIC, further apart than the debounce period."""
+    start = time.monotonic_ns()
+    return [start + i * from_seconds(DEBOUNCE * 2) for i in range(count)]
+
+def read_triggers(sensor, count: int) -> list:
+    return [sensor.wait_for_trigger() for _ in range(count)]
+
+def assert_in_order(timestamps, edges):
+    assert all(isinstance(timestamp, Timestamp) for timestamp in timestamps)
+    assert [timestamp.mono_ns for timestamp in timestamps] == edges
+    # Wall-clock ns keep the edges' spacing (same conversion offset within a few µs)
+    gaps = [later.ns - earlier.ns for earlier, later in zip(timestamps, timestamps[1:])]
+    assert all(abs(gap - from_seconds(DEBOUNCE * 2)) < 1_000_000 for gap in gaps)
+
+def test_synthetic_edges_become_timestamps():
+    source = SyntheticEdgeSource()
+    sensor = CdevGateSensor(18, DEBOUNCE, edge_source=source)
+    edges = edge_times(5)
+    for edge_ns in edges:
+        source.inject(edge_ns)
+    assert_in_order(read_triggers(sensor, len(edges)), edges)
+
+def test_kernel_event_layout_round_trips_in_one_read():
+    # A burst queued in the kernel's struct gpio_v2_line_event format, drained by one read
+    read_fd, write_fd = os.pipe()
+    try:
+        edges = edge_times(8)
+        os.write(write_fd, b''.join(encode_line_event(edge_ns, False, seqno)
+                                    for seqno, edge_ns in enumerate(edges, start=1)))
+        reader = GpioLineEventReader.from_fd(read_fd)
+        events = reader.read_events(1.0)
+        assert [(event.timestamp_ns, event.rising, event.seqno) for event in events] == \
+            [(edge_ns, False, seqno) for seqno, edge_ns in enumerate(edges, start=1)]
+
+        os.write(write_fd, b''.join(encode_line_event(edge_ns, False, seqno)
+                                    for seqno, edge_ns in enumerate(edges, start=1)))
+        sensor = CdevGateSensor(18, DEBOUNCE, edge_source=reader)
+        assert_in_order(read_triggers(sensor, len(edges)), edges)
+        assert reader.read_events(0) == []  # Nothing left over, nothing lost
+    finally:
+        os.close(read_fd)
+        os.close(write_fd)
+
+def test_edges_within_debounce_are_dropped():
+    source = SyntheticEdgeSource()
+    sensor = CdevGateSensor(18, DEBOUNCE, edge_source=source)
+    first = time.monotonic_ns()
+    source.inject(first)
+    source.inject(first + from_seconds(DEBOUNCE / 2))
+    source.inject(first + from_seconds(DEBOUNCE * 2))
+    triggers = read_triggers(sensor, 3)
+    assert triggers[1] is None
+    assert [trigger.mono_ns for trigger in (triggers[0], triggers[2])] == [first, first + from_seconds(DEBOUNCE * 2)]
@@ -1,6 +1,8 @@
 # ui/app_ui.py
 import tkinter as tk
 from tkinter import simpledialog, messagebox
+from common import config
+from .update_pump import UpdatePump
 
 class SprintTimerUI(tk.Tk):
     def __init__(self, app_callbacks):
@@ -20,6 +22,24 @@ class SprintTimerUI(tk.Tk):
         # Create main frames
         self.create_widgets()
 
+        # Updates from other threads are queued here and applied on the Tk thread
+        self.pump = UpdatePump({
+            'runner_list': self._write_runner_list,
+            'current_runner': self.current_runner_var.set,
+            'elapsed_time': self.elapsed_time_var.set,
+            'last_run_time': self.last_run_time_var.set,
+            'timing_mode': self.timing_mode_var.set,
+            'gps_status': self.gps_status_var.set,
+        })
+        self.after(config.UI_UPDATE_INTERVAL_MS, self._drain_updates)
+
+    def _drain_updates(self):
+        try:
+            self.pump.drain()
+        finally:
+            # Always reschedule, or the touchscreen would freeze after one error
+            self.after(config.UI_UPDATE_INTERVAL_MS, self._drain_updates)
+
     def create_widgets(self):
         # Main container
         main_frame = tk.Frame(self)
@@ -140,24 +160,28 @@ class SprintTimerUI(tk.Tk):
         if name:
             self.app_callbacks['add_runner'](name)
 
+    # The update_* methods are safe to call from any thread
     def update_runner_list(self, runners):
         # runners is a list of (id, name) tuples
+        self.pump.post('runner_list', tuple(runners))
+
+    def _write_runner_list(self, runners):
         # Clear and update the listbox
         self.runner_listbox.delete(0, tk.END)
         for runner_id, name in runners:
             self.runner_listbox.insert(tk.END, f"{runner_id}: {name}")
 
     def update_current_runner(self, name):
-        self.current_runner_var.set(name)
+        self.pump.post('current_runner', name)
 
     def update_elapsed_time(self, time_str):
-        self.elapsed_time_var.set(time_str)
+        self.pump.post('elapsed_time', time_str)
 
     def update_last_run_time(self, time_str):
-        self.last_run_time_var.set(time_str)
+        self.pump.post('last_run_time', time_str)
     
     def update_timing_mode(self, mode):
-        self.timing_mode_var.set(mode)
+        self.pump.post('timing_mode', mode)
     
     def update_gps_status(self, status):
-        self.gps_status_var.set(status)
+        self.pump.post('gps_status', status)
@@ -0,0 +1,28 @@
+# ui/headless.py
+
+class HeadlessUI:
+    """
+    Stands in for the touchscreen when there is none (headless mode), and
+    until the Tk UI has attached. Updates are dropped.
+    """
+
+    def __init__(self, app_callbacks=None):
+        self.app_callbacks = app_callbacks
+
+    def update_runner_list(self, runners):
+        pass
+
+    def update_current_runner(self, name):
+        pass
+
+    def update_elapsed_time(self, time_str):
+        pass
+
+    def update_last_run_time(self, time_str):
+        pass
+
+    def update_timing_mode(self, mode):
+        pass
+
+    def update_gps_status(self, status):
+        pass
@@ -0,0 +1,52 @@
+# ui/update_pump.py
+import threading
+
+class UpdatePump:
+    """
+    Coalescing, thread-safe queue of UI updates.
+
+    Any thread may post(field, value); only the latest value per field is
+    kept until the next drain(). drain() runs on the Tk thread (from
+    after()) and calls a field's writer only when the value differs from
+    what the widget already shows, so a 20 Hz elapsed-time feed that posts
+    the same string twice, or a status that never changes, costs no Tk work.
+    """
+
+    def __init__(self, writers: dict):
+        self.writers = writers  # field -> function writing a value to its widget
+        self._pending = {}
+        self._shown = {}
+        self._lock = threading.Lock()
+
+        # Statistics
+        self.posted = 0
+        self.written = 0
+        self.errors = 0
+
+    def post(self, field: str, value):
+        """Queues a value for a field (any thread)."""
+        with self._lock:
+            self._pending[field] = value
+            self.posted += 1
+
+    def drain(self) -> int:
+        """Writes every changed field (Tk thread only). Returns the number of widget writes."""
+        with self._lock:
+            if not self._pending:
+                return 0
+            pending, self._pending = self._pending, {}
+        written = 0
+        for field, value in pending.items():
+            if field in self._shown and self._shown[field] == value:
+                continue
+            try:
+                self.writers[field](value)
+            except Exception as e:
+                # One failing widget must not hold back the others
+                print(f"UI update error ({field}): {e}")
+                self.errors += 1
+                continue
+            self._shown[field] = value
+            written += 1
+        self.written += written
+        return written
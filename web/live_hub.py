@@ -0,0 +1,218 @@
+# web/live_hub.py
+"""
+Asyncio WebSocket hub that fans live timing data out to many spectators.
+
+Flask's development server spends a thread per open request, which does not
+hold up to a few hundred phones. The hub runs on its own event loop in a
+single thread: each state update is JSON-encoded and framed once, and the
+same bytes object is handed to every subscriber. Each client has a one-slot
+mailbox, so a slow phone only ever has the latest frame queued and never
+holds back delivery to the others.
+
+Only the parts of RFC 6455 the fan view needs are implemented: the opening
+handshake, unfragmented text frames from the server, and ping/close handling
+for frames from the client.
+"""
+import asyncio
+import base64
+import hashlib
+import json
+import struct
+from common import config
+from common.live_state import live_payload
+
+_WS_GUID = '258EAFA5-E914-47DA-95CA-C5AB0DC85B11'
+_MAX_CLIENT_PAYLOAD = 4096
+
+OP_TEXT = 0x1
+OP_CLOSE = 0x8
+OP_PING = 0x9
+OP_PONG = 0xA
+
+def encode_frame(payload: bytes, opcode: int = OP_TEXT) -> bytes:
+    """Encodes a single unmasked, unfragmented server-to-client frame."""
+    length = len(payload)
+    if length < 126:
+        header = struct.pack('!BB', 0x80 | opcode, length)
+    elif length < 65536:
+        header = struct.pack('!BBH', 0x80 | opcode, 126, length)
+    else:
+        header = struct.pack('!BBQ', 0x80 | opcode, 127, length)
+    return header + payload
+
+def accept_key(client_key: str) -> str:
+    """Computes the Sec-WebSocket-Accept value for a handshake key."""
+    digest = hashlib.sha1((client_key + _WS_GUID).encode('ascii')).digest()
+    return base64.b64encode(digest).decode('ascii')
+
+class _Client:
+    """One subscriber: a latest-frame mailbox drained by its own writer task."""
+    __slots__ = ('writer', 'pending', 'wakeup', 'dropped')
+
+    def __init__(self, writer):
+        self.writer = writer
+        self.pending = None
+        self.wakeup = asyncio.Event()
+        self.dropped = 0
+
+    def offer(self, frame: bytes):
+        if self.pending is not None:
+            # Client hasn't taken the previous frame yet; it only needs the newest
+            self.dropped += 1
+        self.pending = frame
+        self.wakeup.set()
+
+class LiveHub:
+    """WebSocket broadcast server for the live data shown on the fan view."""
+
+    def __init__(self, shared_data=None, host: str = '0.0.0.0', port: int = None):
+        self.shared_data = shared_data
+        self.host = host
+        self.port = port or config.LIVE_HUB_PORT
+        self.clients = set()
+        self.frames_sent = 0
+        self.loop = None
+        self._current_frame = None
+
+    # --- Publishing ---
+    def publish(self, payload: dict):
+        """Encodes a payload once and queues it for every client. Thread-safe."""
+        frame = encode_frame(json.dumps(payload).encode('utf-8'))
+        self.loop.call_soon_threadsafe(self._broadcast, frame)
+
+    def _broadcast(self, frame: bytes):
+        self._current_frame = frame
+        for client in self.clients:
+            client.offer(frame)
+
+    async def _watch_shared_data(self):
+        """Publishes the shared live data whenever it changes."""
+        tick = config.LIVE_STREAM_TICK_INTERVAL
+        wait_for_event = getattr(self.shared_data, 'wait_for_event', None)
+        event_version = -1
+        last_payload = None
+        while True:
+            if wait_for_event:
+                event_version = await self.loop.run_in_executor(
+                    None, wait_for_event, event_version, tick)
+            else:
+                await asyncio.sleep(tick)
+            payload = live_payload(self.shared_data)
+            if payload != last_payload:
+                last_payload = payload
+                self._broadcast(encode_frame(json.dumps(payload).encode('utf-8')))
+
+    # --- Connections ---
+    async def _handshake(self, reader, writer) -> bool:
+        try:
+            request = await asyncio.wait_for(reader.readuntil(b'\r\n\r\n'), timeout=5)
+        except (asyncio.IncompleteReadError, asyncio.LimitOverrunError, asyncio.TimeoutError):
+            return False
+
+        headers = {}
+        for line in request.decode('latin-1').split('\r\n')[1:]:
+            if ':' in line:
+                name, value = line.split(':', 1)
+                headers[name.strip().lower()] = value.strip()
+
+        key = headers.get('sec-websocket-key')
+        if not key or 'websocket' not in headers.get('upgrade', '').lower():
+            writer.write(b'HTTP/1.1 400 Bad Request\r\nConnection: close\r\n\r\n')
+            return False
+
+        writer.write((
+            'HTTP/1.1 101 Switching Protocols\r\n'
+            'Upgrade: websocket\r\n'
+            'Connection: Upgrade\r\n'
+            f'Sec-WebSocket-Accept: {accept_key(key)}\r\n\r\n'
+        ).encode('ascii'))
+        return True
+
+    async def _read_frames(self, reader, writer):
+        """Consumes client frames, answering pings, until close or disconnect."""
+        try:
+            await self._read_frames_until_close(reader, writer)
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+
+    async def _read_frames_until_close(self, reader, writer):
+        while True:
+            head = await reader.readexactly(2)
+            opcode = head[0] & 0x0F
+            length = head[1] & 0x7F
+            if length == 126:
+                length = struct.unpack('!H', await reader.readexactly(2))[0]
+            elif length == 127:
+                length = struct.unpack('!Q', await reader.readexactly(8))[0]
+            if length > _MAX_CLIENT_PAYLOAD:
+                return
+
+            mask = await reader.readexactly(4) if head[1] & 0x80 else b'\x00' * 4
+            data = bytearray(await reader.readexactly(length))
+            for i in range(length):
+                data[i] ^= mask[i % 4]
+
+            if opcode == OP_CLOSE:
+                writer.write(encode_frame(bytes(data[:2]), OP_CLOSE))
+                return
+            if opcode == OP_PING:
+                writer.write(encode_frame(bytes(data), OP_PONG))
+
+    async def _write_frames(self, client: _Client):
+        """Sends the newest pending frame whenever one arrives."""
+        writer = client.writer
+        try:
+            while True:
+                await client.wakeup.wait()
+                client.wakeup.clear()
+                frame, client.pending = client.pending, None
+                writer.write(frame)
+                # A client that can't drain in time is dropped rather than buffered for
+                await asyncio.wait_for(writer.drain(), timeout=config.LIVE_HUB_WRITE_TIMEOUT)
+                self.frames_sent += 1
+        except (ConnectionError, asyncio.TimeoutError):
+            pass
+
+    async def _handle_client(self, reader, writer):
+        client = None
+        tasks = ()
+        try:
+            if not await self._handshake(reader, writer):
+                return
+            # Keep little in the kernel/transport buffers; the mailbox holds the rest
+            writer.transport.set_write_buffer_limits(high=config.LIVE_HUB_WRITE_BUFFER)
+
+            client = _Client(writer)
+            self.clients.add(client)
+            if self._current_frame is not None:
+                client.offer(self._current_frame)
+
+            tasks = (asyncio.ensure_future(self._read_frames(reader, writer)),
+                     asyncio.ensure_future(self._write_frames(client)))
+            await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+        except ConnectionError:
+            pass
+        finally:
+            for task in tasks:
+                task.cancel()
+            if client is not None:
+                self.clients.discard(client)
+            writer.close()
+
+    async def serve_forever(self):
+        """Runs the hub until cancelled."""
+        self.loop = asyncio.get_running_loop()
+        server = await asyncio.start_server(self._handle_client, self.host, self.port,
+                                            reuse_address=True, backlog=1024)
+        print(f"Live WebSocket hub listening on port {self.port}")
+        if self.shared_data is not None:
+            asyncio.ensure_future(self._watch_shared_data())
+        async with server:
+            await server.serve_forever()
+
+def run_hub(shared_data_object):
+    """
+    Function to be run in a separate thread from main_app.py, alongside the
+    Flask server. Spectators connect to ws://<primary>:LIVE_HUB_PORT/.
+    """
+    asyncio.run(LiveHub(shared_data_object).serve_forever())
@@ -1,7 +1,14 @@
 # web/server.py
-from flask import Flask, render_template, jsonify, request, redirect, url_for
+import json
+import os
+import threading
+import time
+from flask import Flask, Response, render_template, jsonify, request, redirect, url_for, g, abort
 from flask_httpauth import HTTPBasicAuth
-from common import database
+from common import config, database
+from common.live_state import live_payload
+from common.event_core import EVENT_ARM, EVENT_RESET, EVENT_SELF_TEST
+from common.metrics import WEB_REQUEST, render_prometheus
 
 app = Flask(__name__)
 auth = HTTPBasicAuth()
@@ -16,56 +23,220 @@ def verify_password(username, password):
     if username in ADMIN_USERS and ADMIN_USERS[username] == password:
         return username
 
+@app.before_request
+def start_request_timer():
+    g.request_start_ns = time.perf_counter_ns()
+
+# Status of the timing process's own writer, event core and metrics registry; a worker has none of them
+_MAIN_PROCESS_PATHS = ('/api/writer_status', '/api/core_status', '/api/metrics')
+
+@app.before_request
+def main_process_routes_only():
+    # Web workers (web/workers.py) serve the public routes; admin and timing status stay with the timing process
+    if app.config.get('WEB_WORKER') and (request.path.startswith('/admin') or request.path in _MAIN_PROCESS_PATHS):
+        abort(404)
+
+@app.after_request
+def observe_request_time(response):
+    """Per-route handling time; for the SSE stream this is the time to open it."""
+    start = g.get('request_start_ns')
+    if start is not None:
+        route = request.url_rule.rule if request.url_rule else 'unmatched'
+        WEB_REQUEST.labels(route).observe_ns(time.perf_counter_ns() - start)
+    return response
+
 # --- Public/Fan Routes ---
 @app.route('/')
 def fan_view():
-    return render_template('fan_view.html')
+    live_hub_port = config.LIVE_HUB_PORT if config.LIVE_HUB_ENABLED else None
+    return render_template('fan_view.html', live_hub_port=live_hub_port)
+
+def _snapshot(shared_data) -> dict:
+    """One consistent copy of the live state (a LiveState, or a LiveSnapshotReader in a web worker)."""
+    return shared_data.snapshot() if hasattr(shared_data, 'snapshot') else shared_data
 
 @app.route('/api/live_data')
 def live_data():
     """API endpoint for live data polling by the fan view."""
     # Get shared data from the main application
     shared_data = app.config.get('SHARED_DATA', {})
-    return jsonify({
-        'current_runner': shared_data.get('current_runner', 'N/A'),
-        'elapsed_time': shared_data.get('elapsed_time', '0.00'),
-        'last_run': shared_data.get('last_run', {'name': 'N/A', 'time': 0.0}),
-        'timing_mode': shared_data.get('timing_mode', 'SYSTEM'),
-        'gps_status': shared_data.get('gps_status', 'UNKNOWN')
-    })
+    return jsonify(live_payload(_snapshot(shared_data)))
+
+def _live_stream_events(shared_data):
+    """
+    Generator of Server-Sent Events for one client. Run state changes (arm,
+    start, finish, mode change) wake it immediately; while a run is in
+    progress the elapsed time is sampled every LIVE_STREAM_TICK_INTERVAL.
+    Nothing is sent unless the payload changed, apart from keep-alives.
+    """
+    tick = config.LIVE_STREAM_TICK_INTERVAL
+    wait_for_event = getattr(shared_data, 'wait_for_event', None)
+    event_version = -1
+    last_payload = None
+    last_send = time.monotonic()
+
+    # Ask the browser to reconnect quickly if the stream drops
+    yield 'retry: 2000\n\n'
+    while True:
+        if wait_for_event:
+            event_version = wait_for_event(event_version, tick)
+        else:
+            time.sleep(tick)
+
+        payload = live_payload(_snapshot(shared_data))
+        now = time.monotonic()
+        if payload != last_payload:
+            last_payload = payload
+            last_send = now
+            yield f"data: {json.dumps(payload)}\n\n"
+        elif now - last_send >= config.LIVE_STREAM_KEEPALIVE:
+            last_send = now
+            yield ': keep-alive\n\n'
+
+@app.route('/api/live_stream')
+def live_stream():
+    """Server-Sent Events stream of live data for the fan view."""
+    shared_data = app.config.get('SHARED_DATA', {})
+    return Response(_live_stream_events(shared_data), mimetype='text/event-stream',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
+# Leaderboard cache: (data_version, etag, json_bytes). The stats only change
+# when the database does, so every request between writes reuses the same
+# serialized body, and clients revalidating with If-None-Match get a 304.
+# The boot id keeps ETags from a previous run from matching after a restart.
+_BOOT_ID = os.urandom(4).hex()
+_stats_cache = (None, None, None)
+_stats_cache_lock = threading.Lock()
+
+def get_cached_stats():
+    """Returns (etag, json_bytes) for the leaderboard, recomputing only when stale."""
+    global _stats_cache
+    if app.config.get('WEB_WORKER'):
+        # Writes happen in the main process; it publishes its data version
+        version = app.config['SHARED_DATA'].get('data_version', 0)
+    else:
+        version = database.get_data_version()
+    cached_version, etag, body = _stats_cache
+    if cached_version == version:
+        return etag, body
+
+    with _stats_cache_lock:
+        cached_version, etag, body = _stats_cache
+        if cached_version != version:
+            # Tag with the version read *before* querying: a write racing the
+            # query only makes the next request recompute, never serves stale data.
+            body = json.dumps(database.get_leaderboard_stats()).encode('utf-8')
+            etag = f"stats-{_BOOT_ID}-{version}"
+            _stats_cache = (version, etag, body)
+        return etag, body
 
 @app.route('/api/stats')
 def stats():
     """API endpoint for fetching all stats."""
-    stats_data = database.get_leaderboard_stats()
-    return jsonify(stats_data)
+    etag, body = get_cached_stats()
+    if request.if_none_match.contains(etag):
+        response = Response(status=304)
+    else:
+        response = Response(body, mimetype='application/json')
+    response.set_etag(etag)
+    # Let browsers keep the body but revalidate on every poll
+    response.headers['Cache-Control'] = 'no-cache'
+    return response
 
 @app.route('/api/timing_status')
 def timing_status():
     """API endpoint for timing system status."""
-    shared_data = app.config.get('SHARED_DATA', {})
+    shared_data = _snapshot(app.config.get('SHARED_DATA', {}))
     return jsonify({
         'timing_mode': shared_data.get('timing_mode', 'SYSTEM'),
         'gps_status': shared_data.get('gps_status', 'UNKNOWN'),
-        'precision': 'nanosecond' if shared_data.get('timing_mode') in ['GPS', 'WIRED'] else 'millisecond'
+        'precision': 'nanosecond' if shared_data.get('timing_mode') in ['GPS', 'WIRED'] else 'millisecond',
+        'clock_model': shared_data.get('clock_model', {}),
+        'network_offset': shared_data.get('network_offset', {})
     })
 
+@app.route('/api/writer_status')
+def writer_status():
+    """API endpoint for the result write-behind queue: depth and commit latency."""
+    result_writer = app.config.get('RESULT_WRITER')
+    return jsonify(result_writer.stats() if result_writer else {})
+
+@app.route('/api/core_status')
+def core_status():
+    """API endpoint for the event core: event counts, queueing delay and handling time."""
+    core = app.config.get('EVENT_CORE')
+    return jsonify(core.stats() if core else {})
+
+@app.route('/api/metrics')
+def metrics():
+    """Per-stage latency histograms in the Prometheus text format."""
+    return Response(render_prometheus(), mimetype='text/plain; version=0.0.4')
+
 # --- Admin Routes ---
 @app.route('/admin')
 @auth.login_required
 def admin_dashboard():
-    # Fetch all runners and their times for display
-    runners = database.get_all_runners()
-    # For each runner, fetch their times
-    runner_data = []
-    for runner_id, name in runners:
-        times = database.get_runner_times(runner_id)
-        runner_data.append({
-            'id': runner_id,
-            'name': name,
-            'times': times
-        })
-    return render_template('admin.html', all_data=runner_data)
+    # Runner sections are fetched page by page from /admin/api/runners
+    return render_template('admin.html', page_size=config.ADMIN_PAGE_SIZE)
+
+@app.route('/admin/api/runners')
+@auth.login_required
+def admin_runner_page():
+    """Paginated runners with their times. Pass back `next` to get the following page."""
+    limit = max(1, min(request.args.get('limit', config.ADMIN_PAGE_SIZE, type=int), 100))
+    runners, next_cursor = database.get_runner_page(
+        after_name=request.args.get('after_name'),
+        after_id=request.args.get('after_id', 0, type=int),
+        limit=limit,
+        name_filter=request.args.get('q'),
+    )
+    return jsonify({
+        'runners': runners,
+        'next': {'after_name': next_cursor[0], 'after_id': next_cursor[1]} if next_cursor else None
+    })
+
+@app.route('/admin/api/self_test', methods=['GET', 'POST'])
+@auth.login_required
+def admin_self_test():
+    """GET: progress or the last report. POST: starts the timing self-test (optional pulses, rate_hz)."""
+    self_test = app.config.get('SELF_TEST')
+    core = app.config.get('EVENT_CORE')
+    if self_test is None or core is None:
+        return jsonify({'status': 'unavailable'})
+    if request.method == 'POST':
+        data = request.get_json(silent=True) or {}
+        core.post(EVENT_SELF_TEST, pulses=data.get('pulses'), rate_hz=data.get('rate_hz'))
+        return jsonify({'status': 'requested'})
+    if self_test.running:
+        return jsonify({**self_test.last_report, 'elapsed': round(self_test.elapsed(), 1)})
+    return jsonify(self_test.last_report or {'status': 'idle'})
+
+@app.route('/admin/api/arm', methods=['POST'])
+@auth.login_required
+def admin_arm():
+    """Arms the next free lane for a runner, by `runner_id` or `name` (added if new). Works headless."""
+    core = app.config.get('EVENT_CORE')
+    if core is None:
+        return jsonify({'status': 'unavailable'}), 503
+    data = request.get_json(silent=True) or {}
+    if data.get('name'):
+        runner = (database.add_runner(data['name']), data['name'])
+    else:
+        runner = database.get_runner(data.get('runner_id', 0))
+        if runner is None:
+            return jsonify({'status': 'error', 'message': 'Unknown runner'}), 404
+    core.post(EVENT_ARM, runner=tuple(runner))
+    return jsonify({'status': 'requested', 'runner': list(runner)})
+
+@app.route('/admin/api/reset', methods=['POST'])
+@auth.login_required
+def admin_reset():
+    """Resets the timing system, as the touchscreen's Reset button does."""
+    core = app.config.get('EVENT_CORE')
+    if core is None:
+        return jsonify({'status': 'unavailable'}), 503
+    core.post(EVENT_RESET)
+    return jsonify({'status': 'requested'})
 
 @app.route('/admin/update_time', methods=['POST'])
 @auth.login_required
@@ -81,11 +252,14 @@ def admin_delete_time():
     database.delete_run_time(data['id'])
     return jsonify({'status': 'success'})
 
-def run_server(shared_data_object):
+def run_server(shared_data_object, result_writer=None, event_core=None, self_test=None):
     """
     Function to be run in a separate thread from main_app.py
     The shared_data_object will be used to pass live data from the main app.
     """
     # Make shared_data_object accessible to routes
     app.config['SHARED_DATA'] = shared_data_object
-    app.run(host='0.0.0.0', port=80, debug=False)
+    app.config['RESULT_WRITER'] = result_writer
+    app.config['EVENT_CORE'] = event_core
+    app.config['SELF_TEST'] = self_test
+    app.run(host='0.0.0.0', port=config.WEB_PORT, debug=False)
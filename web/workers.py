@@ -0,0 +1,45 @@
+# web/workers.py
+"""
+Web worker processes (config.WEB_WORKERS) for the fan view and public APIs.
+
+The main application's web server keeps serving everything, including the
+admin panel. The workers share one listening socket on WEB_WORKER_PORT
+and serve the read-only routes, each in its own interpreter, so spectator
+traffic neither contends for the timing process's GIL nor waits on it.
+They read the live state from the shared-memory LiveSnapshot and the
+leaderboard straight from SQLite; the admin routes are not served there.
+"""
+import multiprocessing
+import socket
+from common import config
+
+def _settings() -> dict:
+    """The main process's configuration, including any changes made at runtime."""
+    return {name: getattr(config, name) for name in dir(config) if name.isupper()}
+
+def start_workers(snapshot, count: int = None, port: int = None) -> list:
+    """Starts the worker processes on a shared listening socket; returns them."""
+    from . import server
+    listener = socket.create_server(('0.0.0.0', port or config.WEB_WORKER_PORT), backlog=128)
+    # spawn: the workers must not inherit the timing process's threads and locks
+    context = multiprocessing.get_context('spawn')
+    workers = []
+    for number in range(count or config.WEB_WORKERS):
+        worker = context.Process(target=_worker_main, name=f'web-worker-{number}', daemon=True,
+                                 args=(listener, snapshot.name, _settings(), server._BOOT_ID))
+        worker.start()
+        workers.append(worker)
+    print(f"{len(workers)} web worker(s) on port {listener.getsockname()[1]}")
+    return workers
+
+def _worker_main(listener, snapshot_name: str, settings: dict, boot_id: str):
+    for name, value in settings.items():
+        setattr(config, name, value)
+    from werkzeug.serving import make_server
+    from common.live_snapshot import LiveSnapshotReader
+    from . import server
+    server._BOOT_ID = boot_id  # Same ETags in every process, so revalidation works whichever one answers
+    server.app.config['SHARED_DATA'] = LiveSnapshotReader(snapshot_name)
+    server.app.config['WEB_WORKER'] = True
+    host, port = listener.getsockname()[:2]
+    make_server(host, port, server.app, threaded=True, fd=listener.fileno()).serve_forever()